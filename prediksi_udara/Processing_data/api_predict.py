@@ -2,12 +2,42 @@
 Flask API untuk Prediksi Kualitas Udara
 Menggunakan model Random Forest yang sudah dilatih
 """
-from flask import Flask, request, jsonify
+from flask import Flask, g, has_request_context, request, jsonify, stream_with_context
 from flask_cors import CORS
-import joblib
+import hmac
 import numpy as np
-import pandas as pd
 import os
+import threading
+import time
+
+from dataset_loader import load_dataset_lean
+from dataset_sampler import StratifiedSampler
+from dataset_stats import CHECK_INTERVAL, StatsCache, file_fingerprint
+from metrics import CONTENT_TYPE, Metrics
+from microbatch import BatchTimeout, MicroBatcher
+from model_registry import REGISTRY_DIR, ModelRegistry, list_versions
+from prediction_cache import PREDICTION_CACHE_SIZE, PredictionCache
+from response_format import (
+    InvalidPayload,
+    batch_codes,
+    invalid_fields,
+    is_minimal,
+    minimal_batch,
+    minimal_prediction,
+    negotiate,
+    not_acceptable,
+    read_payload,
+    respond
+)
+from sampling_profiler import SamplingProfiler
+from startup import LazyResource, StartupState
+from station_stream import NDJSON, StationAggregates, stream_predictions
+from validasi_input import (
+    FEATURE_COLUMNS,
+    VALID_RANGES_TEXT,
+    get_validation_errors,
+    validasi_range
+)
 
 app = Flask(__name__)
 CORS(app)  # Izinkan akses dari frontend
@@ -17,27 +47,150 @@ CORS(app)  # Izinkan akses dari frontend
 # =====================================
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.pkl")
-SCALER_PATH = os.path.join(CURRENT_DIR, "scaler_beijing_v3.pkl")
 DATASET_PATH = os.path.join(CURRENT_DIR, "dataset_kualitas_udara_beijing_final.csv")
 
-# Load model dan scaler
-try:
-    model = joblib.load(MODEL_PATH)
-    scaler = joblib.load(SCALER_PATH)
-    print("✅ Model dan Scaler berhasil dimuat!")
-except Exception as e:
-    print(f"❌ Error loading model/scaler: {e}")
-    print("⚠️  Jalankan train_model.py terlebih dahulu!")
-    model = None
-    scaler = None
-
-# Load dataset untuk statistik
-try:
-    df = pd.read_csv(DATASET_PATH)
+# Engine inferensi (lihat forest_engine.py):
+# - "sklearn"  : pickle RandomForestClassifier
+# - "flat"     : forest format array NumPy, input tetap di-scale
+# - "flat_raw" : forest format array dengan scaler dilipat ke threshold,
+#                input mentah langsung masuk ke forest tanpa scaler.transform
+# - "compact" / "compact_raw" : seperti flat / flat_raw dalam format ringkas .rfc
+#                yang di-mmap (muat hampir instan, memori dibagi antar worker)
+MODEL_ENGINE = os.environ.get("MODEL_ENGINE", "sklearn")
+
+# Lookup grid offline (opsional, lihat prediction_grid.py):
+# PREDICTION_GRID=<folder grid>, PREDICTION_GRID_MODE=nearest|interpolate|exact
+PREDICTION_GRID = os.environ.get("PREDICTION_GRID")
+PREDICTION_GRID_MODE = os.environ.get("PREDICTION_GRID_MODE", "nearest")
+
+# Model dimuat dari registry berversi (models/<versi>/, lihat model_registry.py),
+# atau dari model_kualitas_udara_beijing_v3.* + scaler_beijing_v3.pkl jika
+# registry masih kosong. Setiap request mengambil
+# registry.current sekali, sehingga model bisa ditukar (hot reload) tanpa
+# restart dan request yang sedang berjalan tetap selesai dengan model lama.
+registry = ModelRegistry(
+    engine=MODEL_ENGINE,
+    grid_dir=os.path.join(CURRENT_DIR, PREDICTION_GRID) if PREDICTION_GRID else None,
+    grid_mode=PREDICTION_GRID_MODE
+)
+
+# STARTUP_MODE=background (default): model dimuat + warm-up di thread latar
+# belakang, server langsung menjawab /health/live dan /health/ready baru 200
+# setelah model siap. STARTUP_MODE=eager: dimuat saat import (lihat startup.py)
+startup = StartupState()
+
+
+def load_model():
+    try:
+        registry.load()
+    except Exception as e:
+        print(f"❌ Error loading model/scaler: {e}")
+        print("⚠️  Jalankan train_model.py terlebih dahulu!")
+        raise
+    print(f"✅ Model dan Scaler berhasil dimuat! (versi {registry.current.version}, "
+          f"siap {startup.elapsed():.2f}s sejak proses dimulai)")
+
+
+startup.run(load_model)
+
+# Registry dicek setiap MODEL_WATCH_INTERVAL detik, versi baru dimuat otomatis
+# (0 = nonaktif, reload hanya lewat POST /admin/reload)
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", "10"))
+
+# Token untuk POST /admin/reload (header X-Admin-Token).
+# Jika tidak di-set, endpoint hanya bisa diakses dari localhost
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Timing per tahap + counter request, diekspor di GET /metrics (lihat metrics.py)
+metrics = Metrics()
+
+# Sampling profiler opsional (lihat sampling_profiler.py):
+# PROFILER_OUTPUT=profile_{pid}.txt untuk sampling terus-menerus
+PROFILER_OUTPUT = os.environ.get("PROFILER_OUTPUT")
+MAX_PROFILE_SECONDS = 300
+
+
+# Cache LRU hasil /predict (aktif jika PREDICTION_CACHE_SIZE > 0).
+# Key = input terkuantisasi + versi model, jadi otomatis kosong saat model berganti
+prediction_cache = PredictionCache() if PREDICTION_CACHE_SIZE > 0 else None
+
+# Dataset untuk statistik & sample dimuat saat /stats atau /sample pertama kali
+# membutuhkannya (pandas pun baru diimpor saat itu).
+# Hanya kolom yang dipakai (float32 + label categorical), dari cache biner
+# yang di-memory-map jika tersedia (lihat dataset_loader.py)
+def load_dataset():
+    try:
+        df = load_dataset_lean(DATASET_PATH)
+    except Exception as e:
+        print(f"❌ Error loading dataset: {e}")
+        return None
+    startup.mark("dataset_loaded")
     print(f"✅ Dataset dimuat: {len(df)} data")
-except Exception as e:
-    print(f"❌ Error loading dataset: {e}")
-    df = None
+    return df
+
+
+# Dimuat ulang jika file dataset berubah (ukuran/mtime), agar /sample tidak
+# menyajikan baris dari isi file yang lama
+dataset = LazyResource(load_dataset, watch=lambda: file_fingerprint(DATASET_PATH), check_interval=CHECK_INTERVAL)
+
+# Statistik dibaca dari sidecar train_model.py (tanpa dataset) atau dihitung
+# sekali dari dataset, dihitung ulang otomatis jika dataset/model di disk berubah.
+# Loader-nya load_dataset (bukan dataset.get) agar saat file dataset berubah
+# statistik dihitung dari isi file yang baru, bukan DataFrame lama di memori
+stats_cache = StatsCache(
+    DATASET_PATH,
+    lambda: registry.current.model_path if registry.current is not None else MODEL_PATH,
+    load_dataset
+)
+
+
+# Index baris per kelas untuk /sample (dibangun saat /sample pertama)
+def build_sampler():
+    df = dataset.get()
+    return StratifiedSampler(df) if df is not None else None
+
+
+def dataset_generation():
+    """Generasi dataset yang aktif (memicu pengecekan file), watch untuk sampler"""
+    dataset.get()
+    return dataset.generation
+
+
+# Dibangun ulang setiap kali dataset dimuat ulang
+sampler = LazyResource(build_sampler, watch=dataset_generation, check_interval=0)
+
+
+def preload():
+    """
+    Muat semua resource sekarang (blocking): model, dataset, statistik dan
+    sampler. Dipanggil serve.py / gunicorn.conf.py di proses induk sebelum
+    fork agar worker berbagi page memori hasil preload.
+    """
+    startup.wait()
+    sampler.get()
+    stats_cache.get()
+
+
+# Mapping kualitas ke skor (untuk tampilan frontend)
+QUALITY_SCORES = {
+    "Baik": 85,
+    "Sedang": 60,
+    "Buruk": 30
+}
+
+# Mapping kualitas ke icon
+QUALITY_ICONS = {
+    "Baik": "✅",
+    "Sedang": "⚠️",
+    "Buruk": "❌"
+}
+
+# Batas jumlah baris per request /predict/batch
+MAX_BATCH_ROWS = int(os.environ.get("MAX_BATCH_ROWS", "10000"))
+
+# Jumlah sample default dan maksimum per kelas untuk /sample
+DEFAULT_SAMPLE_PER_CLASS = 5
+MAX_SAMPLE_PER_CLASS = int(os.environ.get("MAX_SAMPLE_PER_CLASS", "1000"))
 
 
 def get_confidence_score(probabilities):
@@ -86,10 +239,224 @@ def get_feedback(suhu, kelembapan, tekanan, kecepatan_angin, kualitas):
     return feedback
 
 
+def int_param(value):
+    """Konversi query parameter ke int dengan pesan error yang jelas"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{value}' bukan bilangan bulat")
+
+
+def stage(name):
+    """Timer satu tahap; di luar request (thread micro-batch) dicatat sebagai endpoint 'microbatch'"""
+    return metrics.timer(request.endpoint if has_request_context() else "microbatch", name)
+
+
+def model_unavailable():
+    """Response jika belum ada model aktif: 503 selama startup, 500 jika gagal dimuat"""
+    if startup.loading:
+        response = jsonify({
+            "error": "Model sedang dimuat, coba lagi sesaat lagi",
+            "startup": startup.info()
+        })
+        response.headers["Retry-After"] = "1"
+        return response, 503
+    return jsonify({
+        "error": "Model belum dimuat. Jalankan train_model.py terlebih dahulu."
+    }), 500
+
+
+def skor_matrix(X, bundle):
+    """Normalisasi + prediksi matrix input (n, 4) dengan model milik bundle"""
+    return bundle.score(X, timer=stage)
+
+
+def build_prediction(values, prediction, probabilities, class_names):
+    """Menyusun payload hasil prediksi untuk satu baris (format sama dengan /predict)"""
+    suhu, kelembapan, tekanan, kecepatan_angin = (float(v) for v in values)
+    prediction = str(prediction)
+
+    # Probabilitas per kelas
+    prob_dict = {str(class_names[i]): round(float(probabilities[i]) * 100, 2) for i in range(len(class_names))}
+
+    return {
+        "success": True,
+        "prediction": {
+            "kualitas": prediction,
+            "score": QUALITY_SCORES.get(prediction, 50),
+            "confidence": get_confidence_score(probabilities),
+            "icon": QUALITY_ICONS.get(prediction, "❓"),
+            "probabilities": prob_dict
+        },
+        "input": {
+            "suhu": suhu,
+            "kelembapan": kelembapan,
+            "tekanan": tekanan,
+            "kecepatan_angin": kecepatan_angin
+        },
+        "feedback": get_feedback(suhu, kelembapan, tekanan, kecepatan_angin, prediction)
+    }
+
+
+# Micro-batching /predict (MICROBATCH=1): request yang datang bersamaan dinilai
+# dalam satu panggilan forest. Jalankan dengan server ber-thread agar
+# request bisa menunggu bersamaan (app.run default threaded, serve.py --threaded).
+# Baris dikelompokkan per bundle model, jadi aman saat model sedang ditukar
+batcher = MicroBatcher(skor_matrix) if os.environ.get("MICROBATCH", "0") == "1" else None
+
+# Agregat bergulir per stasiun untuk /predict/stream (memori tetap, per proses)
+station_aggregates = StationAggregates()
+
+
+def skor_stream(X):
+    """Skor satu micro-batch stream dengan model yang aktif saat itu"""
+    bundle = registry.current
+    if bundle is None:
+        raise RuntimeError("Model belum dimuat")
+    _, probabilities = skor_matrix(X, bundle)
+    return bundle, probabilities
+
+
+def batch_rows(data):
+    """Jumlah baris payload /predict/batch (sebelum di-parse, untuk cek MAX_BATCH_ROWS)"""
+    if isinstance(data, dict) and "readings" in data:
+        data = data["readings"]
+    if isinstance(data, dict):
+        return max((len(data[f]) for f in FEATURE_COLUMNS if isinstance(data.get(f), list)), default=0)
+    if isinstance(data, list):
+        return len(data)
+    return 0
+
+
+def parse_batch_payload(data):
+    """
+    Mengubah payload /predict/batch menjadi matrix float (n, 4).
+
+    Format yang diterima:
+    - Array of object: [{"suhu": .., "kelembapan": .., ...}, ...]
+    - Object dengan key "readings" berisi array of object
+    - Kolumnar: {"suhu": [..], "kelembapan": [..], "tekanan": [..], "kecepatan_angin": [..]}
+
+    Mengembalikan (X, row_errors). Baris yang gagal di-parse berisi NaN
+    dan pesan errornya ada di row_errors[index].
+    """
+    if isinstance(data, dict) and "readings" in data:
+        data = data["readings"]
+
+    row_errors = {}
+
+    if isinstance(data, dict):
+        # Format kolumnar
+        for field in FEATURE_COLUMNS:
+            if field not in data:
+                raise ValueError(f"Field '{field}' tidak ditemukan")
+            if not isinstance(data[field], list):
+                raise ValueError(f"Field '{field}' harus berupa array")
+        n_rows = len(data[FEATURE_COLUMNS[0]])
+        if any(len(data[field]) != n_rows for field in FEATURE_COLUMNS):
+            raise ValueError("Panjang array setiap field harus sama")
+
+        X = np.empty((n_rows, len(FEATURE_COLUMNS)), dtype=np.float64)
+        for j, field in enumerate(FEATURE_COLUMNS):
+            try:
+                column = np.asarray(data[field], dtype=np.float64)
+            except (TypeError, ValueError):
+                column = None
+            # NaN bisa berasal dari null (float(None) gagal di format baris),
+            # kolom seperti itu dicek per nilai agar pesan errornya sama
+            if column is not None and column.ndim == 1 and not np.isnan(column).any():
+                X[:, j] = column
+            else:
+                # Ada nilai yang tidak bisa dikonversi, cek satu per satu.
+                # Array bersarang ([[1], [2]]) ditolak, tidak di-broadcast
+                for i, value in enumerate(data[field]):
+                    if isinstance(value, (list, dict)):
+                        raise ValueError(f"Field '{field}' harus berupa array 1 dimensi (baris {i})")
+                    try:
+                        X[i, j] = float(value)
+                    except (TypeError, ValueError) as e:
+                        X[i, j] = np.nan
+                        row_errors.setdefault(i, f"Nilai input tidak valid: {str(e)}")
+        return X, row_errors
+
+    if not isinstance(data, list):
+        raise ValueError("Payload harus berupa array data atau objek kolumnar")
+
+    X = np.full((len(data), len(FEATURE_COLUMNS)), np.nan, dtype=np.float64)
+    for i, row in enumerate(data):
+        if not isinstance(row, dict):
+            row_errors[i] = "Setiap data harus berupa objek"
+            continue
+        for j, field in enumerate(FEATURE_COLUMNS):
+            if field not in row:
+                row_errors[i] = f"Field '{field}' tidak ditemukan"
+                break
+            try:
+                X[i, j] = float(row[field])
+            except (TypeError, ValueError) as e:
+                row_errors[i] = f"Nilai input tidak valid: {str(e)}"
+                break
+    return X, row_errors
+
+
 # =====================================
 # API ENDPOINTS
 # =====================================
 
+def is_admin_request():
+    """Cek akses endpoint admin: token jika ADMIN_TOKEN di-set, selain itu hanya localhost"""
+    if ADMIN_TOKEN:
+        token = request.headers.get("X-Admin-Token", "")
+        return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+    return request.remote_addr in ("127.0.0.1", "::1")
+
+
+# Thread yang sedang melayani request, hanya thread ini (dan scorer micro-batch)
+# yang disampling profiler agar thread idle tidak mendominasi hasil
+active_request_threads = set()
+profilers = {}
+
+
+def profiled_threads():
+    scorers = {t.ident for t in threading.enumerate() if t.name == "microbatch-scorer"}
+    return set(active_request_threads) | scorers
+
+
+def get_profiler(output):
+    """Satu profiler per file output per proses (thread tidak ikut ter-fork)"""
+    key = (os.getpid(), output)
+    if key not in profilers:
+        profilers[key] = SamplingProfiler(output, thread_filter=profiled_threads)
+    return profilers[key]
+
+
+@app.before_request
+def before_request():
+    g.request_start = time.perf_counter()
+    startup.mark("first_request")
+    active_request_threads.add(threading.get_ident())
+    # Thread watcher & profiler dimulai per proses (aman untuk worker hasil fork di serve.py)
+    registry.start_watcher(MODEL_WATCH_INTERVAL)
+    if PROFILER_OUTPUT:
+        profiler = get_profiler(os.path.join(CURRENT_DIR, PROFILER_OUTPUT.format(pid=os.getpid())))
+        if not profiler.running:
+            profiler.start()
+
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get("request_start")
+    if start is not None:
+        metrics.observe_request(request.endpoint, request.method, response.status_code,
+                                time.perf_counter() - start)
+    return response
+
+
+@app.teardown_request
+def release_request_thread(exc):
+    active_request_threads.discard(threading.get_ident())
+
+
 @app.route("/", methods=["GET"])
 def home():
     """Endpoint untuk health check"""
@@ -97,24 +464,72 @@ def home():
         "status": "ok",
         "message": "API Prediksi Kualitas Udara Beijing",
         "version": "1.0.0",
-        "model_loaded": model is not None,
-        "dataset_loaded": df is not None,
+        "model_loaded": registry.current is not None,
+        "dataset_loaded": dataset.peek() is not None,
         "endpoints": {
             "predict": "POST /predict",
+            "predict_batch": "POST /predict/batch",
+            "predict_stream": "POST /predict/stream",
+            "stream_stations": "GET /stream/stations",
+            "model_classes": "GET /model/classes",
             "stats": "GET /stats",
-            "health": "GET /health"
+            "health": "GET /health",
+            "health_live": "GET /health/live",
+            "health_ready": "GET /health/ready",
+            "metrics": "GET /metrics"
         }
     })
 
 
 @app.route("/health", methods=["GET"])
 def health():
-    """Endpoint untuk mengecek status API"""
+    """Endpoint untuk mengecek status API (tidak memicu pemuatan dataset)"""
+    bundle = registry.current
+    df = dataset.peek()
+    return jsonify({
+        "status": "healthy" if bundle is not None else "unhealthy",
+        "model_loaded": bundle is not None,
+        "scaler_loaded": bundle is not None and bundle.scaler is not None,
+        "dataset_loaded": df is not None,
+        "dataset_rows": len(df) if df is not None else 0,
+        "model_version": bundle.version if bundle is not None else None,
+        "model": registry.info(),
+        "startup": startup.info(),
+        "microbatch": batcher.stats() if batcher is not None else None,
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None,
+        "latency": metrics.summary()
+    })
+
+
+@app.route("/health/live", methods=["GET"])
+def health_live():
+    """Liveness: proses hidup dan menjawab HTTP, selalu 200 (juga selama model dimuat)"""
     return jsonify({
-        "status": "healthy" if model is not None else "unhealthy",
-        "model_loaded": model is not None,
-        "scaler_loaded": scaler is not None,
-        "dataset_rows": len(df) if df is not None else 0
+        "status": "alive",
+        "uptime_seconds": round(startup.elapsed(), 3)
+    })
+
+
+@app.route("/health/ready", methods=["GET"])
+def health_ready():
+    """Readiness: 200 jika model sudah dimuat + warm-up, 503 selama startup atau jika gagal"""
+    bundle = registry.current
+    return jsonify({
+        "status": "ready" if bundle is not None else startup.status,
+        "model_version": bundle.version if bundle is not None else None,
+        "startup": startup.info()
+    }), 200 if bundle is not None else 503
+
+
+@app.route("/model/classes", methods=["GET"])
+def model_classes():
+    """Urutan kelas array probabilitas response minimal, tetap untuk satu versi model"""
+    bundle = registry.current
+    if bundle is None:
+        return model_unavailable()
+    return jsonify({
+        "model_version": bundle.version,
+        "classes": bundle.class_names
     })
 
 
@@ -130,14 +545,23 @@ def predict():
         "tekanan": float,       # Tekanan udara dalam mb
         "kecepatan_angin": float # Kecepatan angin dalam m/s
     }
+
+    Accept: application/msgpack atau ?mode=minimal -> hanya label + probabilitas
+    (lihat response_format.py).
     """
-    if model is None or scaler is None:
-        return jsonify({
-            "error": "Model belum dimuat. Jalankan train_model.py terlebih dahulu."
-        }), 500
+    # Referensi bundle diambil sekali: hot reload tidak mengganti model di tengah request
+    bundle = registry.current
+    if bundle is None:
+        return model_unavailable()
+
+    fmt = negotiate(request.accept_mimetypes)
+    if fmt is None:
+        return not_acceptable(request.headers.get("Accept"))
+    minimal = is_minimal(fmt, request.args.get("mode"))
     
     try:
-        data = request.get_json()
+        with stage("parse"):
+            data = read_payload(request)
         
         # Validasi input
         required_fields = ["suhu", "kelembapan", "tekanan", "kecepatan_angin"]
@@ -153,43 +577,13 @@ def predict():
         tekanan = float(data["tekanan"])
         kecepatan_angin = float(data["kecepatan_angin"])
         
-        # =====================================
-        # VALIDASI RANGE INPUT (KETAT)
-        # Berdasarkan dataset Beijing Air Quality
-        # =====================================
-        VALID_RANGES = {
-            "suhu": {"min": -20, "max": 40, "unit": "°C", "label": "Suhu"},
-            "kelembapan": {"min": -40, "max": 30, "unit": "", "label": "Titik Embun (Kelembapan)"},
-            "tekanan": {"min": 990, "max": 1045, "unit": "mb", "label": "Tekanan Udara"},
-            "kecepatan_angin": {"min": 0, "max": 15, "unit": "m/s", "label": "Kecepatan Angin"}
-        }
-        
-        validation_errors = []
-        
-        # Validasi setiap parameter
-        if not (VALID_RANGES["suhu"]["min"] <= suhu <= VALID_RANGES["suhu"]["max"]):
-            validation_errors.append({
-                "field": "suhu",
-                "message": f"Suhu harus antara {VALID_RANGES['suhu']['min']}°C sampai {VALID_RANGES['suhu']['max']}°C. Nilai Anda: {suhu}°C"
-            })
-        
-        if not (VALID_RANGES["kelembapan"]["min"] <= kelembapan <= VALID_RANGES["kelembapan"]["max"]):
-            validation_errors.append({
-                "field": "kelembapan",
-                "message": f"Titik Embun harus antara {VALID_RANGES['kelembapan']['min']} sampai {VALID_RANGES['kelembapan']['max']}. Nilai Anda: {kelembapan}"
-            })
-        
-        if not (VALID_RANGES["tekanan"]["min"] <= tekanan <= VALID_RANGES["tekanan"]["max"]):
-            validation_errors.append({
-                "field": "tekanan",
-                "message": f"Tekanan Udara harus antara {VALID_RANGES['tekanan']['min']}mb sampai {VALID_RANGES['tekanan']['max']}mb. Nilai Anda: {tekanan}mb"
-            })
+        # Buat array input
+        input_data = np.array([[suhu, kelembapan, tekanan, kecepatan_angin]])
         
-        if not (VALID_RANGES["kecepatan_angin"]["min"] <= kecepatan_angin <= VALID_RANGES["kecepatan_angin"]["max"]):
-            validation_errors.append({
-                "field": "kecepatan_angin",
-                "message": f"Kecepatan Angin harus antara {VALID_RANGES['kecepatan_angin']['min']}m/s sampai {VALID_RANGES['kecepatan_angin']['max']}m/s. Nilai Anda: {kecepatan_angin}m/s"
-            })
+        # Validasi range input (aturan sama dengan /predict/batch)
+        with stage("validate"):
+            valid_mask = validasi_range(input_data)[0]
+            validation_errors = get_validation_errors(input_data[0], valid_mask)
         
         # Jika ada error validasi, tolak request
         if validation_errors:
@@ -197,66 +591,59 @@ def predict():
                 "success": False,
                 "error": "Input di luar range yang valid",
                 "validation_errors": validation_errors,
-                "valid_ranges": {
-                    "suhu": f"{VALID_RANGES['suhu']['min']} sampai {VALID_RANGES['suhu']['max']} °C",
-                    "kelembapan": f"{VALID_RANGES['kelembapan']['min']} sampai {VALID_RANGES['kelembapan']['max']}",
-                    "tekanan": f"{VALID_RANGES['tekanan']['min']} sampai {VALID_RANGES['tekanan']['max']} mb",
-                    "kecepatan_angin": f"{VALID_RANGES['kecepatan_angin']['min']} sampai {VALID_RANGES['kecepatan_angin']['max']} m/s"
-                }
+                "valid_ranges": VALID_RANGES_TEXT
             }), 400
         
-        # Buat array input
-        input_data = np.array([[suhu, kelembapan, tekanan, kecepatan_angin]])
-        
-        # Normalisasi input
-        input_scaled = scaler.transform(input_data)
-        
-        # Prediksi
-        prediction = model.predict(input_scaled)[0]
-        probabilities = model.predict_proba(input_scaled)[0]
+        # Input yang sama (setelah kuantisasi) langsung dijawab dari cache
+        cache_key = None
+        if prediction_cache is not None:
+            with stage("cache"):
+                cache_key = prediction_cache.make_key(input_data[0])
+                if minimal:
+                    cache_key += ("minimal",)
+                cached = prediction_cache.get(cache_key, bundle.version)
+            if cached is not None:
+                with stage("serialize"):
+                    if minimal:
+                        return respond(cached, fmt)
+                    return jsonify(dict(cached, input={
+                        "suhu": suhu,
+                        "kelembapan": kelembapan,
+                        "tekanan": tekanan,
+                        "kecepatan_angin": kecepatan_angin
+                    }))
         
-        # Hitung confidence score
-        confidence = get_confidence_score(probabilities)
+        # Normalisasi + prediksi (digabung dengan request lain jika micro-batching aktif)
+        if batcher is not None:
+            with stage("batch_wait"):
+                prediction, probabilities = batcher.score(input_data[0], bundle)
+        else:
+            predictions, probabilities = skor_matrix(input_data, bundle)
+            prediction, probabilities = predictions[0], probabilities[0]
         
-        # Mapping kualitas ke skor (untuk tampilan frontend)
-        quality_scores = {
-            "Baik": 85,
-            "Sedang": 60,
-            "Buruk": 30
-        }
+        with stage("build"):
+            if minimal:
+                # Tanpa feedback, icon & dict probabilitas: cukup indeks kelas + array
+                label = int(np.argmax(probabilities))
+                result = minimal_prediction(bundle.version, label, bundle.class_names[label], probabilities)
+            else:
+                result = build_prediction(input_data[0], prediction, probabilities, bundle.class_names)
+        if cache_key is not None:
+            prediction_cache.put(cache_key, bundle.version, result)
         
-        # Mapping kualitas ke icon
-        quality_icons = {
-            "Baik": "✅",
-            "Sedang": "⚠️",
-            "Buruk": "❌"
-        }
-        
-        # Generate feedback
-        feedback = get_feedback(suhu, kelembapan, tekanan, kecepatan_angin, prediction)
-        
-        # Probabilitas per kelas
-        class_names = model.classes_
-        prob_dict = {class_names[i]: round(probabilities[i] * 100, 2) for i in range(len(class_names))}
+        with stage("serialize"):
+            return respond(result, fmt) if minimal else jsonify(result)
         
+    except InvalidPayload as e:
         return jsonify({
-            "success": True,
-            "prediction": {
-                "kualitas": prediction,
-                "score": quality_scores.get(prediction, 50),
-                "confidence": confidence,
-                "icon": quality_icons.get(prediction, "❓"),
-                "probabilities": prob_dict
-            },
-            "input": {
-                "suhu": suhu,
-                "kelembapan": kelembapan,
-                "tekanan": tekanan,
-                "kecepatan_angin": kecepatan_angin
-            },
-            "feedback": feedback
+            "error": str(e)
+        }), 400
+    except BatchTimeout as e:
+        response = jsonify({
+            "error": f"Server sedang sibuk, coba lagi sesaat lagi ({str(e)})"
         })
-        
+        response.headers["Retry-After"] = "1"
+        return response, 503
     except ValueError as e:
         return jsonify({
             "error": f"Nilai input tidak valid: {str(e)}"
@@ -267,58 +654,302 @@ def predict():
         }), 500
 
 
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Endpoint untuk prediksi banyak data sekaligus (backfill)
+    
+    Request Body (salah satu):
+    [{"suhu": float, "kelembapan": float, "tekanan": float, "kecepatan_angin": float}, ...]
+    {"readings": [{...}, ...]}
+    {"suhu": [float], "kelembapan": [float], "tekanan": [float], "kecepatan_angin": [float]}
+    
+    Validasi dan prediksi dilakukan sekali untuk seluruh matrix.
+    Data yang tidak valid dilaporkan per baris tanpa menggagalkan batch.
+
+    Accept: application/msgpack, application/vnd.apache.arrow.stream atau
+    ?mode=minimal -> label + probabilitas per baris (lihat response_format.py).
+    """
+    # Referensi bundle diambil sekali: hot reload tidak mengganti model di tengah request
+    bundle = registry.current
+    if bundle is None:
+        return model_unavailable()
+
+    fmt = negotiate(request.accept_mimetypes, batch=True)
+    if fmt is None:
+        return not_acceptable(request.headers.get("Accept"), batch=True)
+    minimal = is_minimal(fmt, request.args.get("mode"))
+    
+    try:
+        with stage("parse"):
+            data = read_payload(request)
+            # Batas dicek dari panjang list/kolom sebelum baris di-parse
+            if batch_rows(data) > MAX_BATCH_ROWS:
+                return jsonify({
+                    "error": f"Jumlah data melebihi batas {MAX_BATCH_ROWS} baris per request"
+                }), 413
+            X, row_errors = parse_batch_payload(data)
+    except InvalidPayload as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            "error": f"Payload tidak valid: {str(e)}"
+        }), 400
+    
+    try:
+        # Validasi range seluruh baris dalam satu operasi
+        with stage("validate"):
+            valid_mask = validasi_range(X)
+            row_ok = valid_mask.all(axis=1)
+            for i in row_errors:
+                row_ok[i] = False
+        
+        # Normalisasi + prediksi hanya untuk baris yang valid
+        valid_idx = np.flatnonzero(row_ok)
+        probabilities = np.empty((0, len(bundle.class_names)))
+        if len(valid_idx) > 0:
+            predictions, probabilities = skor_matrix(X[valid_idx], bundle)
+
+        if minimal:
+            with stage("build"):
+                codes = batch_codes(len(X), valid_idx, probabilities)
+                payload = minimal_batch(bundle.version, codes, probabilities, valid_idx, invalid_fields(valid_mask))
+            with stage("serialize"):
+                return respond(payload, fmt, bundle.class_names)
+        
+        with stage("build"):
+            results = [None] * len(X)
+            for k, i in enumerate(valid_idx):
+                result = build_prediction(X[i], predictions[k], probabilities[k], bundle.class_names)
+                result["index"] = int(i)
+                results[i] = result
+            
+            for i in np.flatnonzero(~row_ok):
+                i = int(i)
+                if i in row_errors:
+                    results[i] = {
+                        "index": i,
+                        "success": False,
+                        "error": row_errors[i]
+                    }
+                else:
+                    results[i] = {
+                        "index": i,
+                        "success": False,
+                        "error": "Input di luar range yang valid",
+                        "validation_errors": get_validation_errors(X[i], valid_mask[i])
+                    }
+        
+        with stage("serialize"):
+            return jsonify({
+                "success": True,
+                "total": len(X),
+                "valid": int(len(valid_idx)),
+                "invalid": int(len(X) - len(valid_idx)),
+                "valid_ranges": VALID_RANGES_TEXT,
+                "results": results
+            })
+    
+    except Exception as e:
+        return jsonify({
+            "error": f"Terjadi kesalahan: {str(e)}"
+        }), 500
+
+
+@app.route("/predict/stream", methods=["POST"])
+def predict_stream():
+    """
+    Endpoint streaming untuk feed stasiun (NDJSON masuk & keluar, lihat station_stream.py)
+    
+    Request Body (Transfer-Encoding: chunked, satu objek per baris):
+    {"station": str, "timestamp": str|float, "suhu": float, "kelembapan": float, "tekanan": float, "kecepatan_angin": float}
+    
+    Query Parameter (opsional):
+    - station : stasiun default untuk baris tanpa field station
+    
+    Setiap baris dijawab satu baris dengan urutan yang sama: label + probabilitas
+    (urutan GET /model/classes) + agregat bergulir stasiunnya, atau error per baris.
+    """
+    if registry.current is None:
+        return model_unavailable()
+    
+    lines = stream_predictions(request.stream, skor_stream, station_aggregates, request.args.get("station"))
+    return app.response_class(stream_with_context(lines), mimetype=NDJSON)
+
+
+@app.route("/stream/stations", methods=["GET"])
+def stream_stations():
+    """
+    Agregat bergulir per stasiun dari /predict/stream (proses worker ini)
+    
+    Query Parameter (opsional):
+    - station : hanya satu stasiun
+    """
+    station = request.args.get("station")
+    if station is None:
+        return jsonify(station_aggregates.info())
+    
+    aggregate = station_aggregates.get(station)
+    if aggregate is None:
+        return jsonify({
+            "error": f"Stasiun '{station}' belum mengirim data"
+        }), 404
+    return jsonify({"station": station, **aggregate})
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """
+    Endpoint untuk memuat ulang model tanpa restart
+    
+    Request Body (opsional):
+    {"version": "20260101-120000"}   # default: versi terbaru di registry
+    
+    Model baru dimuat dan dipanaskan di latar belakang (202 Accepted),
+    cek progresnya di GET /health. Dengan serve.py, endpoint ini hanya
+    me-reload worker yang menerima request; watcher registry
+    (MODEL_WATCH_INTERVAL) me-reload semua worker.
+    """
+    if not is_admin_request():
+        return jsonify({
+            "error": "Akses ditolak"
+        }), 403
+    
+    data = request.get_json(silent=True) or {}
+    version = data.get("version") if isinstance(data, dict) else None
+    if version is not None and version not in list_versions(REGISTRY_DIR):
+        return jsonify({
+            "error": f"Versi model '{version}' tidak ditemukan di registry"
+        }), 404
+    
+    if not registry.reload_async(version):
+        return jsonify({
+            "error": "Reload model sedang berjalan"
+        }), 409
+    
+    return jsonify({
+        "success": True,
+        "message": "Reload model dimulai",
+        "version": version or registry.latest_version(),
+        "current_version": registry.current.version if registry.current is not None else None
+    }), 202
+
+
+@app.route("/admin/profile", methods=["POST"])
+def admin_profile():
+    """
+    Endpoint untuk sampling stack traffic live selama beberapa detik
+    
+    Request Body (opsional):
+    {"seconds": 30}   # default 30, maksimum 300
+    
+    Hasil (format collapsed stack untuk flamegraph) ditulis ke file
+    profile_<pid>_<waktu>.txt di folder Processing_data.
+    """
+    if not is_admin_request():
+        return jsonify({
+            "error": "Akses ditolak"
+        }), 403
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        seconds = float(data.get("seconds", 30) if isinstance(data, dict) else 30)
+    except (TypeError, ValueError):
+        seconds = -1
+    if not (0 < seconds <= MAX_PROFILE_SECONDS):
+        return jsonify({
+            "error": f"Parameter 'seconds' harus antara 0 sampai {MAX_PROFILE_SECONDS}"
+        }), 400
+    
+    output = os.path.join(CURRENT_DIR, f"profile_{os.getpid()}_{time.strftime('%Y%m%d-%H%M%S')}.txt")
+    profiler = SamplingProfiler(output, thread_filter=profiled_threads, dump_seconds=0)
+    profiler.start(duration=seconds)
+    
+    return jsonify({
+        "success": True,
+        "message": f"Profiling {seconds:g} detik dimulai",
+        "output": output
+    }), 202
+
+
+@app.route("/metrics", methods=["GET"], endpoint="metrics")
+def metrics_endpoint():
+    """Endpoint metrik latency & throughput (format teks Prometheus)"""
+    bundle = registry.current
+    if bundle is not None:
+        metrics.set_gauge("api_model_info", 1, "Versi model yang aktif", replace=True,
+                          version=bundle.version, engine=bundle.engine)
+        metrics.set_gauge("api_model_load_seconds", bundle.load_seconds, "Waktu muat + warm-up model aktif")
+    if batcher is not None:
+        batch_stats = batcher.stats()
+        metrics.set_gauge("api_microbatch_batches", batch_stats["batches"], "Jumlah batch micro-batching")
+        metrics.set_gauge("api_microbatch_avg_batch_size", batch_stats["avg_batch_size"],
+                          "Rata-rata baris per batch micro-batching")
+    if prediction_cache is not None:
+        cache_stats = prediction_cache.stats()
+        metrics.set_gauge("api_prediction_cache_size", cache_stats["size"], "Jumlah entry cache prediksi")
+        metrics.set_gauge("api_prediction_cache_hit_rate", cache_stats["hit_rate"], "Hit rate cache prediksi")
+    return app.response_class(metrics.render(), content_type=CONTENT_TYPE)
+
+
 @app.route("/stats", methods=["GET"])
 def stats():
-    """Endpoint untuk mendapatkan statistik dataset"""
-    if df is None:
+    """
+    Endpoint untuk mendapatkan statistik dataset
+    
+    Statistik dilayani dari memori dengan ETag/Last-Modified,
+    klien bisa memakai If-None-Match/If-Modified-Since (304 Not Modified).
+    """
+    entry = stats_cache.get()
+    if entry is None:
         return jsonify({
             "error": "Dataset tidak ditemukan"
         }), 500
     
-    # Hitung statistik
-    stats_data = {
-        "total_data": len(df),
-        "distribusi_kualitas": df["kualitas_udara"].value_counts().to_dict(),
-        "range_parameter": {
-            "suhu": {
-                "min": float(df["suhu"].min()),
-                "max": float(df["suhu"].max()),
-                "mean": float(df["suhu"].mean())
-            },
-            "kelembapan": {
-                "min": float(df["kelembapan"].min()),
-                "max": float(df["kelembapan"].max()),
-                "mean": float(df["kelembapan"].mean())
-            },
-            "tekanan": {
-                "min": float(df["tekanan"].min()),
-                "max": float(df["tekanan"].max()),
-                "mean": float(df["tekanan"].mean())
-            },
-            "kecepatan_angin": {
-                "min": float(df["kecepatan_angin"].min()),
-                "max": float(df["kecepatan_angin"].max()),
-                "mean": float(df["kecepatan_angin"].mean())
-            }
-        }
-    }
-    
-    return jsonify(stats_data)
+    response = app.response_class(entry.body, mimetype="application/json")
+    response.set_etag(entry.etag)
+    response.last_modified = entry.last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 
 @app.route("/sample", methods=["GET"])
 def sample():
-    """Endpoint untuk mendapatkan sample data dari dataset"""
-    if df is None:
+    """
+    Endpoint untuk mendapatkan sample data dari dataset
+    
+    Query Parameter (opsional):
+    - n    : jumlah sample per kualitas (default 5)
+    - seed : seed acak agar hasil bisa diulang
+    """
+    stratified = sampler.get()
+    if stratified is None:
         return jsonify({
             "error": "Dataset tidak ditemukan"
         }), 500
     
-    # Ambil 5 sample random dari setiap kualitas
-    samples = []
-    for kualitas in ["Baik", "Sedang", "Buruk"]:
-        sample_data = df[df["kualitas_udara"] == kualitas].sample(n=min(5, len(df[df["kualitas_udara"] == kualitas])))
-        samples.extend(sample_data.to_dict("records"))
+    try:
+        n = int_param(request.args.get("n", DEFAULT_SAMPLE_PER_CLASS))
+        seed = request.args.get("seed")
+        seed = int_param(seed) if seed is not None else None
+    except ValueError as e:
+        return jsonify({
+            "error": f"Parameter tidak valid: {str(e)}"
+        }), 400
+    
+    if not (1 <= n <= MAX_SAMPLE_PER_CLASS):
+        return jsonify({
+            "error": f"Parameter 'n' harus antara 1 sampai {MAX_SAMPLE_PER_CLASS}"
+        }), 400
+    if seed is not None and seed < 0:
+        return jsonify({
+            "error": "Parameter 'seed' tidak boleh negatif"
+        }), 400
+    
+    # Ambil n sample random dari setiap kualitas
+    samples = stratified.sample(n=n, seed=seed)
     
     return jsonify({
         "samples": samples,
@@ -326,14 +957,21 @@ def sample():
     })
 
 
+startup.mark("imported")
+
+
 if __name__ == "__main__":
     print("\n" + "="*50)
     print("🚀 API Prediksi Kualitas Udara Beijing")
     print("="*50)
-    print(f"📊 Model: {MODEL_PATH}")
-    print(f"📈 Scaler: {SCALER_PATH}")
-    print(f"📁 Dataset: {DATASET_PATH}")
+    if registry.current is not None:
+        print(f"📊 Model ({MODEL_ENGINE}): {registry.current.model_path}")
+        print(f"📈 Scaler: {registry.current.paths['scaler']}")
+        print(f"🏷️  Versi model: {registry.current.version}")
+    elif startup.loading:
+        print(f"⏳ Model ({MODEL_ENGINE}) dimuat di latar belakang, cek GET /health/ready")
+    print(f"📁 Dataset: {DATASET_PATH} (dimuat saat /stats atau /sample pertama)")
     print("="*50 + "\n")
     
     # debug=False agar tidak reload dan model tetap dimuat
-    app.run(host="0.0.0.0", port=5000, debug=False)
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", "5000")), debug=False)
@@ -0,0 +1,543 @@
+"""
+Benchmark inferensi model & API (offline, hasil JSON).
+
+Yang diukur:
+- waktu muat model & scaler (+ warm-up)
+- latency scoring p50/p95/p99 untuk batch 1 (satu data) dan beberapa ukuran batch
+- rows/sec scoring bulk seluruh dataset_kualitas_udara_beijing_final.csv
+- /predict end-to-end lewat Flask test client dan lewat socket HTTP sungguhan
+- peak RSS proses
+- cold start (perintah coldstart): api_predict.py dijalankan sebagai proses
+  baru, diukur time-to-first-byte (/health/live pertama menjawab),
+  time-to-ready (/health/ready 200) dan latency request pertama tiap endpoint
+
+Cara pakai:
+    python benchmark.py                                   # model aktif (registry / file v3)
+    python benchmark.py --engine flat_raw --output bench_flat_raw.json
+    python benchmark.py --model model_n400.pkl --label n400 --output bench_n400.json
+    python benchmark.py compare bench_sklearn.json bench_flat_raw.json
+    python benchmark.py coldstart --engine compact_raw --modes background eager
+
+Seed tetap dan metadata (commit git, versi library, parameter model)
+ikut disimpan agar hasil antar commit/varian model bisa dibandingkan.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+
+import joblib
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from dataset_loader import load_dataset_lean, read_csv_lean
+from forest_engine import load_forest
+from model_registry import ModelBundle, ModelRegistry, legacy_version, version_paths
+from validasi_input import FEATURE_COLUMNS, validasi_range
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(CURRENT_DIR, "dataset_kualitas_udara_beijing_final.csv")
+
+SEED = 42
+DEFAULT_BATCH_SIZES = [1, 16, 256, 4096]
+BULK_CHUNK_ROWS = 65536
+
+
+def log(message):
+    """Progress ke stderr, stdout hanya untuk JSON"""
+    print(message, file=sys.stderr, flush=True)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: byte
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def percentiles_ms(timings):
+    timings = np.asarray(timings) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p95_ms": round(float(np.percentile(timings, 95)), 4),
+        "p99_ms": round(float(np.percentile(timings, 99)), 4),
+        "mean_ms": round(float(timings.mean()), 4)
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=CURRENT_DIR,
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=CURRENT_DIR,
+                               capture_output=True, text=True, timeout=10).stdout.strip()
+        return (commit + ("-dirty" if dirty else "")) or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_info():
+    import flask
+    import sklearn
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "flask": flask.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def model_info(bundle):
+    model = bundle.model
+    if hasattr(model, "get_params"):
+        params = {key: model.get_params().get(key) for key in ("n_estimators", "max_depth", "min_samples_leaf")}
+    else:
+        params = {"n_estimators": getattr(model, "n_estimators", None), "max_depth": getattr(model, "max_depth", None)}
+    path = bundle.model_path
+    return {
+        "version": bundle.version,
+        "engine": bundle.engine,
+        "path": path,
+        "size_bytes": os.path.getsize(path) if os.path.exists(path) else None,
+        "scaler_folded": bundle.scaler_folded,
+        **params
+    }
+
+
+# =====================================
+# MUAT MODEL
+# =====================================
+def load_model_file(path):
+    return load_forest(path) if path.endswith((".npz", ".rfc")) else joblib.load(path)
+
+
+def load_variant(args):
+    """
+    Muat varian model yang diuji + ukur waktu muat (median dari load_repeat kali).
+    --model/--scaler menunjuk file bebas, selain itu versi registry / file v3.
+    """
+    if args.model:
+        engine = {".npz": "flat", ".rfc": "compact"}.get(os.path.splitext(args.model)[1], "sklearn")
+        model_path = os.path.abspath(args.model)
+        paths = {"sklearn": model_path, engine: model_path, "scaler": os.path.abspath(args.scaler)}
+        version = args.label or os.path.basename(model_path)
+    else:
+        engine = args.engine
+        version = args.version or ModelRegistry().latest_version()
+        paths = version_paths(version)
+
+    model_times, scaler_times = [], []
+    for _ in range(max(1, args.load_repeat)):
+        start = time.perf_counter()
+        model = load_model_file(paths[engine])
+        model_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        scaler = joblib.load(paths["scaler"])
+        scaler_times.append(time.perf_counter() - start)
+
+    if args.model and getattr(model, "scaler_folded", False):
+        paths[f"{engine}_raw"] = paths[engine]
+        engine = f"{engine}_raw"
+    bundle = ModelBundle(model, scaler, version or legacy_version(), engine, paths, float(np.median(model_times)))
+
+    start = time.perf_counter()
+    bundle.warm_up()
+    warmup_seconds = time.perf_counter() - start
+    return bundle, {
+        "model_seconds": round(float(np.median(model_times)), 4),
+        "scaler_seconds": round(float(np.median(scaler_times)), 4),
+        "warmup_seconds": round(warmup_seconds, 4),
+        "repeat": len(model_times)
+    }
+
+
+# =====================================
+# BENCHMARK
+# =====================================
+def bench_latency(bundle, X, batch_sizes, repeat):
+    """Latency bundle.score untuk setiap ukuran batch (baris diambil acak dari dataset)"""
+    rng = np.random.default_rng(SEED)
+    results = {}
+    for batch_size in batch_sizes:
+        # Batch besar diulang lebih sedikit agar total waktu tetap wajar
+        n_repeat = max(10, min(repeat, repeat * 16 // max(batch_size, 16)))
+        batches = [X[rng.integers(0, len(X), batch_size)] for _ in range(n_repeat)]
+        bundle.score(batches[0])
+        timings = []
+        for batch in batches:
+            start = time.perf_counter()
+            bundle.score(batch)
+            timings.append(time.perf_counter() - start)
+        stats = percentiles_ms(timings)
+        stats["repeat"] = n_repeat
+        stats["rows_per_sec"] = round(batch_size * len(timings) / sum(timings), 1)
+        results[str(batch_size)] = stats
+        log(f"   batch {batch_size:>5}: p50={stats['p50_ms']:.3f}ms p99={stats['p99_ms']:.3f}ms "
+            f"({stats['rows_per_sec']:.0f} baris/s)")
+    return results
+
+
+def bench_bulk(bundle, dataset_path):
+    """Scoring seluruh dataset: baca CSV -> validasi -> score per chunk"""
+    start = time.perf_counter()
+    df = read_csv_lean(dataset_path)
+    read_seconds = time.perf_counter() - start
+
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    start = time.perf_counter()
+    valid = validasi_range(X).all(axis=1)
+    X_valid = X[valid]
+    validate_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for offset in range(0, len(X_valid), BULK_CHUNK_ROWS):
+        bundle.score(X_valid[offset:offset + BULK_CHUNK_ROWS])
+    score_seconds = time.perf_counter() - start
+
+    total = read_seconds + validate_seconds + score_seconds
+    result = {
+        "rows": int(len(X)),
+        "valid_rows": int(valid.sum()),
+        "read_seconds": round(read_seconds, 4),
+        "validate_seconds": round(validate_seconds, 4),
+        "score_seconds": round(score_seconds, 4),
+        "score_rows_per_sec": round(len(X_valid) / score_seconds, 1) if score_seconds else None,
+        "end_to_end_rows_per_sec": round(len(X) / total, 1) if total else None
+    }
+    log(f"   bulk {result['rows']} baris: score {result['score_rows_per_sec']:.0f} baris/s, "
+        f"end-to-end {result['end_to_end_rows_per_sec']:.0f} baris/s")
+    return result
+
+
+def predict_payloads(X, n):
+    rng = np.random.default_rng(SEED)
+    rows = X[rng.integers(0, len(X), n)]
+    return [json.dumps(dict(zip(FEATURE_COLUMNS, (float(v) for v in row)))).encode("utf-8") for row in rows]
+
+
+def import_api(bundle):
+    """Impor api_predict lalu pasang bundle yang diuji (tanpa watcher registry)"""
+    os.environ["MODEL_WATCH_INTERVAL"] = "0"
+    # Model registry dimuat sinkron agar loader latar belakang tidak menimpa bundle uji
+    os.environ["STARTUP_MODE"] = "eager"
+    # Pesan startup api_predict ke stderr agar stdout tetap JSON murni
+    with redirect_stdout(sys.stderr):
+        import api_predict
+
+    api_predict.registry.current = bundle
+    return api_predict
+
+
+def bench_test_client(api, X, n_requests):
+    client = api.app.test_client()
+    payloads = predict_payloads(X, n_requests)
+    for body in payloads[:50]:
+        client.post("/predict", data=body, content_type="application/json")
+    timings = []
+    errors = 0
+    start_all = time.perf_counter()
+    for body in payloads:
+        start = time.perf_counter()
+        response = client.post("/predict", data=body, content_type="application/json")
+        timings.append(time.perf_counter() - start)
+        errors += response.status_code != 200
+    elapsed = time.perf_counter() - start_all
+    result = {"requests": n_requests, "errors": int(errors), "rps": round(n_requests / elapsed, 1),
+              **percentiles_ms(timings)}
+    log(f"   test client: {result['rps']:.0f} req/s, p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms")
+    return result
+
+
+def bench_socket(api, X, n_requests, clients, duration):
+    """
+    /predict lewat socket HTTP sungguhan: server Werkzeug ber-thread di proses ini.
+    Latency diukur dengan satu koneksi keep-alive, throughput dengan `clients`
+    proses klien paralel (load_test.run_load).
+    """
+    import http.client
+
+    from werkzeug.serving import make_server
+    from load_test import run_load
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, api.app, threaded=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    port = server.server_port
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        timings = []
+        errors = 0
+        for body in predict_payloads(X, n_requests):
+            start = time.perf_counter()
+            try:
+                conn.request("POST", "/predict", body=body, headers={"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                errors += response.status != 200
+                if response.will_close:
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+            timings.append(time.perf_counter() - start)
+        conn.close()
+        latency = {"requests": n_requests, "errors": int(errors), **percentiles_ms(timings)}
+        log(f"   socket 1 klien: p50={latency['p50_ms']:.3f}ms p99={latency['p99_ms']:.3f}ms")
+
+        throughput = run_load("127.0.0.1", port, clients, duration)
+        throughput["clients"] = clients
+        log(f"   socket {clients} klien: {throughput['rps']:.0f} req/s, error {throughput['errors']}")
+    finally:
+        server.shutdown()
+    return {"latency": latency, "throughput": throughput}
+
+
+def run(args):
+    result = {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": SEED,
+        "environment": environment_info(),
+        "config": {
+            "microbatch": os.environ.get("MICROBATCH", "0") == "1",
+            "prediction_cache_size": int(os.environ.get("PREDICTION_CACHE_SIZE", "0")),
+            "batch_sizes": args.batch_sizes,
+            "repeat": args.repeat
+        },
+        "memory": {"baseline_peak_rss_mb": peak_rss_mb()}
+    }
+
+    log("=== BENCHMARK INFERENSI ===")
+    log("1. Muat model")
+    bundle, result["load"] = load_variant(args)
+    result["model"] = model_info(bundle)
+    result["memory"]["after_load_peak_rss_mb"] = peak_rss_mb()
+    log(f"   {result['model']['version']} ({bundle.engine}): model {result['load']['model_seconds']}s, "
+        f"scaler {result['load']['scaler_seconds']}s, warm-up {result['load']['warmup_seconds']}s")
+
+    df = load_dataset_lean(args.dataset)
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    X = X[validasi_range(X).all(axis=1)]
+
+    log("2. Latency scoring")
+    result["latency"] = bench_latency(bundle, X, args.batch_sizes, args.repeat)
+
+    log("3. Scoring bulk dataset")
+    result["bulk"] = bench_bulk(bundle, args.dataset)
+    result["memory"]["after_bulk_peak_rss_mb"] = peak_rss_mb()
+
+    if not args.skip_api:
+        log("4. /predict end-to-end")
+        api = import_api(bundle)
+        result["api"] = {
+            "test_client": bench_test_client(api, X, args.requests),
+            "socket": bench_socket(api, X, args.requests, args.clients, args.duration)
+        }
+
+    result["memory"]["peak_rss_mb"] = peak_rss_mb()
+    log(f"   peak RSS: {result['memory']['peak_rss_mb']} MB")
+    return result
+
+
+# =====================================
+# COLD START
+# =====================================
+COLDSTART_POLL_SECONDS = 0.005
+
+
+def free_port():
+    import socket
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def timed_request(port, method, path, body=None):
+    """(status, body, detik) satu request dengan koneksi baru; status None jika gagal konek"""
+    import http.client
+
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read(), time.perf_counter() - start
+    except OSError:
+        return None, None, time.perf_counter() - start
+    finally:
+        conn.close()
+
+
+def poll_until(port, path, deadline, proc, accept=lambda status: status == 200):
+    """Poll GET path sampai status diterima; waktu perf_counter saat itu"""
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"api_predict.py berhenti (exit {proc.returncode}) sebelum {path} menjawab")
+        status, _, _ = timed_request(port, "GET", path)
+        if status is not None and accept(status):
+            return time.perf_counter()
+        time.sleep(COLDSTART_POLL_SECONDS)
+    raise TimeoutError(f"{path} tidak siap dalam batas waktu")
+
+
+def coldstart_once(mode, engine, body, timeout):
+    """Satu proses api_predict.py baru: TTFB, time-to-ready & request pertama tiap endpoint"""
+    port = free_port()
+    env = {**os.environ, "STARTUP_MODE": mode, "MODEL_ENGINE": engine,
+           "PORT": str(port), "MODEL_WATCH_INTERVAL": "0"}
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(CURRENT_DIR, "api_predict.py")], cwd=CURRENT_DIR,
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout
+        # Byte pertama = jawaban HTTP apa pun dari /health/live
+        first_byte = poll_until(port, "/health/live", deadline, proc, accept=lambda status: True)
+        ready = poll_until(port, "/health/ready", deadline, proc)
+        result = {
+            "time_to_first_byte_s": round(first_byte - start, 4),
+            "time_to_ready_s": round(ready - start, 4)
+        }
+        for name, method, path, payload in (("predict", "POST", "/predict", body),
+                                            ("stats", "GET", "/stats", None),
+                                            ("sample", "GET", "/sample?seed=0", None)):
+            status, _, seconds = timed_request(port, method, path, payload)
+            result[f"first_{name}_ms"] = round(seconds * 1000, 3)
+            result[f"first_{name}_status"] = status
+        _, text, _ = timed_request(port, "GET", "/health")
+        result["server_phases"] = json.loads(text)["startup"]["phases"]
+        return result
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def run_coldstart(args):
+    """Median beberapa cold start per STARTUP_MODE"""
+    body = json.dumps({"suhu": 12.0, "kelembapan": 5.0, "tekanan": 1015.0, "kecepatan_angin": 3.5}).encode("utf-8")
+    result = {
+        "label": args.label or f"coldstart-{args.engine}",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment_info(),
+        "config": {"engine": args.engine, "repeat": args.cold_repeat},
+        "coldstart": {}
+    }
+    log("=== BENCHMARK COLD START ===")
+    for mode in args.modes:
+        runs = [coldstart_once(mode, args.engine, body, args.timeout) for _ in range(args.cold_repeat)]
+        summary = {
+            key: round(float(np.median([run[key] for run in runs])), 4)
+            for key in runs[0] if key.endswith(("_s", "_ms"))
+        }
+        result["coldstart"][mode] = {**summary, "runs": runs}
+        log(f"   {mode}: first byte {summary['time_to_first_byte_s']:.3f}s, "
+            f"ready {summary['time_to_ready_s']:.3f}s, /predict pertama {summary['first_predict_ms']:.1f}ms, "
+            f"/stats pertama {summary['first_stats_ms']:.1f}ms")
+    return result
+
+
+# =====================================
+# BANDINGKAN HASIL
+# =====================================
+def flatten_metrics(result, prefix=""):
+    """Dict bersarang -> {"latency.1.p50_ms": nilai, ...} untuk angka saja"""
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+COMPARE_PREFIXES = ("load.", "latency.", "bulk.", "api.", "memory.", "coldstart.")
+
+
+def compare(paths):
+    results = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            results.append(json.load(f))
+    flats = [flatten_metrics(r) for r in results]
+    base = flats[0]
+    names = [r.get("label") or r["model"]["version"] for r in results]
+    print(f"{'metrik':<45}" + "".join(f"{name[:18]:>20}" for name in names))
+    for key in sorted(base):
+        if not key.startswith(COMPARE_PREFIXES) or key.endswith(("repeat", "requests", "rows", "clients", "status")):
+            continue
+        row = f"{key:<45}"
+        for flat in flats:
+            value = flat.get(key)
+            if value is None:
+                row += f"{'-':>20}"
+            elif flat is base or not base[key]:
+                row += f"{value:>20.4g}"
+            else:
+                row += f"{value:>11.4g} ({value / base[key]:.2f}x)"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inferensi model & API (output JSON)")
+    parser.add_argument("command", nargs="?", choices=["run", "compare", "coldstart"], default="run")
+    parser.add_argument("files", nargs="*", help="file JSON hasil run (untuk compare)")
+    parser.add_argument("--engine", choices=["sklearn", "flat", "flat_raw", "compact", "compact_raw"],
+                        default=os.environ.get("MODEL_ENGINE", "sklearn"))
+    parser.add_argument("--version", default=None, help="versi di registry models/ (default terbaru)")
+    parser.add_argument("--model", default=None, help="file model .pkl/.npz/.rfc di luar registry")
+    parser.add_argument("--scaler", default=os.path.join(CURRENT_DIR, "scaler_beijing_v3.pkl"))
+    parser.add_argument("--label", default=None, help="nama varian di hasil JSON")
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--repeat", type=int, default=500, help="pengulangan untuk batch kecil")
+    parser.add_argument("--load-repeat", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=1000, help="jumlah request /predict sekuensial")
+    parser.add_argument("--clients", type=int, default=max(4, 2 * (os.cpu_count() or 1)))
+    parser.add_argument("--duration", type=float, default=5.0, help="durasi uji throughput socket (detik)")
+    parser.add_argument("--skip-api", action="store_true", help="lewati benchmark /predict")
+    parser.add_argument("--modes", nargs="+", choices=["background", "eager"], default=["background", "eager"],
+                        help="STARTUP_MODE yang diuji (coldstart)")
+    parser.add_argument("--cold-repeat", type=int, default=3, help="jumlah cold start per mode")
+    parser.add_argument("--timeout", type=float, default=120.0, help="batas waktu satu cold start (detik)")
+    parser.add_argument("--output", default=None, help="simpan JSON ke file (default stdout)")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        if len(args.files) < 2:
+            parser.error("compare butuh minimal dua file JSON")
+        compare(args.files)
+        return
+
+    result = run_coldstart(args) if args.command == "coldstart" else run(args)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        log(f"💾 Hasil disimpan: {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,479 @@
+"""
+Kompresi forest pasca-training: model lebih kecil & cepat yang prediksinya
+(hampir) sama dengan forest penuh.
+
+Tahap, masing-masing diukur terhadap forest penuh (teacher):
+1. Subset pohon : forward selection greedy, setiap langkah menambah pohon yang
+                  paling menaikkan kecocokan label dengan forest penuh di set
+                  seleksi, sampai --target-agreement tercapai.
+2. Collapse     : subtree yang semua leaf-nya memilih kelas yang sama dan
+                  probabilitasnya berbeda paling banyak --collapse-tol dari node
+                  akarnya diganti satu leaf berisi nilai node itu (rata-rata
+                  berbobot leaf di bawahnya). Pohon lebih kecil & lebih dangkal.
+3. Distilasi    : (opsional, --distill-depth) satu pohon atau forest kecil dilatih
+                  ulang pada 4 fitur input dengan label hasil forest penuh.
+
+Set seleksi & distilasi diambil dari training set (SMOTE, cache pipeline)
+ditambah titik acak di dalam VALID_RANGES. Laporan dihitung di test set
+train_model.py: kecocokan dengan forest penuh, akurasi, F1, latency batch 1
+(forest array input mentah, sama dengan MODEL_ENGINE=flat_raw) dan ukuran.
+
+Kandidat tercepat dengan kecocokan test set >= --target-agreement ditulis ke
+--output dengan layout folder versi registry (model.pkl, model*.npz, model*.rfc,
+scaler.pkl), jadi bisa dipakai api_predict.py dengan MODEL_ENGINE apa pun;
+--publish menyalinnya ke registry sebagai versi baru (hot reload).
+
+Cara pakai:
+    python compress_forest.py                                # model v3 train_model.py
+    python compress_forest.py --train --distill-depth 10 14  # teacher beijing_optimasi_v3.py (400 pohon, depth 18)
+    python compress_forest.py --target-agreement 0.98 --collapse-tol 1 --publish
+"""
+import argparse
+import copy
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from dataset_loader import FEATURE_COLUMNS
+from forest_engine import export_compact, export_forest
+from hyperparam_search import LATENCY_REPEAT, evaluate
+from model_registry import REGISTRY_DIR, VERSION_FILES, publish_version
+from pipeline_cache import PipelineCache
+from train_chunked import merge_forests
+from validasi_input import RANGE_MAX, RANGE_MIN
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(CURRENT_DIR, "dataset_kualitas_udara_beijing_final.csv")
+MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.pkl")
+SCALER_PATH = os.path.join(CURRENT_DIR, "scaler_beijing_v3.pkl")
+OUTPUT_DIR = os.path.join(CURRENT_DIR, "model_compressed")
+REPORT_NAME = "compression.json"
+
+SEED = 42
+TARGET_AGREEMENT = 0.99
+COLLAPSE_TOL = 0.2
+SELECTION_ROWS = 20000
+DISTILL_ROWS = 200000
+DISTILL_MIN_SAMPLES_LEAF = 4
+# Porsi titik acak seragam di dalam VALID_RANGES pada set seleksi/distilasi:
+# API menerima input apa pun di dalam range, bukan hanya yang mirip data training
+SYNTHETIC_FRACTION = 0.2
+# Baris training digeser noise normal (x std fitur). Pohon menghafal titik
+# training, tanpa noise kecocokan di set seleksi jauh lebih tinggi dari test set
+# (99% -> 96%), dengan 0.1 std keduanya hampir sama
+JITTER = 0.1
+
+# Parameter beijing_optimasi_v3.py, untuk --train
+TEACHER_PARAMS = {
+    "n_estimators": 400,
+    "max_depth": 18,
+    "min_samples_leaf": 2,
+    "max_features": "sqrt",
+    "class_weight": "balanced"
+}
+
+# Nilai node sklearn untuk leaf (sklearn.tree._tree.TREE_LEAF / TREE_UNDEFINED)
+TREE_LEAF = -1
+TREE_UNDEFINED = -2
+
+
+# =====================================
+# DATA
+# =====================================
+def to_frame(scaler, X):
+    """Scaler train_model.py di-fit dengan DataFrame, beri nama kolom agar tidak ada warning"""
+    if getattr(scaler, "feature_names_in_", None) is not None:
+        return pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    return X
+
+
+def sample_rows(X_raw, scaler, n_rows, rng):
+    """
+    n_rows baris ter-scale (float32, format internal pohon sklearn): sampel
+    training set digeser JITTER + SYNTHETIC_FRACTION titik acak seragam di dalam
+    VALID_RANGES.
+    """
+    n_synthetic = int(n_rows * SYNTHETIC_FRACTION)
+    n_data = min(n_rows - n_synthetic, len(X_raw))
+    rows = np.sort(rng.choice(len(X_raw), n_data, replace=False))
+    jitter = rng.normal(0.0, JITTER, size=(n_data, X_raw.shape[1])) * X_raw.std(axis=0)
+    synthetic = rng.uniform(RANGE_MIN, RANGE_MAX, size=(n_synthetic, len(RANGE_MIN)))
+    X = np.vstack([X_raw[rows] + jitter, synthetic])
+    return np.asarray(scaler.transform(to_frame(scaler, X)), dtype=np.float32)
+
+
+def prepare_data(source, scaler):
+    """
+    Test set train_model.py + training set (SMOTE) dalam satuan asli, lewat
+    pipeline_cache.py. Training set di-scale dengan scaler split; dikembalikan
+    ke satuan asli agar bisa di-scale ulang dengan scaler model.
+    """
+    cache = PipelineCache(source)
+    split = cache.split()
+    resampled = cache.resampled()
+    X_train_raw = split["scaler"].inverse_transform(np.asarray(resampled["X_train"], dtype=np.float64))
+    X_test_raw = split["X_test"].to_numpy(dtype=np.float64)
+    scaler = scaler or split["scaler"]
+    return {
+        "X_train_raw": X_train_raw,
+        "X_test_raw": X_test_raw,
+        "X_test": scaler.transform(to_frame(scaler, X_test_raw)),
+        "y_test": split["y_test"].to_numpy().astype(str),
+        "scaler": scaler,
+        "hit": bool(split["hit"] and resampled["hit"]),
+        "cache": cache
+    }
+
+
+def train_teacher(cache, jobs):
+    """Forest dengan parameter beijing_optimasi_v3.py di training set train_model.py"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    resampled = cache.resampled()
+    model = RandomForestClassifier(random_state=SEED, n_jobs=jobs, **TEACHER_PARAMS)
+    model.fit(resampled["X_train"], resampled["y_train"])
+    return model
+
+
+# =====================================
+# SUBSET POHON
+# =====================================
+def tree_probabilities(model, X):
+    """(pohon, baris, kelas) float32: probabilitas setiap pohon untuk X ter-scale"""
+    return np.stack([tree.predict_proba(X).astype(np.float32) for tree in model.estimators_])
+
+
+def select_trees(per_tree, target, max_trees=None):
+    """
+    Forward selection greedy. Setiap langkah menambah pohon yang paling menaikkan
+    kecocokan argmax dengan forest penuh (seri: selisih kuadrat probabilitas
+    terkecil), berhenti saat kecocokan >= target.
+    Mengembalikan (indeks pohon urut terpilih, kecocokan setelah setiap langkah).
+    """
+    n_trees = len(per_tree)
+    full = per_tree.mean(axis=0)
+    reference = full.argmax(axis=1)
+    max_trees = min(max_trees or n_trees, n_trees)
+
+    total = np.zeros_like(full)
+    remaining = list(range(n_trees))
+    order, trace = [], []
+    while remaining and len(order) < max_trees:
+        candidates = total + per_tree[remaining]
+        agreement = (candidates.argmax(axis=2) == reference).mean(axis=1)
+        error = np.square(candidates / (len(order) + 1) - full).sum(axis=(1, 2))
+        best = np.lexsort((error, -agreement))[0]
+        tree = remaining.pop(best)
+        order.append(tree)
+        total += per_tree[tree]
+        trace.append(float(agreement[best]))
+        if agreement[best] >= target:
+            break
+    return order, trace
+
+
+def subset_forest(model, trees):
+    """Salinan forest yang hanya berisi pohon `trees` (urutan asli dipertahankan)"""
+    return merge_forests(copy.copy(model), [model.estimators_[i] for i in sorted(trees)])
+
+
+# =====================================
+# COLLAPSE SUBTREE
+# =====================================
+def node_levels(left, right):
+    """Daftar array node per kedalaman (level 0 = root)"""
+    levels = [np.array([0])]
+    while True:
+        nodes = levels[-1]
+        nodes = nodes[left[nodes] != TREE_LEAF]
+        if len(nodes) == 0:
+            return levels
+        levels.append(np.concatenate([left[nodes], right[nodes]]))
+
+
+def collapse_tree(estimator, tol):
+    """
+    Salinan pohon dengan subtree seragam diganti satu leaf. Subtree seragam: semua
+    leaf memilih kelas yang sama dan setiap probabilitasnya berbeda paling banyak
+    tol dari node akarnya. Nilai node = rata-rata berbobot leaf di bawahnya, jadi
+    label pohon tidak berubah dan probabilitasnya bergeser paling banyak tol.
+    Mengembalikan (pohon baru, jumlah node yang dibuang).
+    """
+    tree = estimator.tree_
+    state = tree.__getstate__()
+    nodes = state["nodes"]
+    left, right = nodes["left_child"], nodes["right_child"]
+    proba = state["values"][:, 0, :]
+    proba = proba / np.maximum(proba.sum(axis=1, keepdims=True), 1e-12)
+    levels = node_levels(left, right)
+
+    # Bottom-up: kelas seragam subtree (-1 = campuran) + rentang probabilitas leaf-nya
+    label = proba.argmax(axis=1)
+    low, high = proba.copy(), proba.copy()
+    collapsible = np.zeros(len(nodes), dtype=bool)
+    for level in reversed(levels):
+        level = level[left[level] != TREE_LEAF]
+        l, r = left[level], right[level]
+        label[level] = np.where((label[l] == label[r]) & (label[l] >= 0), label[l], -1)
+        low[level] = np.minimum(low[l], low[r])
+        high[level] = np.maximum(high[l], high[r])
+        spread = np.maximum(high[level] - proba[level], proba[level] - low[level]).max(axis=1)
+        collapsible[level] = (label[level] >= 0) & (spread <= tol)
+
+    # Top-down: node dipertahankan jika tidak ada leluhur yang di-collapse
+    is_leaf = (left == TREE_LEAF) | collapsible
+    kept = np.zeros(len(nodes), dtype=bool)
+    kept[0] = True
+    depth = 0
+    for d, level in enumerate(levels):
+        level = level[kept[level]]
+        if len(level) == 0:
+            break
+        depth = d
+        level = level[~is_leaf[level]]
+        kept[left[level]] = True
+        kept[right[level]] = True
+
+    # Node yang tersisa diberi nomor ulang (urutan asli: anak tetap setelah induk)
+    new_id = np.cumsum(kept) - 1
+    new_nodes = nodes[kept].copy()
+    leaf = is_leaf[kept]
+    new_nodes["left_child"] = np.where(leaf, TREE_LEAF, new_id[new_nodes["left_child"]])
+    new_nodes["right_child"] = np.where(leaf, TREE_LEAF, new_id[new_nodes["right_child"]])
+    new_nodes["feature"][leaf] = TREE_UNDEFINED
+    new_nodes["threshold"][leaf] = TREE_UNDEFINED
+
+    collapsed_tree = type(tree)(*tree.__reduce__()[1])
+    collapsed_tree.__setstate__({
+        "max_depth": depth,
+        "node_count": int(kept.sum()),
+        "nodes": new_nodes,
+        "values": np.ascontiguousarray(state["values"][kept])
+    })
+    collapsed = copy.copy(estimator)
+    collapsed.tree_ = collapsed_tree
+    return collapsed, int(len(nodes) - kept.sum())
+
+
+def collapse_forest(model, tol):
+    """Collapse semua pohon forest; (forest baru, jumlah node yang dibuang)"""
+    trees, removed = zip(*(collapse_tree(estimator, tol) for estimator in model.estimators_))
+    return merge_forests(copy.copy(model), trees), sum(removed)
+
+
+# =====================================
+# DISTILASI
+# =====================================
+def distill(X, labels, classes, depth, n_trees, jobs):
+    """Pohon (n_trees=1) atau forest kecil yang dilatih dengan label forest penuh"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    params = {"max_depth": depth, "min_samples_leaf": DISTILL_MIN_SAMPLES_LEAF, "random_state": SEED}
+    if n_trees == 1:
+        student = DecisionTreeClassifier(**params)
+    else:
+        student = RandomForestClassifier(n_estimators=n_trees, n_jobs=jobs, **params)
+    student.fit(X, classes[labels])
+    if list(student.classes_) != list(classes):
+        raise ValueError(f"Label teacher tidak memuat semua kelas: {list(student.classes_)}")
+    return student
+
+
+# =====================================
+# LAPORAN & ARTEFAK
+# =====================================
+def describe(model):
+    trees = getattr(model, "estimators_", [model])
+    return {
+        "trees": len(trees),
+        "max_depth": int(max(tree.tree_.max_depth for tree in trees))
+    }
+
+
+def measure(name, model, data, reference, latency_repeat):
+    """Metrik kandidat di test set + kecocokan dengan forest penuh"""
+    start = time.perf_counter()
+    proba = model.predict_proba(data["X_test"])
+    result = {
+        "name": name,
+        **describe(model),
+        "agreement": round(float(np.mean(proba.argmax(axis=1) == reference.argmax(axis=1))), 5),
+        "mean_abs_proba_diff": round(float(np.abs(proba - reference).mean()), 5),
+        "predict_seconds": round(time.perf_counter() - start, 3),
+        **evaluate(model, data["scaler"], data["X_test"], data["X_test_raw"], data["y_test"], latency_repeat)
+    }
+    return model, result
+
+
+def pick_candidate(results, target, name=None):
+    """Kandidat bernama `name`, atau yang tercepat dengan kecocokan >= target"""
+    if name is not None:
+        matches = [r for r in results if r["name"] == name]
+        if not matches:
+            raise ValueError(f"Kandidat '{name}' tidak ada: {[r['name'] for r in results]}")
+        return matches[0]
+    passing = [r for r in results if r["name"] != "full" and r["agreement"] >= target]
+    return min(passing, key=lambda r: (r["latency_p50_ms"], r["size_bytes"])) if passing else None
+
+
+def write_artifacts(model, scaler, output_dir, report):
+    """Semua artefak satu versi registry (model.pkl, .npz, .rfc, scaler.pkl) + laporan, atomik"""
+    tmp_dir = f"{output_dir.rstrip(os.sep)}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    path = {key: os.path.join(tmp_dir, name) for key, name in VERSION_FILES.items()}
+    joblib.dump(model, path["sklearn"])
+    joblib.dump(scaler, path["scaler"])
+    export_forest(model, path["flat"])
+    export_forest(model, path["flat_raw"], scaler=scaler)
+    export_compact(model, path["compact"])
+    export_compact(model, path["compact_raw"], scaler=scaler)
+    with open(os.path.join(tmp_dir, REPORT_NAME), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return {key: os.path.join(output_dir, name) for key, name in VERSION_FILES.items()}
+
+
+def print_table(results, chosen):
+    print(f"   {'Kandidat':<26} {'Pohon':>5} {'Depth':>5} {'Node':>9} {'Cocok':>8} {'Akurasi':>8} "
+          f"{'F1':>7} {'p50 batch1':>11} {'Ukuran':>9}")
+    for r in results:
+        mark = " ⬅" if chosen is not None and r["name"] == chosen["name"] else ""
+        print(f"   {r['name']:<26} {r['trees']:>5} {r['max_depth']:>5} {r['nodes']:>9} "
+              f"{r['agreement']*100:>7.2f}% {r['accuracy']*100:>7.2f}% {r['f1_macro']:>7.4f} "
+              f"{r['latency_p50_ms']:>9.3f}ms {r['size_bytes'] / 2**20:>7.2f}MB{mark}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kompresi forest: subset pohon, collapse subtree, distilasi")
+    parser.add_argument("--source", default=DATASET_PATH, help="dataset final (split & SMOTE via cache pipeline)")
+    parser.add_argument("--model", default=MODEL_PATH, help="forest sklearn (.pkl) yang dikompres")
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--train", action="store_true",
+                        help="latih teacher dengan parameter beijing_optimasi_v3.py (--model jadi pembanding)")
+    parser.add_argument("--target-agreement", type=float, default=TARGET_AGREEMENT,
+                        help="kecocokan label minimum dengan forest penuh")
+    parser.add_argument("--max-trees", type=int, help="batas jumlah pohon subset")
+    parser.add_argument("--collapse-tol", type=float, default=COLLAPSE_TOL,
+                        help="selisih probabilitas leaf maksimum untuk collapse subtree")
+    parser.add_argument("--distill-depth", type=int, nargs="*", default=[],
+                        help="kedalaman model distilasi (boleh lebih dari satu)")
+    parser.add_argument("--distill-trees", type=int, default=1, help="jumlah pohon model distilasi")
+    parser.add_argument("--selection-rows", type=int, default=SELECTION_ROWS)
+    parser.add_argument("--distill-rows", type=int, default=DISTILL_ROWS)
+    parser.add_argument("--latency-repeat", type=int, default=LATENCY_REPEAT)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pick", help="nama kandidat yang ditulis (default: tercepat yang lolos target)")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="folder artefak (layout folder versi registry)")
+    parser.add_argument("--publish", action="store_true", help="publish artefak ke registry model")
+    args = parser.parse_args(argv)
+
+    print("=== KOMPRESI FOREST ===\n")
+    start = time.perf_counter()
+    print("1. Menyiapkan data (split + SMOTE, cache pipeline)...")
+    scaler = None if args.train else joblib.load(args.scaler)
+    data = prepare_data(args.source, scaler)
+    scaler = data["scaler"]
+    print(f"   Training (setelah SMOTE): {len(data['X_train_raw'])}, test: {len(data['y_test'])} "
+          f"({'dari cache' if data['hit'] else 'dihitung baru'})")
+
+    baseline = None
+    if args.train:
+        print(f"   Melatih teacher {TEACHER_PARAMS['n_estimators']} pohon depth {TEACHER_PARAMS['max_depth']}...")
+        fit_start = time.perf_counter()
+        model = train_teacher(data["cache"], args.jobs)
+        print(f"   Teacher dilatih ({time.perf_counter() - fit_start:.1f}s)")
+        if os.path.exists(args.model):
+            baseline = joblib.load(args.model)
+    else:
+        model = joblib.load(args.model)
+    if not hasattr(model, "estimators_"):
+        raise ValueError(f"Model bukan forest: {type(model).__name__}")
+    classes = np.asarray(model.classes_)
+    print(f"   Forest penuh: {describe(model)['trees']} pohon, depth {describe(model)['max_depth']}")
+
+    rng = np.random.default_rng(SEED)
+    reference = model.predict_proba(data["X_test"])
+    candidates = [measure("full", model, data, reference, args.latency_repeat)]
+    if baseline is not None:
+        candidates.append(measure("train_model.py", baseline, data, reference, args.latency_repeat))
+
+    print(f"\n2. Subset pohon (greedy, {args.selection_rows} baris seleksi, "
+          f"target {args.target_agreement*100:.2f}%)...")
+    step_start = time.perf_counter()
+    X_select = sample_rows(data["X_train_raw"], scaler, args.selection_rows, rng)
+    order, trace = select_trees(tree_probabilities(model, X_select), args.target_agreement, args.max_trees)
+    for k in sorted({1, 2, 5, 10, 20, 50, 100, 200, len(order)}):
+        if k <= len(order):
+            print(f"   {k:>4} pohon: kecocokan {trace[k - 1]*100:.2f}%")
+    print(f"   {len(order)} pohon terpilih ({time.perf_counter() - step_start:.1f}s)")
+    forests = [("full", model)]
+    if len(order) < len(model.estimators_):
+        subset = subset_forest(model, order)
+        candidates.append(measure(f"subset-{len(order)}", subset, data, reference, args.latency_repeat))
+        forests.insert(0, (f"subset-{len(order)}", subset))
+    else:
+        print("   ⚠️  Target hanya tercapai dengan semua pohon, subset dilewati")
+
+    print(f"\n3. Collapse subtree seragam (tol {args.collapse_tol})...")
+    for name, forest in forests:
+        step_start = time.perf_counter()
+        collapsed, removed = collapse_forest(forest, args.collapse_tol)
+        print(f"   {name}: {removed} node dibuang ({time.perf_counter() - step_start:.1f}s)")
+        candidates.append(measure(f"{name}+collapse", collapsed, data, reference, args.latency_repeat))
+
+    if args.distill_depth:
+        print(f"\n4. Distilasi ({args.distill_trees} pohon, {args.distill_rows} baris)...")
+        X_distill = sample_rows(data["X_train_raw"], scaler, args.distill_rows, rng)
+        labels = model.predict_proba(X_distill).argmax(axis=1)
+        for depth in args.distill_depth:
+            step_start = time.perf_counter()
+            student = distill(X_distill, labels, classes, depth, args.distill_trees, args.jobs)
+            name = f"distill-d{depth}" + (f"x{args.distill_trees}" if args.distill_trees > 1 else "")
+            print(f"   {name}: dilatih ({time.perf_counter() - step_start:.1f}s)")
+            candidates.append(measure(name, student, data, reference, args.latency_repeat))
+
+    models = {result["name"]: candidate for candidate, result in candidates}
+    results = [result for _, result in candidates]
+    chosen = pick_candidate(results, args.target_agreement, args.pick)
+
+    print(f"\n5. Tradeoff (test set {len(data['y_test'])} baris, kecocokan = label sama dengan forest penuh):")
+    print_table(results, chosen)
+
+    report = {
+        "source": os.path.abspath(args.source),
+        "model": "beijing_optimasi_v3 (--train)" if args.train else os.path.abspath(args.model),
+        "target_agreement": args.target_agreement,
+        "collapse_tol": args.collapse_tol,
+        "selection_rows": args.selection_rows,
+        "selection_trace": [round(a, 5) for a in trace],
+        "selected_trees": sorted(int(i) for i in order),
+        "candidates": results,
+        "chosen": chosen["name"] if chosen else None,
+        "elapsed_seconds": round(time.perf_counter() - start, 2)
+    }
+    if chosen is None:
+        print(f"\n⚠️  Tidak ada kandidat dengan kecocokan >= {args.target_agreement*100:.2f}%, "
+              f"artefak tidak ditulis (turunkan --target-agreement atau pakai --pick)")
+        return report
+
+    paths = write_artifacts(models[chosen["name"]], scaler, args.output, report)
+    print(f"\n💾 Artefak '{chosen['name']}' disimpan: {args.output}")
+    print(f"   Laporan: {os.path.join(args.output, REPORT_NAME)}")
+    if args.publish:
+        version = publish_version(paths)
+        print(f"🚀 Dipublish ke registry: {os.path.join(REGISTRY_DIR, version)}")
+    else:
+        print("   Publish ke registry (hot reload API) dengan --publish")
+    return report
+
+
+if __name__ == "__main__":
+    main()
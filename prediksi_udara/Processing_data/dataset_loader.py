@@ -0,0 +1,202 @@
+"""
+Loader dataset yang hemat memori untuk api_predict.py.
+
+- Hanya lima kolom yang dipakai API yang dibaca dari CSV
+- Fitur disimpan float32, label sebagai categorical
+- Saat pertama kali jalan, CSV dikonversi ke cache biner kolumnar
+  (set file .npy yang di-memory-map, atau Parquet jika pyarrow tersedia).
+  Worker berikutnya membuka cache tanpa parsing CSV dan berbagi page memori
+  yang sama lewat page cache OS.
+
+Cache dibuat ulang otomatis jika ukuran/mtime CSV berubah.
+Format cache diatur dengan env DATASET_CACHE = "npy" (default), "parquet" atau "none".
+
+pandas baru diimpor saat dataset benar-benar dibaca, jadi import modul ini
+tidak memperlambat startup api_predict.py (dataset dimuat saat /stats atau
+/sample pertama).
+"""
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from dataset_stats import file_fingerprint
+
+FEATURE_COLUMNS = ["suhu", "kelembapan", "tekanan", "kecepatan_angin"]
+LABEL_COLUMN = "kualitas_udara"
+USED_COLUMNS = FEATURE_COLUMNS + [LABEL_COLUMN]
+
+# Presisi data sensor hanya 1 desimal, float32 sudah lebih dari cukup
+FEATURE_DTYPE = np.float32
+
+DATASET_CACHE = os.environ.get("DATASET_CACHE", "npy")
+
+
+def read_csv_lean(csv_path):
+    """Membaca CSV hanya kolom yang dipakai dengan dtype ringkas"""
+    import pandas as pd
+
+    dtypes = {col: FEATURE_DTYPE for col in FEATURE_COLUMNS}
+    dtypes[LABEL_COLUMN] = "category"
+    return pd.read_csv(csv_path, usecols=USED_COLUMNS, dtype=dtypes)[USED_COLUMNS]
+
+
+def _cache_path(csv_path, fmt):
+    base = os.path.splitext(csv_path)[0]
+    return base + (".parquet" if fmt == "parquet" else ".npycache")
+
+
+def _write_npy_cache(df, cache_dir, fingerprint):
+    """
+    Tulis ke folder sementara unik lalu rename, aman jika beberapa worker
+    (preforked) menulis bersamaan: folder cache tidak pernah dihapus sebelum
+    penggantinya siap, pembaca melihat cache lama atau baru secara utuh.
+    """
+    parent = os.path.dirname(os.path.abspath(cache_dir))
+    tmp_dir = tempfile.mkdtemp(prefix=f"{os.path.basename(cache_dir)}.tmp", dir=parent)
+    try:
+        for col in FEATURE_COLUMNS:
+            np.save(os.path.join(tmp_dir, f"{col}.npy"), df[col].to_numpy(dtype=FEATURE_DTYPE))
+        labels = df[LABEL_COLUMN].cat
+        np.save(os.path.join(tmp_dir, f"{LABEL_COLUMN}.codes.npy"), labels.codes.to_numpy().astype(np.int8))
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "source_fingerprint": fingerprint,
+                "categories": [str(c) for c in labels.categories],
+                "rows": len(df)
+            }, f)
+        _publish_dir(tmp_dir, cache_dir, fingerprint)
+    finally:
+        # Tidak ada jika rename berhasil; sisa jika worker lain lebih dulu
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _publish_dir(tmp_dir, cache_dir, fingerprint):
+    """Rename tmp_dir menjadi cache_dir tanpa menghapus cache_dir lebih dulu"""
+    try:
+        os.replace(tmp_dir, cache_dir)
+        return
+    except OSError:
+        pass
+    # cache_dir sudah ada. Jika isinya cache yang sama dan utuh (ditulis worker lain), pakai itu
+    try:
+        if _read_npy_cache(cache_dir, fingerprint) is not None:
+            return
+    except (OSError, ValueError):
+        pass
+    # Cache usang dipindah dulu (rename atomik) lalu dihapus; pembaca yang
+    # masih me-mmap file lama tidak terganggu
+    old_dir = tempfile.mkdtemp(prefix=f"{os.path.basename(cache_dir)}.old", dir=os.path.dirname(tmp_dir))
+    try:
+        os.replace(cache_dir, os.path.join(old_dir, "cache"))
+    except OSError:
+        pass
+    try:
+        os.replace(tmp_dir, cache_dir)
+    except OSError:
+        # Worker lain mengisi cache_dir di antara dua rename di atas
+        pass
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_npy_meta(cache_dir):
+    """meta.json folder kolumnar, None jika tidak ada / rusak"""
+    try:
+        with open(os.path.join(cache_dir, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_npy_columns(cache_dir, meta):
+    """DataFrame dari folder kolumnar (satu .npy per fitur + kode label)"""
+    import pandas as pd
+
+    # mmap_mode="r": data tidak disalin ke heap, page dibagi antar proses
+    columns = {
+        col: np.load(os.path.join(cache_dir, f"{col}.npy"), mmap_mode="r")
+        for col in FEATURE_COLUMNS
+    }
+    codes = np.load(os.path.join(cache_dir, f"{LABEL_COLUMN}.codes.npy"), mmap_mode="r")
+    columns[LABEL_COLUMN] = pd.Categorical.from_codes(codes, meta["categories"])
+    return pd.DataFrame(columns, copy=False)
+
+
+def _read_npy_cache(cache_dir, fingerprint):
+    meta = read_npy_meta(cache_dir)
+    if meta is None or meta.get("source_fingerprint") != fingerprint:
+        return None
+    return read_npy_columns(cache_dir, meta)
+
+
+def _write_parquet_cache(df, cache_path, fingerprint):
+    tmp_path = f"{cache_path}.tmp{os.getpid()}"
+    df.to_parquet(tmp_path, index=False)
+    with open(tmp_path + ".meta.json", "w", encoding="utf-8") as f:
+        json.dump({"source_fingerprint": fingerprint}, f)
+    os.replace(tmp_path + ".meta.json", cache_path + ".meta.json")
+    os.replace(tmp_path, cache_path)
+
+
+def _read_parquet_cache(cache_path, fingerprint):
+    import pandas as pd
+
+    try:
+        with open(cache_path + ".meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("source_fingerprint") != fingerprint:
+        return None
+    return pd.read_parquet(cache_path, memory_map=True)
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def load_dataset_lean(csv_path, cache=DATASET_CACHE):
+    """
+    Load dataset dengan kolom minimal; pakai cache biner jika valid,
+    jika belum ada cache dibuat dari CSV (kegagalan menulis cache diabaikan).
+    """
+    fingerprint = file_fingerprint(csv_path)
+    if fingerprint is None:
+        raise FileNotFoundError(csv_path)
+
+    if cache == "parquet" and not _parquet_available():
+        print("⚠️  pyarrow tidak terpasang, cache dataset memakai format npy")
+        cache = "npy"
+    if cache not in ("npy", "parquet"):
+        return read_csv_lean(csv_path)
+
+    cache_path = _cache_path(csv_path, cache)
+    reader = _read_parquet_cache if cache == "parquet" else _read_npy_cache
+    writer = _write_parquet_cache if cache == "parquet" else _write_npy_cache
+
+    try:
+        df = reader(cache_path, fingerprint)
+    except (OSError, ValueError) as e:
+        # Cache sedang diganti worker lain atau rusak: anggap cache miss
+        print(f"⚠️  Cache dataset tidak bisa dibaca, membaca CSV: {e}")
+        df = None
+    if df is not None:
+        return df
+
+    df = read_csv_lean(csv_path)
+    try:
+        writer(df, cache_path, fingerprint)
+        print(f"💾 Cache dataset dibuat: {cache_path}")
+        # Baca ulang dari cache agar worker ini juga memakai page yang di-mmap
+        cached = reader(cache_path, fingerprint)
+        if cached is not None:
+            df = cached
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Gagal menulis cache dataset: {e}")
+    return df
@@ -0,0 +1,56 @@
+"""
+Sampler bertingkat (per kelas kualitas udara) untuk endpoint /sample.
+
+Index baris per kelas dibangun sekali saat startup, lalu sampling cukup
+mengundi bilangan bulat acak ke dalam array index tersebut. Biaya per
+request hanya bergantung pada jumlah sample, bukan ukuran dataset.
+"""
+import numpy as np
+
+KUALITAS_ORDER = ["Baik", "Sedang", "Buruk"]
+
+
+class StratifiedSampler:
+    """Peta kelas -> array index baris, plus kolom dataset dalam bentuk array"""
+
+    def __init__(self, df, label_column="kualitas_udara"):
+        self.columns = list(df.columns)
+        # Kolom categorical disimpan sebagai (codes, categories) agar tidak
+        # menjadi array object sepanjang dataset
+        self._values = {}
+        self._categories = {}
+        for col in self.columns:
+            if df[col].dtype.name == "category":
+                self._values[col] = df[col].cat.codes.to_numpy()
+                self._categories[col] = np.asarray(df[col].cat.categories, dtype=object)
+            else:
+                self._values[col] = df[col].to_numpy()
+        self.class_index = {
+            str(k): np.asarray(v, dtype=np.int64)
+            for k, v in df.groupby(label_column, observed=True).indices.items()
+        }
+
+    def sample(self, n=5, seed=None, classes=KUALITAS_ORDER):
+        """Ambil maksimal n baris acak (tanpa pengembalian) dari setiap kelas"""
+        rng = np.random.default_rng(seed)
+        records = []
+        for kualitas in classes:
+            rows = self.class_index.get(kualitas)
+            if rows is None or len(rows) == 0:
+                continue
+            picked = rows[rng.choice(len(rows), size=min(n, len(rows)), replace=False)]
+            columns = {col: self._column_values(col, picked) for col in self.columns}
+            records.extend(
+                {col: columns[col][i] for col in self.columns} for i in range(len(picked))
+            )
+        return records
+
+    def _column_values(self, col, picked):
+        """Nilai kolom untuk baris terpilih sebagai list tipe Python (siap JSON)"""
+        values = self._values[col][picked]
+        if col in self._categories:
+            return self._categories[col][values].tolist()
+        if values.dtype == np.float32:
+            # Lewat representasi terpendek float32: 1013.2, bukan 1013.2000122070312
+            return values.astype(str).astype(np.float64).tolist()
+        return values.tolist()
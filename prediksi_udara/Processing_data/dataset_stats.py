@@ -0,0 +1,159 @@
+"""
+Statistik dataset yang dihitung sekali dan disimpan di memori.
+
+Statistik (/stats) hanya bergantung pada isi dataset, jadi cukup dihitung
+saat load (atau dibaca dari file sidecar yang ditulis train_model.py) lalu
+dilayani dari memori beserta ETag/Last-Modified. Cache otomatis dihitung
+ulang jika file dataset atau model berubah di disk.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATS_PATH = os.path.join(CURRENT_DIR, "stats_kualitas_udara_beijing_v3.json")
+
+FEATURE_COLUMNS = ["suhu", "kelembapan", "tekanan", "kecepatan_angin"]
+
+# Jeda minimum (detik) antar pengecekan perubahan file di disk
+CHECK_INTERVAL = float(os.environ.get("STATS_CHECK_INTERVAL", "1.0"))
+
+
+def file_fingerprint(path):
+    """(ukuran, mtime_ns) file, atau None jika file tidak ada"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def as_float(value):
+    """
+    Konversi skalar NumPy ke float Python. float32 dikonversi lewat
+    representasi terpendeknya agar 1013.2 tidak menjadi 1013.2000122070312.
+    """
+    if isinstance(value, np.float32):
+        return float(str(value))
+    return float(value)
+
+
+def hitung_statistik(df):
+    """Menghitung statistik dataset, satu kali reduksi per kolom"""
+    range_parameter = {}
+    for col in FEATURE_COLUMNS:
+        values = df[col].to_numpy()
+        range_parameter[col] = {
+            "min": as_float(values.min()),
+            "max": as_float(values.max()),
+            # Akumulasi float64 agar rata-rata kolom float32 tetap presisi
+            "mean": float(values.mean(dtype=np.float64))
+        }
+    return {
+        "total_data": int(len(df)),
+        "distribusi_kualitas": {
+            str(k): int(v) for k, v in df["kualitas_udara"].value_counts().items() if v > 0
+        },
+        "range_parameter": range_parameter
+    }
+
+
+def simpan_statistik(df, dataset_path, stats_path=STATS_PATH):
+    """Menulis statistik ke file sidecar JSON beserta fingerprint dataset"""
+    sidecar = {
+        "dataset_fingerprint": file_fingerprint(dataset_path),
+        "stats": hitung_statistik(df)
+    }
+    tmp_path = stats_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(sidecar, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, stats_path)
+    return sidecar["stats"]
+
+
+def baca_statistik(dataset_path, stats_path=STATS_PATH):
+    """Membaca sidecar; None jika tidak ada atau dataset sudah berubah"""
+    try:
+        with open(stats_path, encoding="utf-8") as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if sidecar.get("dataset_fingerprint") != file_fingerprint(dataset_path):
+        return None
+    return sidecar.get("stats")
+
+
+class StatsEntry:
+    """Payload statistik yang sudah di-serialize beserta header cache-nya"""
+
+    def __init__(self, payload, watched):
+        self.payload = payload
+        self.body = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        # ETag ikut berubah jika dataset atau model berubah
+        digest = hashlib.sha1(self.body)
+        digest.update(json.dumps(watched).encode("utf-8"))
+        self.etag = digest.hexdigest()
+        mtimes = [fp[1] for fp in watched.values() if fp is not None]
+        self.last_modified = (max(mtimes) / 1e9) if mtimes else time.time()
+
+
+class StatsCache:
+    """
+    Cache statistik di memori.
+
+    load_dataset: fungsi tanpa argumen yang mengembalikan DataFrame dataset,
+    dipanggil hanya jika sidecar tidak valid dan statistik harus dihitung ulang.
+    model_path: path model, atau fungsi tanpa argumen yang mengembalikan path
+    model yang sedang aktif (model bisa berganti saat hot reload).
+    """
+
+    def __init__(self, dataset_path, model_path, load_dataset, stats_path=STATS_PATH, df=None):
+        self.dataset_path = dataset_path
+        self.model_path = model_path
+        self.stats_path = stats_path
+        self.load_dataset = load_dataset
+        self._lock = threading.Lock()
+        self._entry = None
+        self._watched = None
+        self._last_check = 0.0
+        if df is not None:
+            self._entry, self._watched = self._build(df)
+
+    def _fingerprints(self):
+        return {
+            "dataset": file_fingerprint(self.dataset_path),
+            "model": file_fingerprint(self.model_path() if callable(self.model_path) else self.model_path)
+        }
+
+    def _build(self, df=None):
+        """Sidecar dipakai jika masih valid, jika tidak statistik dihitung dari df"""
+        watched = self._fingerprints()
+        payload = baca_statistik(self.dataset_path, self.stats_path)
+        if payload is None:
+            if df is None:
+                df = self.load_dataset()
+            if df is None:
+                return None, watched
+            payload = hitung_statistik(df)
+        return StatsEntry(payload, watched), watched
+
+    def get(self):
+        """
+        StatsEntry terbaru, atau None jika dataset tidak tersedia.
+        Sebelum build pertama selesai semua pemanggil menunggu lock (tidak ada
+        jawaban None sementara); saat build ulang, pemanggil lain tetap
+        mendapat entry lama.
+        """
+        now = time.monotonic()
+        if self._watched is not None and now - self._last_check < CHECK_INTERVAL:
+            return self._entry
+        with self._lock:
+            if self._watched is None or now - self._last_check >= CHECK_INTERVAL:
+                self._last_check = time.monotonic()
+                if self._fingerprints() != self._watched:
+                    self._entry, self._watched = self._build()
+        return self._entry
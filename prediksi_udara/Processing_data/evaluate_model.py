@@ -0,0 +1,551 @@
+"""
+Evaluasi model per chunk di process pool (pengganti cek_akurasi_model_v3.py).
+
+Data uji dibaca per chunk dari folder kolumnar (satu .npy per fitur, di-mmap),
+setiap chunk diskor di worker lalu hanya ringkasannya yang dikirim balik:
+confusion matrix, histogram kalibrasi (confidence vs akurasi per bin),
+jumlah Brier score dan log loss. Ringkasan digabung bertahap di proses utama,
+jadi memori tetap sebesar satu chunk per worker berapa pun ukuran datanya.
+Precision/recall/F1 per kelas, ECE dan laporan lain dihitung dari ringkasan ini.
+
+Mode:
+- holdout : test set yang sama dengan train_model.py (cache pipeline), model yang
+            sudah dilatih (.pkl, .npz atau .rfc; default model v3). Tanpa cache,
+            indeks test dihitung dari kolom label saja dan baris test ditulis per
+            chunk, dataset tidak pernah dimuat utuh
+- kfold   : K fold, fold per baris ditentukan hash nomor baris (sama seperti
+            pembagian train/test train_chunked.py); model dilatih ulang per fold
+- station : held-out station, dataset berpartisi hasil ingest_stations.py;
+            setiap stasiun diuji dengan model yang dilatih dari stasiun lain.
+            Baris dikelompokkan menurut kolom station di partisi, bukan menurut
+            file/partisi asalnya
+
+Model per fold diekspor ke format array (forest_engine.py) agar cepat dimuat worker.
+
+Cara pakai:
+    python evaluate_model.py                                   # holdout model v3
+    python evaluate_model.py --model model_kualitas_udara_beijing_v3.rfc --jobs 4
+    python evaluate_model.py kfold --folds 5 --n-estimators 50
+    python evaluate_model.py station --source beijing_gabungan.parts --output eval_station.json
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from dataset_loader import FEATURE_COLUMNS, LABEL_COLUMN
+from forest_engine import export_forest, load_forest
+from ingest_stations import MANIFEST_NAME, PARTS_PATH, STATION_COLUMN, iter_partition_chunks, station_names
+from preprocess_stream import finalize_npy, mask_baris, proses_chunk
+from train_chunked import (
+    CLASSES, FOREST_PARAMS, SCAN_CHUNK_ROWS, SEED, balance_chunk, clean_chunk, iter_dataset,
+    label_codes, parse_max_depth, peak_rss_mb, row_uniform
+)
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(CURRENT_DIR, "dataset_kualitas_udara_beijing_final.csv")
+MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.pkl")
+SCALER_PATH = os.path.join(CURRENT_DIR, "scaler_beijing_v3.pkl")
+
+EVAL_CHUNK_ROWS = int(os.environ.get("EVAL_CHUNK_ROWS", "50000"))
+CALIBRATION_BINS = 10
+N_FOLDS = 5
+CODES_FILE = f"{LABEL_COLUMN}.codes.npy"
+GROUPS_FILE = "groups.npy"
+
+# Model + scaler terakhir yang dimuat di proses ini (worker memakainya untuk semua chunk)
+_SCORER = {}
+
+
+# =====================================
+# RINGKASAN PER CHUNK
+# =====================================
+def partial_stats(y, proba, bins=CALIBRATION_BINS):
+    """Ringkasan satu chunk: semua field bisa dijumlahkan antar chunk"""
+    k = proba.shape[1]
+    rows = np.arange(len(y))
+    pred = np.argmax(proba, axis=1)
+    confidence = proba[rows, pred]
+    p_true = proba[rows, y]
+    bin_idx = np.minimum((confidence * bins).astype(np.intp), bins - 1)
+    return {
+        "confusion": np.bincount(y * k + pred, minlength=k * k).reshape(k, k),
+        "bin_count": np.bincount(bin_idx, minlength=bins),
+        "bin_confidence": np.bincount(bin_idx, weights=confidence, minlength=bins),
+        "bin_correct": np.bincount(bin_idx, weights=pred == y, minlength=bins),
+        # sum_c (p_c - 1[c == y])^2 tanpa membuat matriks one-hot
+        "brier": float(((proba ** 2).sum(axis=1) - 2 * p_true + 1).sum()),
+        "log_loss": float(-np.log(np.clip(p_true, 1e-15, None)).sum())
+    }
+
+
+def merge_stats(total, stats):
+    if total is None:
+        return stats
+    return {key: total[key] + stats[key] for key in total}
+
+
+def summarize(stats):
+    """Metrik akhir dari ringkasan gabungan"""
+    cm = stats["confusion"]
+    n = int(cm.sum())
+    tp = np.diag(cm).astype(np.float64)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    per_class = {
+        str(cls): {"precision": float(p), "recall": float(r), "f1": float(f), "support": int(s)}
+        for cls, p, r, f, s in zip(CLASSES, precision, recall, f1, support)
+    }
+    weights = support / max(n, 1)
+
+    bins = len(stats["bin_count"])
+    counts = stats["bin_count"]
+    calibration = []
+    for i in range(bins):
+        if counts[i] == 0:
+            continue
+        calibration.append({
+            "bin": f"{i / bins:.1f}-{(i + 1) / bins:.1f}",
+            "count": int(counts[i]),
+            "confidence": float(stats["bin_confidence"][i] / counts[i]),
+            "accuracy": float(stats["bin_correct"][i] / counts[i])
+        })
+    ece = float(np.abs(stats["bin_correct"] - stats["bin_confidence"]).sum() / max(n, 1))
+
+    return {
+        "rows": n,
+        "accuracy": float(tp.sum() / max(n, 1)),
+        "per_class": per_class,
+        "macro_avg": {"precision": float(precision.mean()), "recall": float(recall.mean()),
+                      "f1": float(f1.mean())},
+        "weighted_avg": {"precision": float((precision * weights).sum()),
+                         "recall": float((recall * weights).sum()), "f1": float((f1 * weights).sum())},
+        "confusion_matrix": cm.tolist(),
+        "ece": ece,
+        "brier": stats["brier"] / max(n, 1),
+        "log_loss": stats["log_loss"] / max(n, 1),
+        "calibration": calibration
+    }
+
+
+def print_report(summary):
+    print(f"\n   AKURASI: {summary['accuracy']:.4f} ({summary['accuracy'] * 100:.2f}%) dari {summary['rows']} baris")
+    print("\n   LAPORAN KLASIFIKASI:")
+    print(f"   {'':<14}{'precision':>10}{'recall':>10}{'f1-score':>10}{'support':>10}")
+    for cls, row in summary["per_class"].items():
+        print(f"   {cls:<14}{row['precision']:>10.2f}{row['recall']:>10.2f}{row['f1']:>10.2f}{row['support']:>10}")
+    for name in ("macro_avg", "weighted_avg"):
+        row = summary[name]
+        print(f"   {name.replace('_', ' '):<14}{row['precision']:>10.2f}{row['recall']:>10.2f}"
+              f"{row['f1']:>10.2f}{summary['rows']:>10}")
+
+    print("\n   CONFUSION MATRIX (baris = label asli, kolom = prediksi):")
+    print("   " + " " * 14 + "".join(f"{cls:>10}" for cls in CLASSES))
+    for cls, row in zip(CLASSES, summary["confusion_matrix"]):
+        print(f"   {cls:<14}" + "".join(f"{value:>10}" for value in row))
+
+    print(f"\n   KALIBRASI: ECE={summary['ece']:.4f} Brier={summary['brier']:.4f} "
+          f"log loss={summary['log_loss']:.4f}")
+    for row in summary["calibration"]:
+        print(f"   confidence {row['bin']}: {row['count']:>8} baris, "
+              f"rata-rata {row['confidence']:.3f}, akurasi {row['accuracy']:.3f}")
+
+
+# =====================================
+# SKOR PER CHUNK (WORKER)
+# =====================================
+def load_scorer(model_path, scaler_path, single_thread):
+    """Model + scaler, dimuat sekali per proses dan dipakai ulang selama path-nya sama"""
+    key = (model_path, scaler_path)
+    if _SCORER.get("key") != key:
+        _SCORER.clear()
+        if model_path.endswith((".npz", ".rfc")):
+            model = load_forest(model_path)
+        else:
+            model = joblib.load(model_path)
+            if single_thread:
+                # Paralelisme sudah di level chunk, hindari oversubscription
+                model.n_jobs = 1
+        if list(model.classes_) != list(CLASSES):
+            raise ValueError(f"Kelas model {list(model.classes_)} berbeda dengan {list(CLASSES)}")
+        scaler = None
+        if scaler_path and not getattr(model, "scaler_folded", False):
+            scaler = joblib.load(scaler_path)
+        _SCORER.update(key=key, model=model, scaler=scaler)
+    return _SCORER["model"], _SCORER["scaler"]
+
+
+def read_rows(data_dir, rows):
+    """Matriks fitur baris `rows` (slice atau array indeks) dari folder kolumnar"""
+    return np.column_stack([
+        np.load(os.path.join(data_dir, f"{col}.npy"), mmap_mode="r")[rows] for col in FEATURE_COLUMNS
+    ])
+
+
+def score_chunk(task):
+    model, scaler = load_scorer(task["model"], task["scaler"], task["single_thread"])
+    X = read_rows(task["data_dir"], task["rows"])
+    if scaler is not None:
+        if getattr(scaler, "feature_names_in_", None) is not None:
+            # Scaler train_model.py di-fit dengan DataFrame
+            X = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+        X = scaler.transform(X)
+    y = np.load(os.path.join(task["data_dir"], CODES_FILE), mmap_mode="r")[task["rows"]]
+    return partial_stats(np.asarray(y, dtype=np.intp), model.predict_proba(X), task["bins"])
+
+
+def chunk_tasks(rows, model_path, scaler_path, data_dir, chunk_rows, bins, single_thread):
+    """rows: jumlah baris (semua baris berurutan) atau array indeks baris"""
+    n = rows if isinstance(rows, int) else len(rows)
+    for start in range(0, n, chunk_rows):
+        yield {
+            "model": model_path,
+            "scaler": scaler_path,
+            "data_dir": data_dir,
+            "rows": slice(start, start + chunk_rows) if isinstance(rows, int) else rows[start:start + chunk_rows],
+            "bins": bins,
+            "single_thread": single_thread
+        }
+
+
+def score_tasks(tasks, pool, window):
+    """Skor semua chunk; maksimal `window` chunk yang sedang berjalan/menunggu"""
+    total = None
+    if pool is None:
+        for task in tasks:
+            total = merge_stats(total, score_chunk(task))
+        return total
+
+    running = set()
+    for task in tasks:
+        if len(running) >= window:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                total = merge_stats(total, future.result())
+        running.add(pool.submit(score_chunk, task))
+    for future in wait(running).done:
+        total = merge_stats(total, future.result())
+    return total
+
+
+# =====================================
+# HOLDOUT: TEST SET TRAINING
+# =====================================
+def iter_raw_chunks(source, chunk_rows):
+    """(fitur float64, label str) per chunk, nilainya sama dengan pipeline_cache.read_dataset"""
+    if os.path.isdir(source):
+        for chunk in iter_dataset(source, chunk_rows):
+            yield chunk[FEATURE_COLUMNS].to_numpy(dtype=np.float64), chunk[LABEL_COLUMN].to_numpy(dtype=str)
+        return
+    for chunk in pd.read_csv(source, usecols=FEATURE_COLUMNS + [LABEL_COLUMN], chunksize=chunk_rows):
+        yield chunk[FEATURE_COLUMNS].to_numpy(dtype=np.float64), chunk[LABEL_COLUMN].astype(str).to_numpy()
+
+
+def holdout_test_index(source, split_params, chunk_rows=SCAN_CHUNK_ROWS):
+    """
+    test_idx yang sama dengan PipelineCache.split (train_test_split bertingkat atas
+    semua baris), dihitung dari kolom label saja: per baris hanya satu kode int16
+    yang disimpan, fitur tidak dimuat. Mengembalikan (test_idx, jumlah baris).
+    """
+    from sklearn.model_selection import train_test_split
+
+    vocab = {}
+    parts = []
+    for _, labels in iter_raw_chunks(source, chunk_rows):
+        names, inverse = np.unique(labels, return_inverse=True)
+        mapping = np.array([vocab.setdefault(str(name), len(vocab)) for name in names], dtype=np.int16)
+        parts.append(mapping[inverse])
+    codes = np.concatenate(parts) if parts else np.empty(0, dtype=np.int16)
+    # Kode diurutkan sesuai urutan string label: stratifikasi identik dengan label str
+    rank = np.empty(len(vocab), dtype=np.int16)
+    rank[np.argsort(np.array(list(vocab), dtype=str))] = np.arange(len(vocab))
+    codes = rank[codes]
+    _, test_idx = train_test_split(
+        np.arange(len(codes)),
+        test_size=split_params["test_size"],
+        random_state=split_params["random_state"],
+        stratify=codes if split_params["stratify"] else None
+    )
+    return test_idx, len(codes)
+
+
+def write_holdout(source, test_idx, n_rows, data_dir, chunk_rows=SCAN_CHUNK_ROWS):
+    """Baris test ditulis per chunk ke folder kolumnar (float64, sama dengan CSV) untuk di-mmap worker"""
+    is_test = np.zeros(n_rows, dtype=bool)
+    is_test[test_idx] = True
+    names = FEATURE_COLUMNS + [LABEL_COLUMN]
+    outputs = {name: open(os.path.join(data_dir, f"{name}.raw"), "wb") for name in names}
+    start = 0
+    try:
+        for X, labels in iter_raw_chunks(source, chunk_rows):
+            mask = is_test[start:start + len(labels)]
+            for i, col in enumerate(FEATURE_COLUMNS):
+                np.ascontiguousarray(X[mask, i]).tofile(outputs[col])
+            label_codes(labels[mask]).tofile(outputs[LABEL_COLUMN])
+            start += len(labels)
+    finally:
+        for f in outputs.values():
+            f.close()
+    for col in FEATURE_COLUMNS:
+        finalize_npy(os.path.join(data_dir, f"{col}.raw"), os.path.join(data_dir, f"{col}.npy"),
+                     np.float64, len(test_idx))
+    finalize_npy(os.path.join(data_dir, f"{LABEL_COLUMN}.raw"), os.path.join(data_dir, CODES_FILE),
+                 np.int8, len(test_idx))
+
+
+def evaluate_holdout(args, pool, work_dir):
+    from pipeline_cache import PipelineCache
+
+    print("1. Menyiapkan test set (cache pipeline)...")
+    cache = PipelineCache(args.source)
+    data_dir = os.path.join(work_dir, "holdout")
+    os.makedirs(data_dir)
+    if os.path.isdir(cache.entry_path("split", cache.split_key)):
+        # Cache ada: test set mentah di-mmap, tidak ada dataset yang dibaca
+        split = cache.split()
+        n_rows, n_test = split["meta"]["rows"], len(split["test_idx"])
+        for col in FEATURE_COLUMNS:
+            np.save(os.path.join(data_dir, f"{col}.npy"), split["X_test"][col].to_numpy())
+        np.save(os.path.join(data_dir, CODES_FILE), label_codes(split["y_test"]))
+        source = "dari cache"
+    else:
+        # Tanpa cache: indeks test dari kolom label, fitur baris test ditulis per chunk
+        test_idx, n_rows = holdout_test_index(args.source, cache.split_params)
+        n_test = len(test_idx)
+        write_holdout(args.source, test_idx, n_rows, data_dir)
+        source = "dihitung per chunk"
+    print(f"   Total data: {n_rows}, data testing: {n_test} ({source})")
+
+    print(f"\n2. Skor {n_test} baris per {args.chunk_rows} di {args.jobs} proses...")
+    start = time.perf_counter()
+    tasks = chunk_tasks(n_test, os.path.abspath(args.model), os.path.abspath(args.scaler),
+                        data_dir, args.chunk_rows, args.bins, pool is not None)
+    stats = score_tasks(tasks, pool, 2 * args.jobs)
+    summary = summarize(stats)
+    print(f"   Selesai dalam {time.perf_counter() - start:.2f}s")
+    print_report(summary)
+    return {"mode": "holdout", "model": os.path.abspath(args.model), "summary": summary}
+
+
+# =====================================
+# KFOLD / HELD-OUT STATION: DATA PER FOLD
+# =====================================
+def is_partitioned(source):
+    return os.path.isfile(os.path.join(source, MANIFEST_NAME))
+
+
+def iter_labeled(source, chunk_rows=SCAN_CHUNK_ROWS):
+    """
+    (kolom fitur float32, kode label, nomor baris, indeks stasiun per baris) per chunk
+    bersih. Indeks stasiun = posisi di station_names(source); None jika tidak berpartisi.
+    """
+    if is_partitioned(source):
+        names = station_names(source)
+        row = 0
+        for chunk in iter_partition_chunks(source, chunk_rows, with_station=True):
+            columns, codes, _ = proses_chunk(chunk)
+            stations = chunk[STATION_COLUMN].array
+            lookup = np.searchsorted(names, stations.categories).astype(np.int16)
+            station = lookup[stations.codes[mask_baris(chunk)[0]]]
+            yield columns, codes, np.arange(row, row + len(codes)), station
+            row += len(codes)
+        return
+    for chunk in iter_dataset(source, chunk_rows):
+        clean = clean_chunk(chunk)
+        columns = {col: clean[col].to_numpy(dtype=np.float32) for col in FEATURE_COLUMNS}
+        yield columns, clean[LABEL_COLUMN].to_numpy(dtype=np.int8), clean.index.to_numpy(), None
+
+
+def fold_names(source, mode, n_folds):
+    if mode == "station":
+        if not is_partitioned(source):
+            raise ValueError(f"Mode station butuh dataset berpartisi hasil ingest_stations.py: {source}")
+        return station_names(source)
+    return [f"fold{i + 1}" for i in range(n_folds)]
+
+
+def prepare_folds(source, mode, n_folds, data_dir):
+    """
+    Tulis fitur, kode label dan nomor fold setiap baris ke folder kolumnar data_dir
+    (streaming per chunk). Mengembalikan meta: rows, groups (nama fold), label_counts.
+    """
+    groups = fold_names(source, mode, n_folds)
+    os.makedirs(data_dir)
+    names = FEATURE_COLUMNS + [LABEL_COLUMN, "groups"]
+    outputs = {name: open(os.path.join(data_dir, f"{name}.raw"), "wb") for name in names}
+    label_counts = np.zeros(len(CLASSES), dtype=np.int64)
+    rows = 0
+    try:
+        for columns, codes, row_numbers, station in iter_labeled(source):
+            for col in FEATURE_COLUMNS:
+                columns[col].astype(np.float32, copy=False).tofile(outputs[col])
+            codes.astype(np.int8, copy=False).tofile(outputs[LABEL_COLUMN])
+            if mode == "station":
+                fold = station
+            else:
+                fold = (row_uniform(row_numbers) * n_folds).astype(np.int16)
+            fold.tofile(outputs["groups"])
+            label_counts += np.bincount(codes, minlength=len(CLASSES))
+            rows += len(codes)
+    finally:
+        for f in outputs.values():
+            f.close()
+
+    for col in FEATURE_COLUMNS:
+        finalize_npy(os.path.join(data_dir, f"{col}.raw"), os.path.join(data_dir, f"{col}.npy"), np.float32, rows)
+    finalize_npy(os.path.join(data_dir, f"{LABEL_COLUMN}.raw"), os.path.join(data_dir, CODES_FILE), np.int8, rows)
+    finalize_npy(os.path.join(data_dir, "groups.raw"), os.path.join(data_dir, GROUPS_FILE), np.int16, rows)
+    return {"rows": rows, "groups": groups,
+            "label_counts": dict(zip(CLASSES.tolist(), label_counts.tolist()))}
+
+
+def train_fold(data_dir, codes, train_rows, params, jobs):
+    """Scaler + SMOTE + Random Forest dari baris train satu fold (resep train_model.py)"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import MinMaxScaler
+
+    y = np.asarray(codes[train_rows], dtype=np.intp)
+    if len(np.unique(y)) < len(CLASSES):
+        raise ValueError("Data training fold tidak memuat semua kelas: " + ", ".join(CLASSES))
+    scaler = MinMaxScaler()
+    X = scaler.fit_transform(read_rows(data_dir, train_rows))
+    X_res, y_res = balance_chunk(X, y, SEED)
+    del X
+    model = RandomForestClassifier(class_weight="balanced", random_state=SEED, n_jobs=jobs, **params)
+    model.fit(np.asarray(X_res, dtype=np.float32), CLASSES[y_res])
+    return model, scaler
+
+
+def evaluate_folds(args, pool, work_dir):
+    params = {
+        "n_estimators": args.n_estimators,
+        "max_depth": args.max_depth,
+        "min_samples_leaf": args.min_samples_leaf,
+        "max_features": FOREST_PARAMS["max_features"]
+    }
+    names = fold_names(args.source, args.mode, args.folds)
+    selected = args.only or names
+    unknown = sorted(set(selected) - set(names))
+    if unknown:
+        raise ValueError(f"Fold/stasiun tidak dikenal: {', '.join(unknown)} (tersedia: {', '.join(names)})")
+
+    print(f"1. Menyiapkan data {args.mode} dari {args.source}...")
+    data_dir = os.path.join(work_dir, "data")
+    meta = prepare_folds(args.source, args.mode, args.folds, data_dir)
+    print(f"   {meta['rows']} baris, {len(meta['groups'])} fold {meta['label_counts']}")
+
+    codes = np.load(os.path.join(data_dir, CODES_FILE), mmap_mode="r")
+    groups = np.load(os.path.join(data_dir, GROUPS_FILE), mmap_mode="r")
+
+    print(f"\n2. Training + skor per fold (parameter {params})...")
+    folds = []
+    total = None
+    for g, name in enumerate(meta["groups"]):
+        if name not in selected:
+            continue
+        test_rows = np.flatnonzero(groups == g)
+        if len(test_rows) == 0:
+            print(f"   ⚠️  {name}: tidak ada baris, dilewati")
+            continue
+        train_rows = np.flatnonzero(groups != g)
+
+        start = time.perf_counter()
+        model, scaler = train_fold(data_dir, codes, train_rows, params, args.jobs)
+        fold_dir = os.path.join(work_dir, name)
+        os.makedirs(fold_dir)
+        model_path = os.path.join(fold_dir, "model.npz")
+        scaler_path = os.path.join(fold_dir, "scaler.pkl")
+        export_forest(model, model_path)
+        joblib.dump(scaler, scaler_path)
+        del model
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tasks = chunk_tasks(test_rows, model_path, scaler_path, data_dir, args.chunk_rows, args.bins, pool is not None)
+        stats = score_tasks(tasks, pool, 2 * args.jobs)
+        score_seconds = time.perf_counter() - start
+        total = merge_stats(total, stats)
+        summary = summarize(stats)
+        print(f"   ✅ {name:<16} akurasi={summary['accuracy']:.4f} macro-F1={summary['macro_avg']['f1']:.4f} "
+              f"train={len(train_rows)} test={len(test_rows)} fit={fit_seconds:.1f}s skor={score_seconds:.1f}s")
+        folds.append({"fold": name, "train_rows": int(len(train_rows)), "fit_seconds": round(fit_seconds, 3),
+                      "score_seconds": round(score_seconds, 3), **summary})
+
+    if total is None:
+        raise ValueError("Tidak ada fold yang dievaluasi")
+    accuracies = np.array([fold["accuracy"] for fold in folds])
+    summary = summarize(total)
+    print(f"\n3. Gabungan {len(folds)} fold: akurasi per fold {accuracies.mean():.4f} ± {accuracies.std():.4f}")
+    print_report(summary)
+    return {
+        "mode": args.mode,
+        "source": os.path.abspath(args.source),
+        "params": params,
+        "label_counts": meta["label_counts"],
+        "accuracy_mean": float(accuracies.mean()),
+        "accuracy_std": float(accuracies.std()),
+        "folds": folds,
+        "summary": summary
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluasi model kualitas udara per chunk")
+    parser.add_argument("mode", nargs="?", default="holdout", choices=["holdout", "kfold", "station"])
+    parser.add_argument("--source", default=None,
+                        help="dataset (default: CSV final, mode station: beijing_gabungan.parts)")
+    parser.add_argument("--model", default=MODEL_PATH, help="model holdout (.pkl, .npz atau .rfc)")
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=EVAL_CHUNK_ROWS)
+    parser.add_argument("--bins", type=int, default=CALIBRATION_BINS, help="jumlah bin kalibrasi")
+    parser.add_argument("--folds", type=int, default=N_FOLDS)
+    parser.add_argument("--only", nargs="+", default=None,
+                        help="hanya fold/stasiun ini yang diuji (mis. fold1 atau Aotizhongxin)")
+    parser.add_argument("--n-estimators", type=int, default=FOREST_PARAMS["n_estimators"])
+    parser.add_argument("--max-depth", type=parse_max_depth, default=FOREST_PARAMS["max_depth"])
+    parser.add_argument("--min-samples-leaf", type=int, default=FOREST_PARAMS["min_samples_leaf"])
+    parser.add_argument("--output", default=None, help="simpan hasil evaluasi ke file JSON")
+    args = parser.parse_args(argv)
+    if args.source is None:
+        args.source = PARTS_PATH if args.mode == "station" else DATASET_PATH
+    args.jobs = max(1, args.jobs)
+
+    print(f"=== EVALUASI MODEL ({args.mode.upper()}) ===\n")
+    start = time.perf_counter()
+    work_dir = tempfile.mkdtemp(prefix="evaluate_model_")
+    pool = ProcessPoolExecutor(max_workers=args.jobs) if args.jobs > 1 else None
+    try:
+        if args.mode == "holdout":
+            result = evaluate_holdout(args, pool, work_dir)
+        else:
+            result = evaluate_folds(args, pool, work_dir)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    result["peak_rss_mb"] = peak_rss_mb()
+    print(f"\n⏱️  Total {result['seconds']}s, peak RSS {result['peak_rss_mb']} MB")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Hasil disimpan: {args.output}")
+    print("\n=== EVALUASI SELESAI ===")
+
+
+if __name__ == "__main__":
+    main()
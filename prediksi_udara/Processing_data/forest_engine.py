@@ -0,0 +1,643 @@
+"""
+Mesin inferensi Random Forest berbasis array (tanpa sklearn saat serving).
+
+Forest hasil training diekspor menjadi beberapa array NumPy yang bersebelahan:
+feature, threshold, children (kiri/kanan) dan nilai probabilitas di leaf.
+Semua pohon digabung dalam satu array node dan ditelusuri satu level
+kedalaman per iterasi: batch kecil untuk semua (baris, pohon) sekaligus,
+batch besar per pohon agar akses memori tetap lokal.
+
+Dengan --fold-scaler, MinMaxScaler dilipat ke threshold: karena scaling
+monoton per fitur, x_scaled <= t setara dengan x <= (t - min_) / scale_,
+sehingga forest bisa langsung menerima input mentah (°C, titik embun, mb, m/s).
+
+Batch besar (di atas SMALL_BATCH_ROWS) memakai tabel ranked_tables: threshold
+diganti rank-nya per fitur dan node dikemas dalam satu int64, sehingga setiap
+langkah traversal hanya dua gather. Contoh (100 pohon, kedalaman 15, input mentah,
+p50/p99, diukur di mesin 1 CPU dengan model n_jobs=2):
+    1 baris      sklearn 23,5 / 35 ms     flat 0,2 / 0,3 ms
+    10.000 baris sklearn 196 / 209 ms     flat 122 / 148 ms
+    50.000 baris sklearn 1010 / 1075 ms   flat 807 / 889 ms
+Di mesin multi-core sklearn menelusuri pohon secara paralel (n_jobs) sedangkan
+engine ini satu thread, jadi keunggulan batch besar di sana belum terverifikasi.
+CompactForest tetap memakai traversal per pohon (tanpa tabel tambahan) dan untuk
+batch besar setara atau lebih lambat dari sklearn karena dtype ringkasnya
+dikonversi di setiap langkah.
+
+Cara pakai:
+    python forest_engine.py export                 # pkl -> npz
+    python forest_engine.py export --fold-scaler   # pkl + scaler -> npz input mentah
+    python forest_engine.py verify [--fold-scaler] # cek kecocokan probabilitas + latency
+    python forest_engine.py export-compact [--fold-scaler] [--value-dtype float16]
+    python forest_engine.py verify --output model_kualitas_udara_beijing_v3.rfc
+    python forest_engine.py compare [--fold-scaler]  # ukuran, waktu muat, kecocokan vs pickle
+
+Format ringkas .rfc: node dalam dtype kecil (threshold float32, feature int16,
+probabilitas leaf float16/uint8) di satu file yang di-mmap. Memuat model hanya
+membaca header JSON, array dipakai langsung dari page cache tanpa disalin.
+"""
+import argparse
+import json
+import mmap
+import os
+import time
+
+import numpy as np
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.pkl")
+SCALER_PATH = os.path.join(CURRENT_DIR, "scaler_beijing_v3.pkl")
+DATASET_PATH = os.path.join(CURRENT_DIR, "dataset_kualitas_udara_beijing_final.csv")
+FLAT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.npz")
+RAW_FLAT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3_raw.npz")
+COMPACT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.rfc")
+RAW_COMPACT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3_raw.rfc")
+FEATURE_COLUMNS = ["suhu", "kelembapan", "tekanan", "kecepatan_angin"]
+
+# Jumlah baris per blok evaluasi, membatasi ukuran array kerja
+CHUNK_ROWS = 65536
+# Sampai ukuran ini semua pohon ditelusuri bersamaan (overhead Python paling kecil),
+# di atasnya pohon ditelusuri satu per satu (akses memori lebih lokal)
+SMALL_BATCH_ROWS = 512
+
+
+def fold_thresholds(threshold, feature, scaler):
+    """
+    Memetakan threshold ruang ter-scale ke satuan asli.
+
+    sklearn membandingkan float32(x * scale_ + min_) <= t. Nilai float32 terbesar
+    v <= t dicari dulu, lalu batas pembulatannya m (titik tengah v dan float32
+    berikutnya): float32(y) <= v  <=>  y < m. Karena scaling monoton (scale_ > 0),
+    x * scale_ + min_ <= m  <=>  x <= (m - min_) / scale_.
+    """
+    v = threshold.astype(np.float32)
+    v = np.where(v > threshold, np.nextafter(v, np.float32(-np.inf)), v)
+    upper = np.nextafter(v, np.float32(np.inf))
+    boundary = (v.astype(np.float64) + upper.astype(np.float64)) / 2
+    return (boundary - scaler.min_[feature]) / scaler.scale_[feature]
+
+
+def flatten_forest(model, scaler=None):
+    """
+    Menggabungkan semua pohon RandomForestClassifier menjadi array datar.
+    Leaf dibuat menunjuk ke dirinya sendiri (kiri = kanan = leaf) sehingga
+    traversal cukup diulang sebanyak max_depth tanpa pengecekan leaf.
+    Jika scaler (MinMaxScaler) diberikan, threshold dikembalikan ke satuan asli.
+    DecisionTreeClassifier tunggal (mis. hasil distilasi) dianggap forest satu pohon.
+    """
+    n_classes = len(model.classes_)
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for estimator in getattr(model, "estimators_", [model]):
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        node_ids = np.arange(n_nodes)
+        is_leaf = tree.children_left == -1
+
+        left = np.where(is_leaf, node_ids, tree.children_left) + offset
+        right = np.where(is_leaf, node_ids, tree.children_right) + offset
+        feature = np.where(is_leaf, 0, tree.feature)
+        threshold = np.where(is_leaf, np.inf, tree.threshold)
+
+        # Probabilitas per leaf (dinormalisasi seperti predict_proba sklearn)
+        value = tree.value[:, 0, :n_classes].astype(np.float64)
+        total = value.sum(axis=1, keepdims=True)
+        total[total == 0] = 1.0
+        value = value / total
+
+        features.append(feature)
+        thresholds.append(threshold)
+        lefts.append(left)
+        rights.append(right)
+        values.append(value)
+        roots.append(offset)
+
+        offset += n_nodes
+        max_depth = max(max_depth, tree.max_depth)
+
+    feature = np.concatenate(features).astype(np.int32)
+    threshold = np.concatenate(thresholds).astype(np.float64)
+    if scaler is not None:
+        threshold = fold_thresholds(threshold, feature, scaler)
+
+    return {
+        "feature": feature,
+        "threshold": threshold,
+        "left": np.concatenate(lefts).astype(np.int32),
+        "right": np.concatenate(rights).astype(np.int32),
+        "value": np.concatenate(values),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "classes": np.asarray(model.classes_).astype(str),
+        "max_depth": np.int32(max_depth),
+        "n_features": np.int32(model.n_features_in_),
+        "scaler_folded": np.bool_(scaler is not None),
+    }
+
+
+def ranked_tables(feature, threshold, children, roots, n_features):
+    """
+    Tabel traversal batch besar dengan dua gather per langkah.
+
+    - Threshold diganti rank-nya di antara threshold unik fitur yang sama:
+      x > T[k]  <=>  rank(x) > k, dengan rank(x) = jumlah threshold < x
+      (searchsorted sekali per fitur untuk seluruh batch), jadi hasilnya identik.
+    - Node tiap pohon dinomori ulang per level (BFS) sehingga anak kanan selalu
+      anak kiri + 1: cukup simpan anak kiri, anak berikutnya = kiri + (x > t).
+    - Fitur, anak kiri dan rank threshold dikemas dalam satu int64 dengan rank
+      di bit teratas, sehingga perbandingan rank cukup (rank << shift) > record.
+
+    Mengembalikan None jika field tidak muat dalam 63 bit.
+    """
+    n_nodes = len(feature)
+    node_ids = np.arange(n_nodes)
+    left, right = children[0::2].astype(np.intp), children[1::2].astype(np.intp)
+    internal = left != node_ids
+
+    thresholds = [np.unique(threshold[internal & (feature == f)]) for f in range(n_features)]
+    leaf_rank = max(len(values) for values in thresholds)
+    feature_bits = max(1, (n_features - 1).bit_length())
+    child_bits = max(1, n_nodes.bit_length())
+    shift = feature_bits + child_bits
+    if shift + leaf_rank.bit_length() > 63:
+        return None
+
+    # Urutan BFS per pohon (node pohon tetap bersebelahan di memori)
+    order = []
+    for root in roots:
+        frontier = np.asarray([root], dtype=np.intp)
+        while frontier.size:
+            order.append(frontier)
+            frontier = frontier[internal[frontier]]
+            frontier = np.column_stack([left[frontier], right[frontier]]).ravel()
+    order = np.concatenate(order)
+    new_id = np.empty(n_nodes, dtype=np.int64)
+    new_id[order] = np.arange(n_nodes)
+
+    # Leaf: anak = dirinya sendiri dan rank maksimum (tidak pernah ke kanan)
+    node_feature = np.where(internal, feature, 0).astype(np.int64)[order]
+    child = np.where(internal[order], new_id[left[order]], np.arange(n_nodes))
+    rank = np.full(n_nodes, leaf_rank, dtype=np.int64)
+    for f, values in enumerate(thresholds):
+        mask = internal[order] & (node_feature == f)
+        rank[mask] = np.searchsorted(values, threshold[order][mask])
+
+    return {
+        "packed": node_feature | (child << feature_bits) | (rank << shift),
+        "node_ids": order.astype(np.int64),
+        "roots": new_id[np.asarray(roots, dtype=np.intp)],
+        "thresholds": thresholds,
+        "shift": shift,
+        "feature_bits": feature_bits,
+        "feature_mask": (1 << feature_bits) - 1,
+        "child_mask": (1 << child_bits) - 1
+    }
+
+
+def export_forest(model, path=FLAT_MODEL_PATH, scaler=None):
+    """Menyimpan forest dalam format array datar (.npz tanpa pickle)"""
+    arrays = flatten_forest(model, scaler)
+    np.savez(path, **arrays)
+    return arrays
+
+
+class FlatForest:
+    """
+    Evaluator forest hanya dengan NumPy (angka latency di docstring modul).
+    Menyediakan classes_, predict_proba dan predict seperti RandomForestClassifier
+    sehingga bisa dipakai langsung oleh api_predict.py.
+    """
+
+    def __init__(self, arrays):
+        self.feature = np.ascontiguousarray(arrays["feature"], dtype=np.intp)
+        self.threshold = np.ascontiguousarray(arrays["threshold"], dtype=np.float64)
+        # children[2*node] = kiri, children[2*node + 1] = kanan,
+        # sehingga langkah berikutnya cukup satu gather: children[2*node + (x > t)]
+        self.children = np.stack([arrays["left"], arrays["right"]], axis=1).astype(np.intp).ravel()
+        self.value = np.ascontiguousarray(arrays["value"], dtype=np.float64)
+        self.roots = np.ascontiguousarray(arrays["roots"], dtype=np.intp)
+        self.classes_ = np.asarray(arrays["classes"], dtype=object)
+        self.max_depth = int(arrays["max_depth"])
+        self.n_features_in_ = int(arrays["n_features"])
+        self.n_estimators = len(self.roots)
+        # True jika threshold sudah dalam satuan asli (tidak perlu scaler.transform)
+        self.scaler_folded = bool(arrays.get("scaler_folded", False))
+        self._ranked_cache = None
+
+    @classmethod
+    def load(cls, path=FLAT_MODEL_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def _step(self, X_flat, offsets, nodes):
+        """Satu level traversal; X_flat adalah input kolom-mayor yang diratakan"""
+        go_right = X_flat[self.feature[nodes] * offsets[0] + offsets[1]] > self.threshold[nodes]
+        return self.children[2 * nodes + go_right]
+
+    def _proba_all_trees(self, X_flat, n_rows):
+        """Batch kecil: semua (baris, pohon) ditelusuri bersamaan"""
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_estimators)).copy()
+        for _ in range(self.max_depth):
+            nodes = self._step(X_flat, (n_rows, rows), nodes)
+        return self.value[nodes].mean(axis=1)
+
+    def prepare(self):
+        """Bangun tabel batch besar sekarang (warm-up / sebelum fork), bukan di request pertama"""
+        self._ranked()
+
+    def _ranked(self):
+        """Tabel traversal batch besar (lihat ranked_tables), dibangun saat pertama dipakai"""
+        if self._ranked_cache is None:
+            self._ranked_cache = ranked_tables(
+                self.feature, self.threshold, self.children, self.roots, self.n_features_in_
+            ) or False
+        return self._ranked_cache
+
+    def _proba_ranked(self, X_flat, n_rows, tables):
+        """
+        Batch besar dengan tabel ranked_tables: per langkah hanya dua gather
+        (record node + rank input) alih-alih empat (fitur, input, threshold, anak).
+        """
+        shift = tables["shift"]
+        # Rank input per fitur (baris-mayor), digeser ke posisi field rank di record
+        ranks = np.empty((n_rows, self.n_features_in_), dtype=np.int64)
+        for f, values in enumerate(tables["thresholds"]):
+            column = X_flat[f * n_rows:(f + 1) * n_rows]
+            ranks[:, f] = np.searchsorted(values, column, side="left")
+            # NaN tidak pernah > threshold: selalu ke kiri seperti traversal biasa
+            ranks[np.isnan(column), f] = 0
+        ranks <<= shift
+        ranks = ranks.ravel()
+        row_base = np.arange(n_rows, dtype=np.int64) * self.n_features_in_
+
+        packed, node_ids = tables["packed"], tables["node_ids"]
+        feature_mask, child_mask, feature_bits = tables["feature_mask"], tables["child_mask"], tables["feature_bits"]
+        record = np.empty(n_rows, dtype=np.int64)
+        index = np.empty(n_rows, dtype=np.int64)
+        go_right = np.empty(n_rows, dtype=bool)
+        proba = np.zeros((n_rows, len(self.classes_)), dtype=np.float64)
+        for root in tables["roots"]:
+            nodes = np.full(n_rows, root, dtype=np.int64)
+            for _ in range(self.max_depth):
+                np.take(packed, nodes, out=record)
+                np.bitwise_and(record, feature_mask, out=index)
+                np.add(index, row_base, out=index)
+                np.take(ranks, index, out=index)
+                np.greater(index, record, out=go_right)
+                np.right_shift(record, feature_bits, out=nodes)
+                np.bitwise_and(nodes, child_mask, out=nodes)
+                np.add(nodes, go_right, out=nodes)
+            proba += self.value[node_ids[nodes]]
+        return proba / self.n_estimators
+
+    def _proba_per_tree(self, X_flat, n_rows):
+        """Batch besar: pohon satu per satu agar node satu pohon tetap di cache"""
+        rows = np.arange(n_rows)
+        proba = np.zeros((n_rows, len(self.classes_)), dtype=np.float64)
+        for root in self.roots:
+            nodes = np.full(n_rows, root, dtype=np.intp)
+            for _ in range(self.max_depth):
+                nodes = self._step(X_flat, (n_rows, rows), nodes)
+            proba += self.value[nodes]
+        return proba / self.n_estimators
+
+    def predict_proba(self, X):
+        # sklearn membandingkan input ter-scale dalam float32, ikuti agar hasil identik.
+        # Forest input mentah dibandingkan langsung dalam float64 (tanpa salinan).
+        X = np.asarray(X, dtype=np.float64 if self.scaler_folded else np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        proba = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            n_rows = chunk.shape[0]
+            X_flat = np.ascontiguousarray(chunk.T, dtype=np.float64).ravel()
+            if n_rows <= SMALL_BATCH_ROWS:
+                proba[start:start + n_rows] = self._proba_all_trees(X_flat, n_rows)
+            elif self._ranked():
+                proba[start:start + n_rows] = self._proba_ranked(X_flat, n_rows, self._ranked())
+            else:
+                proba[start:start + n_rows] = self._proba_per_tree(X_flat, n_rows)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+# =====================================
+# FORMAT RINGKAS (.rfc, DI-MMAP TANPA SALINAN)
+# =====================================
+# Container satu file: magic, panjang header (uint64), header JSON, lalu setiap
+# array mentah dengan offset kelipatan ALIGN. Loader cukup mmap file lalu
+# membuat view np.frombuffer per array: tidak ada unpickle maupun salinan,
+# page dibaca OS saat dipakai dan dibagi antar proses worker.
+CONTAINER_MAGIC = b"RFCOMPACT1\n"
+ALIGN = 64
+
+# Presisi per node: feature int16, threshold float32, anak kiri/kanan int32,
+# probabilitas leaf float16 atau uint8 (p * 255, lebih kecil tapi sedikit kurang presisi)
+VALUE_DTYPES = {"uint8": 255.0, "float16": 1.0}
+
+
+def floor_float32(values):
+    """
+    float32 terbesar yang <= nilai. Untuk input float32 (sklearn membandingkan
+    X float32 dengan threshold), x <= t setara dengan x <= floor_float32(t).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    too_big = rounded.astype(np.float64) > values
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+def compact_arrays(arrays, value_dtype="float16"):
+    """Array hasil flatten_forest -> array presisi rendah untuk container .rfc"""
+    if value_dtype not in VALUE_DTYPES:
+        raise ValueError(f"value_dtype harus salah satu dari {list(VALUE_DTYPES)}")
+    scale = VALUE_DTYPES[value_dtype]
+    value = arrays["value"] * scale
+    if value_dtype == "uint8":
+        value = np.rint(value)
+    # Input ter-scale dibandingkan sklearn dalam float32, jadi threshold float32
+    # (dibulatkan ke bawah) hasilnya identik. Forest dengan scaler dilipat
+    # menerima input mentah float64, threshold-nya tetap float64.
+    folded = bool(arrays["scaler_folded"])
+    return {
+        "feature": arrays["feature"].astype(np.int16),
+        "threshold": arrays["threshold"].astype(np.float64) if folded else floor_float32(arrays["threshold"]),
+        "children": np.stack([arrays["left"], arrays["right"]], axis=1).astype(np.int32).ravel(),
+        "value": value.astype(value_dtype),
+        "roots": arrays["roots"].astype(np.int32)
+    }, {
+        "classes": [str(c) for c in arrays["classes"]],
+        "max_depth": int(arrays["max_depth"]),
+        "n_features": int(arrays["n_features"]),
+        "scaler_folded": bool(arrays["scaler_folded"]),
+        "value_scale": scale
+    }
+
+
+def write_container(path, arrays, attrs):
+    """Tulis array + atribut ke container .rfc (atomik)"""
+    entries = {}
+    offset = 0
+    for name, values in arrays.items():
+        values = np.ascontiguousarray(values)
+        offset = -(-offset // ALIGN) * ALIGN
+        entries[name] = {"dtype": values.dtype.str, "shape": list(values.shape), "offset": offset}
+        offset += values.nbytes
+    header = json.dumps({"attrs": attrs, "arrays": entries}).encode("utf-8")
+    data_start = -(-(len(CONTAINER_MAGIC) + 8 + len(header)) // ALIGN) * ALIGN
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(CONTAINER_MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for name, values in arrays.items():
+            f.seek(data_start + entries[name]["offset"])
+            f.write(np.ascontiguousarray(values).tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_container(path):
+    """(dict array view read-only di atas mmap, atribut). Tidak ada data yang disalin."""
+    with open(path, "rb") as f:
+        if f.read(len(CONTAINER_MAGIC)) != CONTAINER_MAGIC:
+            raise ValueError(f"Bukan file forest ringkas: {path}")
+        header_len = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(header_len))
+        # mmap tetap valid setelah file ditutup
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    data_start = -(-(len(CONTAINER_MAGIC) + 8 + header_len) // ALIGN) * ALIGN
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"]))
+        arrays[name] = np.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + entry["offset"]
+        ).reshape(entry["shape"])
+    return arrays, header["attrs"]
+
+
+def export_compact(model, path=COMPACT_MODEL_PATH, scaler=None, value_dtype="float16"):
+    """Ekspor forest ke container .rfc (opsional scaler dilipat), kembalikan (array, atribut)"""
+    arrays, attrs = compact_arrays(flatten_forest(model, scaler), value_dtype)
+    write_container(path, arrays, attrs)
+    return arrays, attrs
+
+
+class CompactForest(FlatForest):
+    """
+    FlatForest di atas container .rfc: array dipakai langsung dari mmap
+    (dtype ringkas, tanpa konversi), jadi memuat model hanya membaca header.
+    """
+
+    def __init__(self, arrays, attrs, path=None):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.children = arrays["children"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.classes_ = np.asarray(attrs["classes"], dtype=object)
+        self.max_depth = int(attrs["max_depth"])
+        self.n_features_in_ = int(attrs["n_features"])
+        self.n_estimators = len(self.roots)
+        self.scaler_folded = bool(attrs["scaler_folded"])
+        self.path = path
+        # Tabel ranked_tables berisi salinan int64 + indeks penuh, bertentangan
+        # dengan tujuan format ringkas; batch besar memakai traversal per pohon
+        self._ranked_cache = False
+
+    @classmethod
+    def load(cls, path=COMPACT_MODEL_PATH):
+        arrays, attrs = read_container(path)
+        return cls(arrays, attrs, path)
+
+    def _step(self, X_flat, offsets, nodes):
+        # feature int16 dikali jumlah baris bisa overflow, naikkan ke intp dulu
+        feature = self.feature[nodes].astype(np.intp)
+        go_right = X_flat[feature * offsets[0] + offsets[1]] > self.threshold[nodes]
+        return self.children[2 * nodes + go_right]
+
+    def _proba_all_trees(self, X_flat, n_rows):
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_estimators)).copy()
+        for _ in range(self.max_depth):
+            nodes = self._step(X_flat, (n_rows, rows), nodes)
+        # Rata-rata dalam float64 (mean float16 menghasilkan float16)
+        return self.value[nodes].mean(axis=1, dtype=np.float64)
+
+    def predict_proba(self, X):
+        proba = super().predict_proba(X)
+        # Nilai leaf terkuantisasi: normalisasi ulang agar total per baris tepat 1
+        total = proba.sum(axis=1, keepdims=True)
+        total[total == 0] = 1.0
+        return proba / total
+
+
+def load_forest(path):
+    """FlatForest (.npz) atau CompactForest (.rfc) sesuai ekstensi file"""
+    return CompactForest.load(path) if path.endswith(".rfc") else FlatForest.load(path)
+
+
+def _latency_ms(func, X, repeat):
+    """Mengukur p50/p99 latency (ms) dari func(X)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def verify(model, scaler, flat, X, repeat=200):
+    """
+    Membandingkan probabilitas dan latency sklearn vs FlatForest.
+    X adalah input mentah; latency diukur termasuk scaler.transform
+    kecuali untuk forest yang scaler-nya sudah dilipat.
+    """
+    def score_sklearn(batch):
+        return model.predict_proba(scaler.transform(batch))
+
+    def score_flat(batch):
+        if flat.scaler_folded:
+            return flat.predict_proba(batch)
+        return flat.predict_proba(scaler.transform(batch))
+
+    proba_sklearn = score_sklearn(X)
+    proba_flat = score_flat(X)
+    max_diff = float(np.abs(proba_sklearn - proba_flat).max())
+    agreement = float((proba_sklearn.argmax(axis=1) == proba_flat.argmax(axis=1)).mean())
+    print(f"   Selisih probabilitas maksimum: {max_diff:.2e}")
+    print(f"   Kecocokan label: {agreement*100:.2f}%")
+
+    for batch_size, n_repeat in [(1, repeat), (min(len(X), 10000), max(repeat // 20, 5))]:
+        batch = X[:batch_size]
+        p50_sk, p99_sk = _latency_ms(score_sklearn, batch, n_repeat)
+        p50_fl, p99_fl = _latency_ms(score_flat, batch, n_repeat)
+        print(f"   Batch {batch_size:>5}: sklearn p50={p50_sk:.3f}ms p99={p99_sk:.3f}ms | "
+              f"flat p50={p50_fl:.3f}ms p99={p99_fl:.3f}ms")
+    return max_diff
+
+
+def _median_seconds(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def compare_artifacts(model_path, scaler, X, fold_scaler=False, repeat=5):
+    """
+    Bandingkan pickle sklearn vs .npz vs .rfc (uint8 & float16): ukuran file,
+    waktu muat (+ prediksi pertama) dan kecocokan prediksi terhadap pickle.
+    Artefak pembanding diekspor ulang dari pickle ke folder sementara.
+    """
+    import shutil
+    import tempfile
+
+    import joblib
+
+    load_pickle = lambda: joblib.load(model_path)  # noqa: E731
+    pickle_seconds, model = _median_seconds(load_pickle, repeat)
+    X_model = X if fold_scaler else scaler.transform(X)
+    X_scaled = scaler.transform(X)
+    reference = model.predict_proba(X_scaled)
+
+    tmp_dir = tempfile.mkdtemp(prefix="forest_compare_")
+    try:
+        variants = [("pickle (sklearn)", model_path, load_pickle, X_scaled)]
+        npz_path = os.path.join(tmp_dir, "model.npz")
+        export_forest(model, npz_path, scaler if fold_scaler else None)
+        variants.append(("npz (flat)", npz_path, lambda: FlatForest.load(npz_path), X_model))
+        for value_dtype in VALUE_DTYPES:
+            rfc_path = os.path.join(tmp_dir, f"model_{value_dtype}.rfc")
+            export_compact(model, rfc_path, scaler if fold_scaler else None, value_dtype)
+            variants.append((f"rfc ({value_dtype})", rfc_path,
+                             lambda p=rfc_path: CompactForest.load(p), X_model))
+
+        results = []
+        for name, path, loader, X_input in variants:
+            seconds, loaded = (pickle_seconds, model) if loader is load_pickle else _median_seconds(loader, repeat)
+            first_seconds, _ = _median_seconds(lambda: loader().predict_proba(X_input[:1]), repeat)
+            proba = loaded.predict_proba(X_input)
+            results.append({
+                "artefak": name,
+                "size_mb": os.path.getsize(path) / 2**20,
+                "load_ms": seconds * 1000,
+                "first_predict_ms": first_seconds * 1000,
+                "agreement": float((proba.argmax(axis=1) == reference.argmax(axis=1)).mean()),
+                "max_diff": float(np.abs(proba - reference).max())
+            })
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ekspor & verifikasi forest format array")
+    parser.add_argument("command", choices=["export", "export-compact", "verify", "compare"])
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--fold-scaler", action="store_true",
+                        help="lipat MinMaxScaler ke threshold (forest menerima input mentah)")
+    parser.add_argument("--value-dtype", choices=list(VALUE_DTYPES), default="float16",
+                        help="tipe probabilitas leaf untuk format ringkas .rfc")
+    parser.add_argument("--rows", type=int, default=100000, help="baris dataset untuk compare")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    if args.output is None:
+        if args.command == "export-compact":
+            args.output = RAW_COMPACT_MODEL_PATH if args.fold_scaler else COMPACT_MODEL_PATH
+        else:
+            args.output = RAW_FLAT_MODEL_PATH if args.fold_scaler else FLAT_MODEL_PATH
+
+    import joblib
+
+    scaler = joblib.load(args.scaler)
+
+    if args.command == "compare":
+        import pandas as pd
+
+        X = pd.read_csv(DATASET_PATH, usecols=FEATURE_COLUMNS, nrows=args.rows)[FEATURE_COLUMNS].to_numpy()
+        print("=== PERBANDINGAN ARTEFAK MODEL ===")
+        print(f"   {len(X)} baris, input: {'mentah (scaler dilipat)' if args.fold_scaler else 'ter-scale'}\n")
+        print(f"   {'Artefak':<18} {'Ukuran':>10} {'Muat':>11} {'Muat+prediksi':>14} {'Cocok':>9} {'Selisih maks':>13}")
+        for r in compare_artifacts(args.model, scaler, X, args.fold_scaler):
+            print(f"   {r['artefak']:<18} {r['size_mb']:>8.2f}MB {r['load_ms']:>9.2f}ms "
+                  f"{r['first_predict_ms']:>12.2f}ms {r['agreement']*100:>8.3f}% {r['max_diff']:>13.2e}")
+        return
+
+    model = joblib.load(args.model)
+
+    if args.command in ("export", "export-compact"):
+        if args.command == "export":
+            arrays = export_forest(model, args.output, scaler if args.fold_scaler else None)
+            depth = int(arrays["max_depth"])
+        else:
+            arrays, attrs = export_compact(model, args.output, scaler if args.fold_scaler else None, args.value_dtype)
+            depth = attrs["max_depth"]
+        print(f"✅ Forest diekspor: {args.output} ({os.path.getsize(args.output) / 2**20:.2f} MB)")
+        print(f"   Pohon: {len(arrays['roots'])}, node: {len(arrays['feature'])}, "
+              f"kedalaman maks: {depth}, "
+              f"input: {'mentah (scaler dilipat)' if args.fold_scaler else 'ter-scale'}")
+        return
+
+    import pandas as pd
+
+    flat = load_forest(args.output)
+    df = pd.read_csv(DATASET_PATH, usecols=FEATURE_COLUMNS)
+    X = df[FEATURE_COLUMNS].to_numpy()[:10000]
+    print("=== VERIFIKASI FOREST FORMAT ARRAY ===")
+    verify(model, scaler, flat, X, repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""
+Konfigurasi gunicorn (opsional) untuk API Prediksi Kualitas Udara.
+
+    gunicorn -c gunicorn.conf.py api_predict:app
+
+preload_app memuat model, scaler dan dataset sekali di proses master,
+worker hasil fork berbagi page memori tersebut secara copy-on-write.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("API_WORKERS", os.cpu_count() or 1))
+preload_app = True
+
+
+def when_ready(server):
+    # Model dimuat di thread latar belakang dan thread tidak ikut ter-fork:
+    # tunggu model + dataset selesai dimuat sebelum worker dibuat
+    import api_predict
+
+    api_predict.preload()
+    # Bekukan objek hasil preload agar GC worker tidak memicu copy-on-write
+    gc.collect()
+    gc.freeze()
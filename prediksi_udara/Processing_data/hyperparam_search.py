@@ -0,0 +1,402 @@
+"""
+Pencarian hyperparameter Random Forest yang memakai ulang pekerjaan antar konfigurasi.
+
+- Split train-test, MinMaxScaler dan SMOTE dihitung SEKALI (cache pipeline,
+  lihat pipeline_cache.py). Matriks .npy hasilnya dibuka setiap worker dengan
+  mmap (page cache dipakai bersama, tidak ada salinan/pickle per trial).
+- Konfigurasi dengan max_depth, min_samples_leaf dan max_features yang sama
+  dijalankan dalam satu worker: forest ditumbuhkan bertahap dengan warm_start
+  (50 -> 100 -> 200 -> 400 pohon hanya melatih pohon tambahannya). Dengan
+  random_state yang sama hasilnya identik dengan training dari nol.
+- Worker berjalan paralel selama total estimasi memorinya masih di bawah
+  --memory-budget-mb; grup yang tidak muat menunggu grup lain selesai.
+- Setiap trial diukur: akurasi test set, latency batch 1 forest format array
+  (engine flat_raw di API) dan ukuran artefaknya. Hasil akhirnya Pareto front
+  akurasi / latency / ukuran model.
+
+Latency diukur di dalam worker; dengan --jobs > 1 worker berbagi CPU sehingga
+angkanya lebih cocok dibandingkan relatif antar trial.
+
+Cara pakai:
+    python hyperparam_search.py                                   # grid default
+    python hyperparam_search.py --random 12 --jobs 2 --memory-budget-mb 3000
+    python hyperparam_search.py --n-estimators 100 200 400 --max-depth 15 18 \\
+        --min-samples-leaf 2 4 --max-features sqrt none --output search.json
+    python hyperparam_search.py --source dataset_beijing_v3.npycache    # training set V3
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import joblib
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from dataset_loader import FEATURE_COLUMNS
+from forest_engine import FlatForest, flatten_forest
+from pipeline_cache import PipelineCache
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(CURRENT_DIR, "dataset_kualitas_udara_beijing_final.csv")
+
+SEED = 42
+
+# Grid default: mencakup konfigurasi train_model.py (100/15/4) dan
+# beijing_optimasi_v3.py (400/18/2)
+DEFAULT_GRID = {
+    "n_estimators": [50, 100, 200, 400],
+    "max_depth": [12, 15, 18],
+    "min_samples_leaf": [2, 4],
+    "max_features": ["sqrt", None]
+}
+
+MEMORY_BUDGET_MB = float(os.environ.get("SEARCH_MEMORY_BUDGET_MB", "2048"))
+LATENCY_REPEAT = 200
+
+# Perkiraan memori worker untuk penjadwalan (sengaja konservatif):
+# node sklearn (struct 64 byte + value 3 kelas) + array datar saat ukur latency
+NODE_BYTES = 200
+# Buffer training per baris (indeks sampel, sample_weight, nilai fitur terurut)
+SAMPLE_BYTES = 40
+# Interpreter + numpy + sklearn yang sudah diimport
+WORKER_BASE_MB = 200
+# Bootstrap: rata-rata ~63% baris unik per pohon, batas atas jumlah leaf
+BOOTSTRAP_UNIQUE = 0.632
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: byte
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def parse_max_depth(value):
+    return None if value.lower() == "none" else int(value)
+
+
+def parse_max_features(value):
+    """'sqrt' / 'log2' / 'none' / int (jumlah fitur) / float (fraksi fitur)"""
+    if value.lower() == "none":
+        return None
+    if value in ("sqrt", "log2"):
+        return value
+    return float(value) if "." in value else int(value)
+
+
+# =====================================
+# DATA (DIHITUNG SEKALI, CACHE PIPELINE)
+# =====================================
+def prepare_data(source):
+    """
+    Split + scaler + SMOTE seperti train_model.py lewat pipeline_cache.py.
+    Mengembalikan path artefak (.npy/.pkl) + ringkasan data.
+    """
+    start = time.perf_counter()
+    cache = PipelineCache(source)
+    split = cache.split()
+    resampled = cache.resampled()
+    paths = cache.paths()
+    data_bytes = sum(os.path.getsize(paths[name]) for name in ("X_train", "y_train", "X_test", "y_test"))
+    return paths, {
+        "rows": split["meta"]["rows"],
+        "train_rows": int(len(split["train_idx"])),
+        "train_rows_resampled": int(len(resampled["X_train"])),
+        "test_rows": int(len(split["test_idx"])),
+        "data_mb": round(data_bytes / 2**20, 1),
+        "cache_hit": bool(split["hit"] and resampled["hit"]),
+        "seconds": round(time.perf_counter() - start, 2)
+    }
+
+
+# =====================================
+# KONFIGURASI
+# =====================================
+def expand_configs(grid, n_random=None, seed=SEED):
+    """Semua kombinasi grid, atau n_random kombinasi acak (tanpa duplikat)"""
+    keys = list(grid)
+    configs = [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+    if n_random:
+        configs = random.Random(seed).sample(configs, min(n_random, len(configs)))
+    return configs
+
+
+def group_configs(configs):
+    """
+    Gabungkan konfigurasi yang hanya berbeda n_estimators menjadi satu grup:
+    satu forest warm_start ditumbuhkan melewati semua n_estimators-nya.
+    """
+    groups = {}
+    for config in configs:
+        params = {key: value for key, value in config.items() if key != "n_estimators"}
+        key = tuple(sorted((k, str(v)) for k, v in params.items()))
+        group = groups.setdefault(key, {"params": params, "n_estimators": set()})
+        group["n_estimators"].add(int(config["n_estimators"]))
+    for group in groups.values():
+        group["n_estimators"] = sorted(group["n_estimators"])
+    return list(groups.values())
+
+
+def estimate_forest_mb(n_trees, train_rows, max_depth, min_samples_leaf):
+    """Batas atas memori forest sklearn (+ array datarnya) yang dilatih pada train_rows baris"""
+    leaves = train_rows * BOOTSTRAP_UNIQUE / min_samples_leaf
+    if max_depth is not None:
+        leaves = min(leaves, 2 ** max_depth)
+    nodes_per_tree = 2 * leaves - 1
+    return n_trees * nodes_per_tree * NODE_BYTES / 2**20
+
+
+def estimate_group_mb(group, train_rows):
+    """Batas atas memori worker untuk forest terbesar di grup"""
+    params = group["params"]
+    model_mb = estimate_forest_mb(max(group["n_estimators"]), train_rows,
+                                  params["max_depth"], params["min_samples_leaf"])
+    return WORKER_BASE_MB + model_mb + train_rows * SAMPLE_BYTES / 2**20
+
+
+def trial_id(n_estimators, params):
+    return (f"n{n_estimators}_d{params['max_depth']}_l{params['min_samples_leaf']}"
+            f"_f{params['max_features']}")
+
+
+# =====================================
+# WORKER
+# =====================================
+def evaluate(model, scaler, X_test, X_test_raw, y_test, latency_repeat):
+    """Akurasi, latency batch 1 (forest array, scaler dilipat) dan ukuran artefak"""
+    from sklearn.metrics import f1_score
+
+    proba = model.predict_proba(X_test)
+    y_pred = model.classes_[np.argmax(proba, axis=1)]
+
+    # Artefak yang sama dengan MODEL_ENGINE=flat_raw di API (input mentah)
+    arrays = flatten_forest(model, scaler)
+    flat = FlatForest(arrays)
+    rows = np.asarray(X_test_raw[:latency_repeat])
+    flat.predict_proba(rows[:1])
+    timings = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        flat.predict_proba(rows[i:i + 1])
+        timings.append(time.perf_counter() - start)
+    timings = np.asarray(timings) * 1000
+
+    return {
+        "accuracy": round(float(np.mean(y_pred == y_test)), 5),
+        "f1_macro": round(float(f1_score(y_test, y_pred, average="macro")), 5),
+        "latency_p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "latency_p99_ms": round(float(np.percentile(timings, 99)), 4),
+        "size_bytes": int(sum(a.nbytes for a in arrays.values())),
+        "nodes": int(len(arrays["feature"]))
+    }
+
+
+def run_group(group, data_paths, latency_repeat=LATENCY_REPEAT):
+    """
+    Latih satu grup konfigurasi dengan warm_start dan evaluasi setiap tahap.
+    Data dibuka dengan mmap, forest memakai n_jobs=1 (paralelisme di level worker).
+    """
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+
+    X_train = np.load(data_paths["X_train"], mmap_mode="r")
+    y_train = np.load(data_paths["y_train"], mmap_mode="r")
+    X_test_raw = np.load(data_paths["X_test"], mmap_mode="r")
+    y_test = np.load(data_paths["y_test"], mmap_mode="r")
+    scaler = joblib.load(data_paths["scaler"])
+    X_test = scaler.transform(pd.DataFrame(X_test_raw, columns=FEATURE_COLUMNS))
+
+    model = RandomForestClassifier(
+        warm_start=True,
+        class_weight="balanced",
+        random_state=SEED,
+        n_jobs=1,
+        **group["params"]
+    )
+    results = []
+    fit_total = 0.0
+    for n_estimators in group["n_estimators"]:
+        model.set_params(n_estimators=n_estimators)
+        start = time.perf_counter()
+        with warnings.catch_warnings():
+            # Peringatan class_weight + warm_start tidak relevan: data sama di setiap tahap
+            warnings.simplefilter("ignore", UserWarning)
+            model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+        fit_total += fit_seconds
+
+        results.append({
+            "id": trial_id(n_estimators, group["params"]),
+            "params": {"n_estimators": n_estimators, **group["params"]},
+            # fit_seconds: hanya pohon tambahan; fit_seconds_total: setara training dari nol
+            "fit_seconds": round(fit_seconds, 3),
+            "fit_seconds_total": round(fit_total, 3),
+            **evaluate(model, scaler, X_test, X_test_raw, y_test, latency_repeat)
+        })
+    for result in results:
+        result["worker_peak_rss_mb"] = peak_rss_mb()
+        result["estimate_mb"] = round(group["estimate_mb"], 1)
+    return results
+
+
+# =====================================
+# PENJADWALAN DENGAN BUDGET MEMORI
+# =====================================
+def make_pool(jobs):
+    try:
+        # Proses baru per grup: memori forest sebelumnya benar-benar dilepas
+        # dan peak RSS yang dilaporkan milik grup itu saja
+        return ProcessPoolExecutor(max_workers=jobs, max_tasks_per_child=1)
+    except TypeError:  # Python < 3.11
+        return ProcessPoolExecutor(max_workers=jobs)
+
+
+def describe(group):
+    params = group["params"]
+    return (f"depth={params['max_depth']} leaf={params['min_samples_leaf']} "
+            f"features={params['max_features']} n={group['n_estimators']}")
+
+
+def run_search(groups, data_paths, jobs, budget_mb, latency_repeat=LATENCY_REPEAT):
+    """
+    Jalankan grup secara paralel (maks. `jobs`) selama jumlah estimasi memori
+    grup yang sedang berjalan <= budget_mb. Grup terbesar dijadwalkan lebih dulu;
+    grup yang sendirian pun melebihi budget dijalankan tanpa worker lain.
+    """
+    pending = sorted(groups, key=lambda g: g["estimate_mb"], reverse=True)
+    running = {}
+    results = []
+    with make_pool(jobs) as pool:
+        while pending or running:
+            used = sum(group["estimate_mb"] for group in running.values())
+            while pending and len(running) < jobs:
+                group = next((g for g in pending if used + g["estimate_mb"] <= budget_mb), None)
+                if group is None:
+                    if running:
+                        break
+                    group = pending[0]
+                    print(f"⚠️  Estimasi {group['estimate_mb']:.0f} MB melebihi budget, "
+                          f"dijalankan sendiri: {describe(group)}")
+                pending.remove(group)
+                running[pool.submit(run_group, group, data_paths, latency_repeat)] = group
+                used += group["estimate_mb"]
+                print(f"🚀 Mulai  {describe(group)} (estimasi {group['estimate_mb']:.0f} MB)")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                group = running.pop(future)
+                trials = future.result()
+                results.extend(trials)
+                for trial in trials:
+                    print(f"   ✅ {trial['id']:<28} akurasi={trial['accuracy']:.4f} "
+                          f"latency={trial['latency_p50_ms']:.3f}ms "
+                          f"ukuran={trial['size_bytes'] / 2**20:.1f}MB fit=+{trial['fit_seconds']:.1f}s")
+                print(f"   Peak RSS worker: {trials[-1]['worker_peak_rss_mb']} MB "
+                      f"(estimasi {group['estimate_mb']:.0f} MB)")
+    return results
+
+
+# =====================================
+# PARETO FRONT
+# =====================================
+def dominates(a, b):
+    """a minimal sama baik di semua sumbu dan lebih baik di salah satunya"""
+    no_worse = (a["accuracy"] >= b["accuracy"] and a["latency_p50_ms"] <= b["latency_p50_ms"]
+                and a["size_bytes"] <= b["size_bytes"])
+    better = (a["accuracy"] > b["accuracy"] or a["latency_p50_ms"] < b["latency_p50_ms"]
+              or a["size_bytes"] < b["size_bytes"])
+    return no_worse and better
+
+
+def pareto_front(results):
+    """Trial yang tidak didominasi trial lain (akurasi naik, latency & ukuran turun)"""
+    front = [r for r in results if not any(dominates(other, r) for other in results)]
+    return sorted(front, key=lambda r: r["accuracy"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pencarian hyperparameter Random Forest")
+    parser.add_argument("--source", default=DATASET_PATH,
+                        help="CSV dataset final atau folder training set kolumnar")
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=DEFAULT_GRID["n_estimators"])
+    parser.add_argument("--max-depth", type=parse_max_depth, nargs="+", default=DEFAULT_GRID["max_depth"])
+    parser.add_argument("--min-samples-leaf", type=int, nargs="+", default=DEFAULT_GRID["min_samples_leaf"])
+    parser.add_argument("--max-features", type=parse_max_features, nargs="+",
+                        default=DEFAULT_GRID["max_features"])
+    parser.add_argument("--random", type=int, help="ambil N konfigurasi acak dari grid")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--memory-budget-mb", type=float, default=MEMORY_BUDGET_MB)
+    parser.add_argument("--latency-repeat", type=int, default=LATENCY_REPEAT)
+    parser.add_argument("--output", help="simpan semua trial + Pareto front sebagai JSON")
+    args = parser.parse_args()
+
+    grid = {
+        "n_estimators": args.n_estimators,
+        "max_depth": args.max_depth,
+        "min_samples_leaf": args.min_samples_leaf,
+        "max_features": args.max_features
+    }
+    configs = expand_configs(grid, args.random)
+
+    print("=== PENCARIAN HYPERPARAMETER RANDOM FOREST ===\n")
+    print(f"1. Menyiapkan data (split + scaler + SMOTE, cache pipeline): {args.source}")
+    data_paths, data = prepare_data(args.source)
+    print(f"   Training (setelah SMOTE): {data['train_rows_resampled']}, test: {data['test_rows']} "
+          f"({'dari cache' if data['cache_hit'] else 'dihitung baru'}, {data['seconds']}s, "
+          f"{data['data_mb']} MB dibagi semua worker via mmap)")
+
+    groups = group_configs(configs)
+    for group in groups:
+        group["estimate_mb"] = estimate_group_mb(group, data["train_rows_resampled"])
+    # Matriks di-mmap bersama: dihitung sekali, bukan per worker
+    budget_mb = args.memory_budget_mb - data["data_mb"]
+
+    print(f"\n2. {len(configs)} konfigurasi dalam {len(groups)} grup warm_start, "
+          f"jobs={args.jobs}, budget={args.memory_budget_mb:.0f} MB")
+    start = time.perf_counter()
+    results = run_search(groups, data_paths, max(1, args.jobs), budget_mb, args.latency_repeat)
+    elapsed = time.perf_counter() - start
+
+    front = pareto_front(results)
+
+    trained = sum(r["fit_seconds"] for r in results)
+    from_scratch = sum(r["fit_seconds_total"] for r in results)
+    print(f"\n3. Selesai: {len(results)} trial dalam {elapsed:.1f}s")
+    print(f"   Waktu training warm_start {trained:.1f}s (training dari nol per trial: {from_scratch:.1f}s)")
+    print("\n   PARETO FRONT (akurasi / latency batch 1 / ukuran):")
+    for trial in front:
+        print(f"   - {trial['id']:<28} akurasi={trial['accuracy']:.4f} f1={trial['f1_macro']:.4f} "
+              f"latency={trial['latency_p50_ms']:.3f}ms ukuran={trial['size_bytes'] / 2**20:.1f}MB")
+    print("\n   Pakai parameter trial terpilih di train_model.py (bagian 6. TRAINING RANDOM FOREST)")
+
+    if args.output:
+        report = {
+            "source": os.path.abspath(args.source),
+            "seed": SEED,
+            "grid": grid,
+            "random": args.random,
+            "jobs": args.jobs,
+            "memory_budget_mb": args.memory_budget_mb,
+            "data": data,
+            "elapsed_seconds": round(elapsed, 2),
+            "trials": results,
+            "pareto_front": [trial["id"] for trial in front]
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Hasil disimpan: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+Ingestion paralel CSV per stasiun PRSA Beijing -> dataset kolumnar berpartisi.
+
+Setiap file PRSA_Data_<Stasiun>_*.csv diparse di process pool (per chunk),
+kolom yang dipakai beijing_optimasi_v3.py (TEMP, DEWP, PRES, WSPM, PM2.5)
+dinormalisasi (nama kolom & nilai non-numerik) lalu ditulis ke satu partisi:
+
+    beijing_gabungan.parts/
+        manifest.json                 # checksum + jumlah baris per stasiun
+        station=Aotizhongxin/
+            TEMP.npy  DEWP.npy  PRES.npy  WSPM.npy  PM2.5.npy  station.npy  meta.json
+        station=Changping/
+            ...
+
+station.npy berisi id stasiun per baris (int16, indeks ke "stations" di
+meta.json) dari kolom station CSV, atau dari nama file jika kolom itu tidak
+ada. Evaluasi held-out station mengelompokkan baris berdasarkan kolom ini,
+bukan berdasarkan file/partisi asalnya.
+
+Incremental: file stasiun yang checksum-nya sama dengan manifest dilewati,
+partisi stasiun yang file-nya sudah tidak ada dihapus.
+
+Cara pakai:
+    python ingest_stations.py PRSA_Data_20130301-20170228/
+    python ingest_stations.py data_stasiun/ --jobs 4 --export-csv beijing_gabungan.csv
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from dataset_stats import file_fingerprint
+from preprocess_stream import CHUNK_ROWS, PM_COLUMN, RAW_FEATURES, finalize_npy
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARTS_PATH = os.path.join(CURRENT_DIR, "beijing_gabungan.parts")
+MANIFEST_NAME = "manifest.json"
+
+# Kolom yang disimpan + dtype-nya (PM2.5 float64 agar batas label persis)
+RAW_COLUMNS = {col: np.float32 for col in RAW_FEATURES}
+RAW_COLUMNS[PM_COLUMN] = np.float64
+
+NA_VALUES = ["NA", "NaN", "nan", "", "-", "NULL", "null"]
+
+# Kolom id stasiun (opsional di CSV, selalu ditulis ke partisi sebagai kode int16)
+STATION_COLUMN = "station"
+
+
+def kunci_kolom(name):
+    """Nama kolom dinormalisasi: 'pm2_5', 'PM2.5 ', 'Pm25' -> 'PM25'"""
+    return re.sub(r"[^A-Z0-9]", "", str(name).upper())
+
+
+CANONICAL = {kunci_kolom(col): col for col in RAW_COLUMNS}
+
+
+def nama_stasiun(csv_path):
+    """PRSA_Data_Aotizhongxin_20130301-20170228.csv -> Aotizhongxin"""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    match = re.match(r"PRSA_Data_(.+?)_\d{8}-\d{8}$", name)
+    return match.group(1) if match else name
+
+
+def checksum(path, block_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def petakan_kolom(csv_path):
+    """Header CSV -> {nama asli: nama kanonik} untuk kolom yang dipakai"""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    mapping = {}
+    for col in header:
+        canonical = CANONICAL.get(kunci_kolom(col))
+        if canonical is None and kunci_kolom(col) == kunci_kolom(STATION_COLUMN):
+            canonical = STATION_COLUMN
+        if canonical is not None and canonical not in mapping.values():
+            mapping[col] = canonical
+    missing = set(RAW_COLUMNS) - set(mapping.values())
+    if missing:
+        raise ValueError(f"kolom {sorted(missing)} tidak ditemukan")
+    return mapping
+
+
+def iter_normalized_chunks(csv_path, chunk_rows=CHUNK_ROWS):
+    """
+    Chunk CSV dengan nama kolom kanonik. Kolom diparse numerik oleh parser C;
+    hanya kolom yang berisi teks aneh (dtype object) yang dikonversi ulang,
+    nilai non-numerik menjadi NaN. Kolom station (jika ada di CSV) ikut
+    dikembalikan sebagai array object (kosong -> NaN).
+    """
+    mapping = petakan_kolom(csv_path)
+    reader = pd.read_csv(csv_path, usecols=list(mapping), na_values=NA_VALUES, chunksize=chunk_rows)
+    for chunk in reader:
+        chunk = chunk.rename(columns=mapping)
+        columns = {}
+        for col, dtype in RAW_COLUMNS.items():
+            values = chunk[col]
+            if values.dtype == object:
+                values = pd.to_numeric(values, errors="coerce")
+            columns[col] = values.to_numpy(dtype=dtype)
+        if STATION_COLUMN in chunk:
+            columns[STATION_COLUMN] = chunk[STATION_COLUMN].to_numpy(dtype=object)
+        yield columns
+
+
+def station_codes(values, names, default):
+    """Nama stasiun per baris -> kode int16 (indeks ke names, diperluas in-place); kosong -> default"""
+    labels = pd.Series(values).fillna(default).astype(str).str.strip().to_numpy()
+    unique, inverse = np.unique(labels, return_inverse=True)
+    lookup = np.array([names.setdefault(name, len(names)) for name in unique], dtype=np.int16)
+    return lookup[inverse]
+
+
+def ingest_station(csv_path, partition_dir, chunk_rows=CHUNK_ROWS):
+    """Worker: satu file stasiun -> satu partisi (tmp folder lalu rename atomik)"""
+    start = time.perf_counter()
+    tmp_dir = f"{partition_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        names = [*RAW_COLUMNS, STATION_COLUMN]
+        outputs = {col: open(os.path.join(tmp_dir, f"{col}.raw"), "wb") for col in names}
+        station_names = {}
+        rows = 0
+        try:
+            with warnings.catch_warnings():
+                # Kolom bertipe campuran memang dikonversi ulang di iter_normalized_chunks
+                warnings.simplefilter("ignore", pd.errors.DtypeWarning)
+                for chunk in iter_normalized_chunks(csv_path, chunk_rows):
+                    n = len(chunk[PM_COLUMN])
+                    # CSV tanpa kolom station: semua baris milik stasiun dari nama file
+                    stations = chunk.pop(STATION_COLUMN, np.full(n, None, dtype=object))
+                    codes = station_codes(stations, station_names, nama_stasiun(csv_path))
+                    for col, values in chunk.items():
+                        values.tofile(outputs[col])
+                    codes.tofile(outputs[STATION_COLUMN])
+                    rows += n
+        finally:
+            for f in outputs.values():
+                f.close()
+        for col, dtype in RAW_COLUMNS.items():
+            finalize_npy(os.path.join(tmp_dir, f"{col}.raw"), os.path.join(tmp_dir, f"{col}.npy"), dtype, rows)
+        finalize_npy(os.path.join(tmp_dir, f"{STATION_COLUMN}.raw"),
+                     os.path.join(tmp_dir, f"{STATION_COLUMN}.npy"), np.int16, rows)
+        meta = {
+            "station": nama_stasiun(csv_path),
+            "source": os.path.basename(csv_path),
+            "rows": rows,
+            "columns": list(RAW_COLUMNS),
+            # station.npy berisi indeks ke daftar ini
+            "stations": list(station_names)
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        shutil.rmtree(partition_dir, ignore_errors=True)
+        os.replace(tmp_dir, partition_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    meta["seconds"] = round(time.perf_counter() - start, 3)
+    return meta
+
+
+def read_manifest(parts_dir):
+    try:
+        with open(os.path.join(parts_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"stations": {}}
+
+
+def write_manifest(parts_dir, manifest):
+    tmp_path = os.path.join(parts_dir, f"{MANIFEST_NAME}.tmp{os.getpid()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(parts_dir, MANIFEST_NAME))
+
+
+def partition_path(parts_dir, station):
+    return os.path.join(parts_dir, f"station={station}")
+
+
+def perlu_diproses(csv_path, entry, parts_dir, station):
+    """
+    (True/False, checksum). Ukuran + mtime sama -> langsung dilewati tanpa hashing;
+    jika berbeda, checksum isi file yang menentukan.
+    """
+    if entry is None or not os.path.isdir(partition_path(parts_dir, station)):
+        return True, checksum(csv_path)
+    if entry.get("fingerprint") == file_fingerprint(csv_path):
+        return False, entry["checksum"]
+    digest = checksum(csv_path)
+    return digest != entry.get("checksum"), digest
+
+
+def ingest(input_dir, parts_dir=PARTS_PATH, jobs=None, pattern="*.csv", chunk_rows=CHUNK_ROWS, force=False):
+    """Ingestion semua CSV stasiun di input_dir; mengembalikan manifest baru"""
+    csv_paths = sorted(glob.glob(os.path.join(input_dir, pattern)))
+    if not csv_paths:
+        raise FileNotFoundError(f"Tidak ada file {pattern} di {input_dir}")
+    os.makedirs(parts_dir, exist_ok=True)
+    manifest = read_manifest(parts_dir)
+    old_entries = manifest.get("stations", {})
+    stations = {}
+    todo = []
+
+    for csv_path in csv_paths:
+        station = nama_stasiun(csv_path)
+        if station in stations:
+            raise ValueError(f"Stasiun {station} muncul di lebih dari satu file")
+        entry = old_entries.get(station)
+        changed, digest = perlu_diproses(csv_path, None if force else entry, parts_dir, station)
+        stations[station] = {
+            "source": os.path.basename(csv_path),
+            "checksum": digest,
+            "fingerprint": file_fingerprint(csv_path),
+            "rows": entry.get("rows") if entry and not changed else None
+        }
+        if changed:
+            todo.append((station, csv_path))
+        else:
+            print(f"   ⏭️  {station}: tidak berubah, dilewati")
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            futures = {
+                pool.submit(ingest_station, csv_path, partition_path(parts_dir, station), chunk_rows): station
+                for station, csv_path in todo
+            }
+            for future in as_completed(futures):
+                station = futures[future]
+                meta = future.result()
+                stations[station]["rows"] = meta["rows"]
+                print(f"   ✅ {station}: {meta['rows']} baris ({meta['seconds']}s)")
+
+    for station in sorted(set(old_entries) - set(stations)):
+        shutil.rmtree(partition_path(parts_dir, station), ignore_errors=True)
+        print(f"   🗑️  {station}: file stasiun tidak ada lagi, partisi dihapus")
+
+    manifest = {
+        "columns": list(RAW_COLUMNS),
+        "rows": sum(entry["rows"] for entry in stations.values()),
+        "stations": stations
+    }
+    write_manifest(parts_dir, manifest)
+    return manifest, len(todo)
+
+
+def load_partition(parts_dir, station):
+    """Kolom satu partisi stasiun (memory-map)"""
+    path = partition_path(parts_dir, station)
+    return {col: np.load(os.path.join(path, f"{col}.npy"), mmap_mode="r") for col in RAW_COLUMNS}
+
+
+def load_station_column(parts_dir, station):
+    """
+    (kode int16 per baris, daftar nama stasiun) satu partisi. Partisi lama tanpa
+    station.npy: semua baris milik stasiun partisi itu (kode None).
+    """
+    path = partition_path(parts_dir, station)
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            names = json.load(f)["stations"]
+        codes = np.load(os.path.join(path, f"{STATION_COLUMN}.npy"), mmap_mode="r")
+    except (OSError, KeyError, ValueError):
+        return None, [station]
+    return codes, names
+
+
+def station_names(parts_dir):
+    """Semua id stasiun (dari kolom station partisi), terurut"""
+    names = set()
+    for station in read_manifest(parts_dir)["stations"]:
+        names.update(load_station_column(parts_dir, station)[1])
+    return sorted(names)
+
+
+def iter_partition_chunks(parts_dir, chunk_rows=CHUNK_ROWS, stations=None, with_station=False):
+    """
+    DataFrame per chunk dengan kolom mentah (TEMP, DEWP, PRES, WSPM, PM2.5)
+    dari semua partisi (urut nama stasiun), format sama dengan chunk CSV
+    di preprocess_stream.iter_chunks. with_station=True menambah kolom
+    station (Categorical) dari station.npy.
+    """
+    manifest = read_manifest(parts_dir)
+    for station in sorted(stations or manifest["stations"]):
+        columns = load_partition(parts_dir, station)
+        rows = len(columns[PM_COLUMN])
+        if with_station:
+            codes, names = load_station_column(parts_dir, station)
+        for offset in range(0, rows, chunk_rows):
+            chunk = pd.DataFrame({col: np.asarray(values[offset:offset + chunk_rows])
+                                  for col, values in columns.items()})
+            if with_station:
+                part = (np.zeros(len(chunk), dtype=np.int16) if codes is None
+                        else np.asarray(codes[offset:offset + chunk_rows]))
+                chunk[STATION_COLUMN] = pd.Categorical.from_codes(part, names)
+            yield chunk
+
+
+def export_csv(parts_dir, csv_path, chunk_rows=CHUNK_ROWS):
+    """Tulis ulang beijing_gabungan.csv dari partisi (streaming, kolom + station)"""
+    manifest = read_manifest(parts_dir)
+    tmp_path = f"{csv_path}.tmp{os.getpid()}"
+    header = True
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        for station in sorted(manifest["stations"]):
+            for chunk in iter_partition_chunks(parts_dir, chunk_rows, stations=[station], with_station=True):
+                chunk.to_csv(f, index=False, header=header, float_format="%.6g")
+                header = False
+    os.replace(tmp_path, csv_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion paralel CSV stasiun PRSA Beijing")
+    parser.add_argument("input_dir", help="folder berisi CSV per stasiun")
+    parser.add_argument("--output", default=PARTS_PATH, help="folder dataset berpartisi")
+    parser.add_argument("--pattern", default="*.csv")
+    parser.add_argument("--jobs", type=int, default=None, help="jumlah proses (default jumlah core)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--force", action="store_true", help="proses ulang semua stasiun")
+    parser.add_argument("--export-csv", default=None, help="tulis juga CSV gabungan (mis. beijing_gabungan.csv)")
+    args = parser.parse_args()
+
+    print("=== INGESTION STASIUN BEIJING ===")
+    start = time.perf_counter()
+    manifest, processed = ingest(args.input_dir, args.output, args.jobs, args.pattern, args.chunksize, args.force)
+    print(f"\n✅ {len(manifest['stations'])} stasiun, {manifest['rows']} baris "
+          f"({processed} diproses ulang) dalam {time.perf_counter() - start:.2f}s")
+    print(f"   Dataset berpartisi: {args.output}")
+
+    if args.export_csv:
+        export_csv(args.output, args.export_csv, args.chunksize)
+        print(f"💾 CSV gabungan ditulis: {args.export_csv}")
+
+
+if __name__ == "__main__":
+    main()
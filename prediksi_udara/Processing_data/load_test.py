@@ -0,0 +1,138 @@
+"""
+Load test lokal untuk serve.py: mengukur throughput /predict
+untuk beberapa jumlah worker.
+
+Cara pakai:
+    python load_test.py                          # worker 1, 2, 4, ... sampai jumlah core
+    python load_test.py --workers 1 2 4 --clients 16 --duration 10
+    python load_test.py --url http://localhost:5000   # server yang sudah berjalan
+    MICROBATCH=1 python load_test.py --threaded --clients 32
+
+Scaling antar core hanya terlihat jika worker <= jumlah core (dan klien load
+test ikut memakai core yang sama). Satu-satunya hasil yang pernah diukur
+berasal dari mesin 1 CPU (1 worker ~440 rps, 2 worker ~461 rps), jadi scaling
+throughput multi-core serve.py BELUM terverifikasi.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PAYLOAD = json.dumps({
+    "suhu": 12.5,
+    "kelembapan": -3.0,
+    "tekanan": 1015.0,
+    "kecepatan_angin": 2.5
+}).encode("utf-8")
+
+
+def client_loop(host, port, duration, result_queue):
+    """Satu proses klien: kirim /predict terus-menerus sampai durasi habis"""
+    ok = errors = 0
+    deadline = time.perf_counter() + duration
+    conn = None
+    while time.perf_counter() < deadline:
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection(host, port, timeout=10)
+            conn.request("POST", "/predict", body=PAYLOAD,
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                ok += 1
+            else:
+                errors += 1
+            if response.will_close:
+                conn.close()
+                conn = None
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            if conn is not None:
+                conn.close()
+            conn = None
+    result_queue.put((ok, errors))
+
+
+def run_load(host, port, clients, duration):
+    result_queue = mp.Queue()
+    procs = [mp.Process(target=client_loop, args=(host, port, duration, result_queue))
+             for _ in range(clients)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    results = [result_queue.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - start
+    ok = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    return {"requests": ok, "errors": errors, "seconds": round(elapsed, 2),
+            "rps": round(ok / elapsed, 1)}
+
+
+def wait_ready(host, port, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test throughput /predict")
+    default_workers = sorted({1, 2, 4, os.cpu_count() or 1} & set(range(1, (os.cpu_count() or 1) + 1)))
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--clients", type=int, default=max(4, 2 * (os.cpu_count() or 1)))
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--threaded", action="store_true",
+                        help="jalankan worker serve.py dengan thread (perlu untuk MICROBATCH=1)")
+    parser.add_argument("--url", default=None, help="uji server yang sudah berjalan")
+    args = parser.parse_args()
+
+    if args.url:
+        parsed = urlparse(args.url)
+        print(json.dumps(run_load(parsed.hostname, parsed.port or 80, args.clients, args.duration)))
+        return
+
+    print(f"=== LOAD TEST /predict ({args.clients} klien, {args.duration}s) ===")
+    cores = os.cpu_count() or 1
+    if cores == 1 or max(args.workers) > cores:
+        print(f"⚠️  Mesin ini {cores} core: worker > jumlah core tidak menunjukkan scaling antar core")
+    baseline = None
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(CURRENT_DIR, "serve.py"),
+             "--host", "127.0.0.1", "--port", str(args.port), "--workers", str(workers)]
+            + (["--threaded"] if args.threaded else []),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=CURRENT_DIR
+        )
+        try:
+            if not wait_ready("127.0.0.1", args.port):
+                print(f"❌ Server dengan {workers} worker tidak siap")
+                continue
+            result = run_load("127.0.0.1", args.port, args.clients, args.duration)
+            baseline = baseline or result["rps"]
+            speedup = result["rps"] / baseline if baseline else 0
+            print(f"   worker={workers:<3} rps={result['rps']:<9} errors={result['errors']:<5} "
+                  f"speedup={speedup:.2f}x")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
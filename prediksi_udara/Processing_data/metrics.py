@@ -0,0 +1,201 @@
+"""
+Metrik latency & throughput API dalam format teks Prometheus.
+
+- api_requests_total{endpoint,method,status}      : counter request per status
+- api_errors_total{endpoint,status}                : counter request dengan status >= 400
+- api_request_duration_seconds{endpoint}           : histogram latency total request
+- api_stage_duration_seconds{endpoint,stage}       : histogram latency per tahap
+  (parse, validate, cache, scale, predict, batch_wait, build, serialize, ...)
+
+Metrik disimpan per proses. Dengan serve.py setiap worker punya angka sendiri,
+label `pid` di api_process_start_time_seconds membantu membedakannya.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Batas bucket histogram (detik), dari 50 µs sampai 10 detik
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Histogram:
+    """Histogram bucket tetap (tidak kumulatif di memori, dikumulatifkan saat render)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Perkiraan kuantil (batas atas bucket), untuk ringkasan di /health"""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        running = 0
+        for i, n in enumerate(self.counts):
+            running += n
+            if running >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def render(self, name, labels):
+        lines = []
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            running += n
+            bucket_labels = format_labels(labels + (("le", format_value(bound)),))
+            lines.append(f"{name}_bucket{bucket_labels} {running}")
+        lines.append(f"{name}_sum{format_labels(labels)} {format_value(self.sum)}")
+        lines.append(f"{name}_count{format_labels(labels)} {self.count}")
+        return lines
+
+
+class Metrics:
+    """Kumpulan counter & histogram, aman dipakai dari banyak thread"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._errors = {}
+        self._durations = {}
+        self._stages = {}
+        self._gauges = {}
+
+    def observe_request(self, endpoint, method, status, seconds):
+        endpoint = endpoint or "unknown"
+        with self._lock:
+            key = (endpoint, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if int(status) >= 400:
+                key = (endpoint, str(status))
+                self._errors[key] = self._errors.get(key, 0) + 1
+            histogram = self._durations.get(endpoint)
+            if histogram is None:
+                histogram = self._durations[endpoint] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def observe_stage(self, endpoint, stage, seconds):
+        key = (endpoint or "unknown", stage)
+        with self._lock:
+            histogram = self._stages.get(key)
+            if histogram is None:
+                histogram = self._stages[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, endpoint, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(endpoint, stage, time.perf_counter() - start)
+
+    def set_gauge(self, name, value, help_text="", replace=False, **labels):
+        """
+        Gauge ad-hoc (mis. statistik cache/micro-batch), ditimpa setiap kali di-set.
+        replace=True membuang semua seri lain gauge ini (mis. info versi model:
+        setelah hot reload hanya versi aktif yang tampil).
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            if replace:
+                self._gauges[name] = (help_text, {key: value})
+            else:
+                self._gauges.setdefault(name, (help_text, {}))[1][key] = value
+
+    def summary(self):
+        """
+        Ringkasan p50/p99 per endpoint untuk /health, dalam milidetik.
+        Nilainya batas atas bucket histogram (None jika di atas bucket terbesar).
+        """
+        def to_ms(value):
+            return value * 1000 if value is not None and value != float("inf") else None
+
+        with self._lock:
+            return {
+                endpoint: {
+                    "count": histogram.count,
+                    "p50_ms": to_ms(histogram.quantile(0.5)),
+                    "p99_ms": to_ms(histogram.quantile(0.99))
+                }
+                for endpoint, histogram in self._durations.items()
+            }
+
+    def render(self):
+        """Semua metrik dalam format teks Prometheus"""
+        lines = [
+            "# HELP api_process_start_time_seconds Waktu mulai proses (unix time)",
+            "# TYPE api_process_start_time_seconds gauge",
+            f"api_process_start_time_seconds{format_labels((('pid', os.getpid()),))} {format_value(self.started_at)}"
+        ]
+        with self._lock:
+            lines += [
+                "# HELP api_requests_total Jumlah request per endpoint, method dan status",
+                "# TYPE api_requests_total counter"
+            ]
+            for (endpoint, method, status), n in sorted(self._requests.items()):
+                labels = (("endpoint", endpoint), ("method", method), ("status", status))
+                lines.append(f"api_requests_total{format_labels(labels)} {n}")
+
+            lines += [
+                "# HELP api_errors_total Jumlah request dengan status >= 400",
+                "# TYPE api_errors_total counter"
+            ]
+            for (endpoint, status), n in sorted(self._errors.items()):
+                labels = (("endpoint", endpoint), ("status", status))
+                lines.append(f"api_errors_total{format_labels(labels)} {n}")
+
+            lines += [
+                "# HELP api_request_duration_seconds Latency total request per endpoint",
+                "# TYPE api_request_duration_seconds histogram"
+            ]
+            for endpoint, histogram in sorted(self._durations.items()):
+                lines += histogram.render("api_request_duration_seconds", (("endpoint", endpoint),))
+
+            lines += [
+                "# HELP api_stage_duration_seconds Latency per tahap pemrosesan request",
+                "# TYPE api_stage_duration_seconds histogram"
+            ]
+            for (endpoint, stage), histogram in sorted(self._stages.items()):
+                labels = (("endpoint", endpoint), ("stage", stage))
+                lines += histogram.render("api_stage_duration_seconds", labels)
+
+            for name, (help_text, series) in sorted(self._gauges.items()):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+                for labels, value in sorted(series.items()):
+                    if value is not None:
+                        lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,149 @@
+"""
+Micro-batching untuk request /predict yang datang bersamaan.
+
+Setiap request memasukkan satu baris input ke antrian lalu menunggu hasilnya.
+Thread scorer mengambil baris dari antrian, menunggu paling lama max_wait_ms
+(atau sampai max_batch_size baris terkumpul), lalu menilai semuanya dengan
+satu panggilan forest yang tervektorisasi dan membagikan hasilnya kembali
+ke masing-masing request.
+
+Request menunggu paling lama max_wait + MICROBATCH_TIMEOUT_MS; lewat dari itu
+BatchTimeout (API menjawab 503). Jika thread scorer mati (atau belum ada di
+worker hasil fork), thread baru dijalankan pada submit() berikutnya.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+MICROBATCH_MAX_SIZE = int(os.environ.get("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get("MICROBATCH_MAX_WAIT_MS", "5"))
+# Waktu skor maksimum satu batch (di luar max_wait) sebelum request menyerah
+MICROBATCH_TIMEOUT_MS = float(os.environ.get("MICROBATCH_TIMEOUT_MS", "2000"))
+
+
+class BatchTimeout(TimeoutError):
+    """Hasil micro-batch tidak datang dalam batas waktu"""
+
+
+class MicroBatcher:
+    """
+    score_fn: fungsi X (n, n_fitur) -> (predictions, probabilities),
+    dipanggil di thread scorer untuk setiap batch.
+
+    Jika submit() diberi context (mis. bundle model yang dipegang request),
+    baris dikelompokkan per context dan score_fn dipanggil sebagai
+    score_fn(X, context), sehingga setiap request dinilai dengan model
+    yang sama dengan yang ia pegang.
+    """
+
+    def __init__(self, score_fn, max_batch_size=MICROBATCH_MAX_SIZE, max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+                 timeout_ms=MICROBATCH_TIMEOUT_MS):
+        self.score_fn = score_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.timeout = self.max_wait + max(0.0, float(timeout_ms)) / 1000.0
+        self.batches = 0
+        self.items = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _ensure_started(self):
+        # Thread tidak ikut ter-fork: setiap proses worker memulai thread-nya sendiri,
+        # dan thread yang mati dijalankan ulang (antrian yang sama tetap dipakai)
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+            elif self._thread.is_alive():
+                return
+            else:
+                self.restarts += 1
+                print("⚠️  Thread micro-batch mati, dijalankan ulang")
+            self._thread = threading.Thread(target=self._run, name="microbatch-scorer", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, row, context=None):
+        """Masukkan satu baris input, hasilnya Future berisi (prediction, probabilities)"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((np.asarray(row, dtype=np.float64), context, future))
+        return future
+
+    def score(self, row, context=None):
+        """Versi blocking dari submit(); BatchTimeout jika lewat self.timeout detik"""
+        future = self.submit(row, context)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Baris yang belum diambil scorer dibatalkan agar tidak dinilai sia-sia
+            future.cancel()
+            self.timeouts += 1
+            raise BatchTimeout(f"Micro-batch tidak selesai dalam {self.timeout * 1000:.0f} ms") from None
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "timeout_ms": self.timeout * 1000.0,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts
+        }
+
+    def _collect(self):
+        """Tunggu baris pertama, lalu kumpulkan sisanya sampai batas ukuran/waktu"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _score_group(self, context, batch):
+        X = np.stack([row for row, _ in batch])
+        try:
+            if context is None:
+                predictions, probabilities = self.score_fn(X)
+            else:
+                predictions, probabilities = self.score_fn(X, context)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.items += len(batch)
+        for i, (_, future) in enumerate(batch):
+            future.set_result((predictions[i], probabilities[i]))
+
+    def _run(self):
+        while True:
+            # Kelompokkan per context; biasanya hanya satu (kecuali saat model berganti)
+            groups = {}
+            for row, context, future in self._collect():
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(id(context), (context, []))[1].append((row, future))
+            for context, batch in groups.values():
+                self._score_group(context, batch)
@@ -0,0 +1,335 @@
+"""
+Registry model berversi + hot reload tanpa restart.
+
+Struktur registry (folder models/ di samping script):
+
+    models/
+        20260101-120000/
+            model.pkl         # RandomForestClassifier (joblib)
+            model.npz         # forest format array (opsional, MODEL_ENGINE=flat)
+            model_raw.npz     # forest input mentah (opsional, MODEL_ENGINE=flat_raw)
+            model.rfc         # forest format ringkas di-mmap (opsional, MODEL_ENGINE=compact)
+            model_raw.rfc     # format ringkas input mentah (opsional, MODEL_ENGINE=compact_raw)
+            scaler.pkl        # MinMaxScaler
+        20260102-090000/
+            ...
+
+Versi terbaru = nama folder terbesar (urutan timestamp). train_model.py
+mem-publish versi baru dengan publish_version(). Jika registry kosong,
+file lama di Processing_data/ (model_kualitas_udara_beijing_v3.pkl, dst.) dipakai.
+
+Model baru dimuat dan dipanaskan (warm-up) dengan batch sintetis di thread
+latar belakang, lalu ditukar secara atomik. Request yang sedang berjalan
+memegang referensi ke bundle lama sehingga tetap selesai dengan model lama.
+"""
+import os
+import shutil
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+import numpy as np
+
+from dataset_stats import file_fingerprint
+from forest_engine import load_forest
+from prediction_grid import GridModel
+from validasi_input import RANGE_MAX, RANGE_MIN
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", os.path.join(CURRENT_DIR, "models"))
+
+# Nama file artefak di dalam folder versi
+VERSION_FILES = {
+    "sklearn": "model.pkl",
+    "flat": "model.npz",
+    "flat_raw": "model_raw.npz",
+    "compact": "model.rfc",
+    "compact_raw": "model_raw.rfc",
+    "scaler": "scaler.pkl"
+}
+
+# File lama di Processing_data/, dipakai jika registry belum berisi versi apa pun
+LEGACY_PATHS = {
+    "sklearn": os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.pkl"),
+    "flat": os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.npz"),
+    "flat_raw": os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3_raw.npz"),
+    "compact": os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.rfc"),
+    "compact_raw": os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3_raw.rfc"),
+    "scaler": os.path.join(CURRENT_DIR, "scaler_beijing_v3.pkl")
+}
+
+WARMUP_ROWS = int(os.environ.get("MODEL_WARMUP_ROWS", "256"))
+
+
+def list_versions(registry_dir=REGISTRY_DIR):
+    """Versi yang lengkap (punya model.pkl dan scaler.pkl), urut dari terlama"""
+    try:
+        names = os.listdir(registry_dir)
+    except OSError:
+        return []
+    versions = []
+    for name in names:
+        path = os.path.join(registry_dir, name)
+        if name.startswith(".") or not os.path.isdir(path):
+            continue
+        if all(os.path.exists(os.path.join(path, VERSION_FILES[key])) for key in ("sklearn", "scaler")):
+            versions.append(name)
+    return sorted(versions)
+
+
+def version_paths(version, registry_dir=REGISTRY_DIR):
+    """Path artefak untuk sebuah versi; None berarti file lama (legacy)"""
+    if version is None:
+        return dict(LEGACY_PATHS)
+    base = os.path.join(registry_dir, version)
+    return {key: os.path.join(base, name) for key, name in VERSION_FILES.items()}
+
+
+def legacy_version():
+    """Versi file lama diturunkan dari ukuran + mtime pickle model"""
+    fingerprint = file_fingerprint(LEGACY_PATHS["sklearn"])
+    return f"legacy-{fingerprint[0]:x}-{fingerprint[1]:x}" if fingerprint else None
+
+
+def publish_version(files, registry_dir=REGISTRY_DIR, version=None):
+    """
+    Menyalin artefak hasil training ke folder versi baru secara atomik.
+    files: dict key VERSION_FILES -> path sumber (key yang tidak ada dilewati).
+    """
+    version = version or datetime.now().strftime("%Y%m%d-%H%M%S")
+    os.makedirs(registry_dir, exist_ok=True)
+    tmp_dir = os.path.join(registry_dir, f".{version}.tmp{os.getpid()}")
+    os.makedirs(tmp_dir, exist_ok=True)
+    for key, src in files.items():
+        if src and os.path.exists(src):
+            shutil.copy2(src, os.path.join(tmp_dir, VERSION_FILES[key]))
+    os.replace(tmp_dir, os.path.join(registry_dir, version))
+    return version
+
+
+class ModelBundle:
+    """Model + scaler satu versi. Objek ini tidak pernah diubah setelah dibuat."""
+
+    def __init__(self, model, scaler, version, engine, paths, load_seconds):
+        self.model = model
+        self.scaler = scaler
+        self.version = version
+        self.engine = engine
+        self.paths = paths
+        self.classes_ = model.classes_
+        # Urutan kelas tetap selama versi ini aktif (array probabilitas response minimal)
+        self.class_names = [str(c) for c in model.classes_]
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+        self.scaler_folded = bool(getattr(model, "scaler_folded", False))
+
+    @property
+    def model_path(self):
+        return self.paths.get(self.engine, self.paths["sklearn"])
+
+    def score(self, X, timer=None):
+        """
+        Normalisasi + prediksi untuk matrix input (n, 4) dalam satu kali jalan.
+        Label diambil dari argmax probabilitas (sama dengan model.predict),
+        jadi forest cukup dievaluasi sekali. Jika scaler sudah dilipat ke forest,
+        buffer input yang sama dengan validasi langsung dipakai untuk prediksi.
+
+        timer: fungsi nama_tahap -> context manager untuk mengukur tahap
+        "scale" dan "predict" (lihat metrics.py), opsional.
+        """
+        timer = timer or (lambda stage: nullcontext())
+        with timer("scale"):
+            X_model = X if self.scaler_folded else self.scaler.transform(X)
+        with timer("predict"):
+            probabilities = self.model.predict_proba(X_model)
+        predictions = self.classes_[np.argmax(probabilities, axis=1)]
+        return predictions, probabilities
+
+    def warm_up(self, rows=WARMUP_ROWS, seed=0):
+        """Jalankan batch sintetis di dalam VALID_RANGES agar page model & cache sudah panas"""
+        rng = np.random.default_rng(seed)
+        X = rng.uniform(RANGE_MIN, RANGE_MAX, size=(max(1, rows), len(RANGE_MIN)))
+        self.score(X)
+        self.score(X[:1])
+        # Engine array: tabel traversal batch besar ikut disiapkan
+        if hasattr(self.model, "prepare"):
+            self.model.prepare()
+
+    def info(self):
+        return {
+            "version": self.version,
+            "engine": self.engine,
+            "loaded_at": datetime.fromtimestamp(self.loaded_at).isoformat(timespec="seconds"),
+            "load_seconds": round(self.load_seconds, 3)
+        }
+
+
+def load_bundle(version, engine="sklearn", grid_dir=None, grid_mode="nearest", registry_dir=REGISTRY_DIR):
+    """
+    Memuat model (sesuai engine) + scaler sebuah versi, opsional dibungkus lookup grid.
+    joblib (dan sklearn lewat unpickle) baru diimpor di sini; engine *_raw yang
+    scaler-nya sudah dilipat ke forest tidak memuat scaler.pkl sama sekali,
+    jadi startup-nya tidak mengimpor sklearn.
+    """
+    import joblib
+
+    start = time.perf_counter()
+    paths = version_paths(version, registry_dir)
+    if engine in ("flat", "flat_raw", "compact", "compact_raw"):
+        model = load_forest(paths[engine])
+    else:
+        model = joblib.load(paths["sklearn"])
+    scaler = None if getattr(model, "scaler_folded", False) else joblib.load(paths["scaler"])
+
+    if grid_dir:
+        base_model = model
+
+        def fallback_proba(X):
+            """Model asli untuk input di luar titik grid (mode exact)"""
+            if getattr(base_model, "scaler_folded", False):
+                return base_model.predict_proba(X)
+            return base_model.predict_proba(scaler.transform(X))
+
+        try:
+            model = GridModel.load(
+                grid_dir,
+                fallback=fallback_proba,
+                mode=grid_mode,
+                expected_fingerprint=file_fingerprint(paths["sklearn"])
+            )
+            print(f"✅ Grid prediksi dimuat ({grid_mode}): {grid_dir}")
+        except Exception as e:
+            print(f"⚠️  Grid prediksi tidak dipakai: {e}")
+
+    bundle = ModelBundle(model, scaler, version or legacy_version(), engine, paths, 0.0)
+    bundle.warm_up()
+    bundle.load_seconds = time.perf_counter() - start
+    return bundle
+
+
+class ModelRegistry:
+    """
+    Menyimpan bundle aktif dan menangani reload di latar belakang.
+    `current` hanya diganti dengan satu assignment (atomik), pemanggil cukup
+    mengambil referensi sekali di awal request.
+    """
+
+    def __init__(self, engine="sklearn", grid_dir=None, grid_mode="nearest", registry_dir=REGISTRY_DIR):
+        self.engine = engine
+        self.grid_dir = grid_dir
+        self.grid_mode = grid_mode
+        self.registry_dir = registry_dir
+        self.current = None
+        self.previous_version = None
+        self.status = "idle"
+        self.last_error = None
+        # Versi terbaru registry yang sudah ditangani (dimuat atau sengaja di-rollback);
+        # watcher hanya reload jika muncul versi yang lebih baru dari ini
+        self.latest_seen = None
+        # Versi yang gagal dimuat, tidak dicoba ulang watcher sampai isi registry berubah
+        self.failed_versions = set()
+        self._known_versions = None
+        self._reload_lock = threading.Lock()
+        self._watcher_pid = None
+
+    def latest_version(self):
+        versions = list_versions(self.registry_dir)
+        return versions[-1] if versions else None
+
+    def _load_locked(self, version):
+        """Isi load(); pemanggil sudah memegang _reload_lock"""
+        latest = self.latest_version()
+        version = version or latest
+        self.status = "loading"
+        try:
+            bundle = load_bundle(version, self.engine, self.grid_dir, self.grid_mode, self.registry_dir)
+        except Exception as e:
+            self.status = "failed"
+            self.last_error = str(e)
+            if version is not None:
+                self._known_versions = list_versions(self.registry_dir)
+                self.failed_versions.add(version)
+            raise
+        if self.current is not None:
+            self.previous_version = self.current.version
+        self.current = bundle
+        self.status = "ready"
+        self.last_error = None
+        if latest is not None and (self.latest_seen is None or latest > self.latest_seen):
+            # Rollback ke versi lama tetap menandai versi terbaru sudah dilihat,
+            # jadi watcher tidak membatalkannya
+            self.latest_seen = latest
+        return bundle
+
+    def load(self, version=None):
+        """Muat versi (default terbaru) dan jadikan aktif; blocking"""
+        with self._reload_lock:
+            return self._load_locked(version)
+
+    def reload_async(self, version=None):
+        """Muat versi di thread latar belakang; False jika reload lain sedang berjalan"""
+        # Lock diambil di sini (bukan di thread) agar dua pemanggil bersamaan
+        # tidak sama-sama lolos dan mendapat 202
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                bundle = self._load_locked(version)
+                print(f"🔄 Model versi {bundle.version} aktif ({bundle.load_seconds:.2f}s)")
+            except Exception as e:
+                print(f"❌ Reload model gagal: {e}")
+            finally:
+                self._reload_lock.release()
+
+        try:
+            threading.Thread(target=run, name="model-reload", daemon=True).start()
+        except BaseException:
+            self._reload_lock.release()
+            raise
+        return True
+
+    def check_for_update(self):
+        """
+        Satu tick watcher: reload (async) hanya jika ada versi yang lebih baru dari
+        latest_seen dan belum pernah gagal dimuat. True jika reload dimulai.
+        """
+        versions = list_versions(self.registry_dir)
+        if versions != self._known_versions:
+            # Registry berubah: versi yang pernah gagal boleh dicoba lagi
+            self._known_versions = versions
+            self.failed_versions.clear()
+        latest = versions[-1] if versions else None
+        if latest is None or latest in self.failed_versions:
+            return False
+        if self.latest_seen is not None and latest <= self.latest_seen:
+            return False
+        return self.reload_async(latest)
+
+    def start_watcher(self, interval):
+        """
+        Poll registry setiap `interval` detik dan reload jika ada versi baru.
+        Dipanggil per proses (thread tidak ikut ter-fork).
+        """
+        if interval <= 0 or self._watcher_pid == os.getpid():
+            return
+        self._watcher_pid = os.getpid()
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                self.check_for_update()
+
+        threading.Thread(target=watch, name="model-watcher", daemon=True).start()
+
+    def info(self):
+        current = self.current
+        return {
+            **(current.info() if current is not None else {"version": None}),
+            "previous_version": self.previous_version,
+            "reload_status": self.status,
+            "reload_error": self.last_error,
+            "failed_versions": sorted(self.failed_versions),
+            "available_versions": list_versions(self.registry_dir)
+        }
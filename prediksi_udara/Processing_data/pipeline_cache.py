@@ -0,0 +1,294 @@
+"""
+Cache artefak preprocessing training yang dialamatkan berdasarkan isi (content-addressed).
+
+Dua tahap disimpan terpisah di PIPELINE_CACHE_DIR/<tahap>/<kunci>/:
+- split/<kunci>  : indeks train/test, MinMaxScaler hasil fit di data train,
+                   fitur mentah + label test set (untuk evaluasi)
+- smote/<kunci>  : X_train (sudah di-scale + SMOTE, float32) dan y_train
+
+Kunci = hash isi dataset (blake2b) + parameter tahap + versi sklearn/imblearn,
+sehingga dataset atau parameter yang berubah otomatis memakai entri baru dan
+entri lama tidak pernah tertimpa. Hash dataset diingat per (ukuran, mtime)
+di sources.json agar CSV tidak di-hash ulang setiap kali.
+
+Array disimpan sebagai .npy dan dibuka dengan mmap: training ulang yang hanya
+mengubah parameter forest langsung ke fit, evaluasi langsung ke predict,
+tanpa membaca CSV, split, scaling maupun SMOTE (tahap terlama, nearest neighbour).
+
+X_train disimpan float32 karena RandomForest sklearn mengubah input ke float32
+sebelum fit, hasil training identik dengan memberi array float64.
+
+Cara pakai:
+    python pipeline_cache.py list      # entri cache + ukurannya
+    python pipeline_cache.py clear     # hapus semua entri
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from importlib.metadata import version
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from dataset_loader import FEATURE_COLUMNS, LABEL_COLUMN
+from dataset_stats import file_fingerprint
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("PIPELINE_CACHE_DIR", os.path.join(CURRENT_DIR, "pipeline_cache"))
+
+# Naikkan jika format isi entri berubah
+PIPELINE_VERSION = 1
+
+SPLIT_PARAMS = {"test_size": 0.2, "random_state": 42, "stratify": True}
+SMOTE_PARAMS = {"random_state": 42, "k_neighbors": 5}
+
+
+def hash_file(path, digest, block_size=1 << 20):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+
+
+def dataset_checksum(path, cache_dir=CACHE_DIR):
+    """
+    blake2b isi dataset (file CSV, atau semua file di folder kolumnar).
+    Hasilnya diingat per path + fingerprint di sources.json.
+    """
+    path = os.path.abspath(path)
+    files = [path]
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+    fingerprint = [file_fingerprint(f) for f in files]
+
+    sources_path = os.path.join(cache_dir, "sources.json")
+    try:
+        with open(sources_path, encoding="utf-8") as f:
+            sources = json.load(f)
+    except (OSError, ValueError):
+        sources = {}
+    known = sources.get(path)
+    if known and known.get("fingerprint") == fingerprint:
+        return known["checksum"]
+
+    digest = hashlib.blake2b(digest_size=20)
+    for f in files:
+        digest.update(os.path.basename(f).encode("utf-8"))
+        hash_file(f, digest)
+    checksum = digest.hexdigest()
+
+    sources[path] = {"fingerprint": fingerprint, "checksum": checksum}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{sources_path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(sources, f, indent=2)
+    os.replace(tmp_path, sources_path)
+    return checksum
+
+
+def cache_key(*parts):
+    payload = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def read_dataset(path):
+    """Fitur (DataFrame float64, sama dengan pd.read_csv) + label (str) dari CSV / folder kolumnar"""
+    if os.path.isdir(path):
+        from preprocess_stream import load_training_set
+
+        df = load_training_set(path)
+        X = df[FEATURE_COLUMNS].astype(np.float64)
+    else:
+        df = pd.read_csv(path, usecols=FEATURE_COLUMNS + [LABEL_COLUMN])
+        X = df[FEATURE_COLUMNS]
+    return X, df[LABEL_COLUMN].astype(str)
+
+
+class PipelineCache:
+    """
+    Artefak preprocessing satu dataset. Dataset hanya dibaca jika ada tahap
+    yang belum ada di cache; semua array yang dikembalikan di-mmap.
+    """
+
+    def __init__(self, dataset_path, cache_dir=CACHE_DIR, split_params=None, smote_params=None):
+        # Versi dari metadata paket: kunci cache bisa dihitung tanpa mengimpor
+        # sklearn/imblearn (import imblearn saja beberapa detik)
+        sklearn_version = version("scikit-learn")
+
+        self.dataset_path = dataset_path
+        self.cache_dir = cache_dir
+        self.split_params = {**SPLIT_PARAMS, **(split_params or {})}
+        self.smote_params = {**SMOTE_PARAMS, **(smote_params or {})}
+        self.checksum = dataset_checksum(dataset_path, cache_dir)
+        self.split_key = cache_key(
+            PIPELINE_VERSION, self.checksum, FEATURE_COLUMNS, LABEL_COLUMN,
+            self.split_params, sklearn_version
+        )
+        self.smote_key = cache_key(
+            PIPELINE_VERSION, self.split_key, self.smote_params, sklearn_version, version("imbalanced-learn")
+        )
+        self._data = None
+        self._split = None
+
+    def entry_path(self, stage, key):
+        return os.path.join(self.cache_dir, stage, key)
+
+    def _dataset(self):
+        if self._data is None:
+            self._data = read_dataset(self.dataset_path)
+        return self._data
+
+    def _write_entry(self, stage, key, arrays, objects, meta):
+        """Tulis entri ke folder sementara lalu rename (atomik)"""
+        path = self.entry_path(stage, key)
+        tmp_dir = f"{path}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, values in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), values)
+        for name, obj in objects.items():
+            joblib.dump(obj, os.path.join(tmp_dir, f"{name}.pkl"))
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        try:
+            os.replace(tmp_dir, path)
+        except OSError:
+            # Proses lain sudah menulis entri yang sama lebih dulu
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _read_entry(self, stage, key, arrays, objects=()):
+        path = self.entry_path(stage, key)
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            entry = {
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                for name in arrays
+            }
+            for name in objects:
+                entry[name] = joblib.load(os.path.join(path, f"{name}.pkl"))
+        except (OSError, ValueError):
+            return None
+        entry["meta"] = meta
+        return entry
+
+    def split(self):
+        """
+        Indeks train/test + scaler + test set mentah. Keys: train_idx, test_idx,
+        scaler, X_test (DataFrame), y_test (Series), meta, hit.
+        """
+        if self._split is not None:
+            return self._split
+        names = ("train_idx", "test_idx", "X_test", "y_test")
+        entry = self._read_entry("split", self.split_key, names, ("scaler",))
+        hit = entry is not None
+        if not hit:
+            from sklearn.model_selection import train_test_split
+            from sklearn.preprocessing import MinMaxScaler
+
+            X, y = self._dataset()
+            # Split indeks menghasilkan baris yang sama dengan split X, y langsung
+            train_idx, test_idx = train_test_split(
+                np.arange(len(X)),
+                test_size=self.split_params["test_size"],
+                random_state=self.split_params["random_state"],
+                stratify=y if self.split_params["stratify"] else None
+            )
+            scaler = MinMaxScaler()
+            scaler.fit(X.iloc[train_idx])
+            meta = {
+                "dataset": os.path.abspath(self.dataset_path),
+                "checksum": self.checksum,
+                "params": self.split_params,
+                "rows": int(len(X)),
+                "label_counts": {str(k): int(v) for k, v in y.value_counts().items()}
+            }
+            self._write_entry("split", self.split_key, {
+                "train_idx": train_idx,
+                "test_idx": test_idx,
+                "X_test": X.iloc[test_idx].to_numpy(dtype=np.float64),
+                "y_test": y.iloc[test_idx].to_numpy().astype(str)
+            }, {"scaler": scaler}, meta)
+            entry = self._read_entry("split", self.split_key, names, ("scaler",))
+
+        entry["X_test"] = pd.DataFrame(entry["X_test"], columns=FEATURE_COLUMNS, copy=False)
+        entry["y_test"] = pd.Series(entry["y_test"], name=LABEL_COLUMN, copy=False)
+        entry["hit"] = hit
+        self._split = entry
+        return entry
+
+    def resampled(self):
+        """X_train ter-scale + SMOTE (float32) dan y_train. Keys: X_train, y_train, meta, hit."""
+        names = ("X_train", "y_train")
+        entry = self._read_entry("smote", self.smote_key, names)
+        hit = entry is not None
+        if not hit:
+            from imblearn.over_sampling import SMOTE
+
+            split = self.split()
+            X, y = self._dataset()
+            X_train_scaled = split["scaler"].transform(X.iloc[split["train_idx"]])
+            smote = SMOTE(**self.smote_params)
+            X_res, y_res = smote.fit_resample(X_train_scaled, y.iloc[split["train_idx"]])
+            meta = {
+                "split_key": self.split_key,
+                "params": self.smote_params,
+                "rows": int(len(X_res)),
+                "label_counts": {str(k): int(v) for k, v in pd.Series(y_res).value_counts().items()}
+            }
+            self._write_entry("smote", self.smote_key, {
+                "X_train": np.ascontiguousarray(X_res, dtype=np.float32),
+                "y_train": np.asarray(y_res).astype(str)
+            }, {}, meta)
+            entry = self._read_entry("smote", self.smote_key, names)
+        entry["hit"] = hit
+        return entry
+
+    def paths(self):
+        """Path file .npy/.pkl semua artefak (untuk dibuka ulang dengan mmap di proses lain)"""
+        split_dir = self.entry_path("split", self.split_key)
+        smote_dir = self.entry_path("smote", self.smote_key)
+        return {
+            "X_train": os.path.join(smote_dir, "X_train.npy"),
+            "y_train": os.path.join(smote_dir, "y_train.npy"),
+            "X_test": os.path.join(split_dir, "X_test.npy"),
+            "y_test": os.path.join(split_dir, "y_test.npy"),
+            "scaler": os.path.join(split_dir, "scaler.pkl")
+        }
+
+
+def list_entries(cache_dir=CACHE_DIR):
+    entries = []
+    for stage in ("split", "smote"):
+        stage_dir = os.path.join(cache_dir, stage)
+        if not os.path.isdir(stage_dir):
+            continue
+        for key in sorted(os.listdir(stage_dir)):
+            if ".tmp" in key:
+                continue
+            path = os.path.join(stage_dir, key)
+            size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+            entries.append({"stage": stage, "key": key, "size_bytes": size, "path": path})
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache artefak preprocessing training")
+    parser.add_argument("command", choices=["list", "clear"])
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        entries = list_entries(args.cache_dir)
+        for entry in entries:
+            print(f"{entry['stage']:<6} {entry['key']}  {entry['size_bytes'] / 2**20:.1f} MB")
+        print(f"Total: {len(entries)} entri, {sum(e['size_bytes'] for e in entries) / 2**20:.1f} MB")
+    else:
+        shutil.rmtree(args.cache_dir, ignore_errors=True)
+        print(f"🗑️  Cache pipeline dihapus: {args.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
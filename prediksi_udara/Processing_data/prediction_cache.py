@@ -0,0 +1,95 @@
+"""
+Cache LRU untuk hasil /predict.
+
+Input sensor datang dengan resolusi tetap, sehingga tuple yang sama sering
+berulang. Key cache adalah input tervalidasi yang dikuantisasi ke resolusi
+sensor, ditambah versi model. Jika versi model berubah (model dimuat ulang),
+seluruh isi cache dibuang otomatis.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "0"))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", "0"))
+PREDICTION_CACHE_RESOLUTION = float(os.environ.get("PREDICTION_CACHE_RESOLUTION", "0.1"))
+
+
+class PredictionCache:
+    """
+    LRU berbatas dengan TTL opsional (ttl <= 0 berarti tanpa kedaluwarsa).
+    Aman dipakai dari banyak thread.
+    """
+
+    def __init__(self, maxsize=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL,
+                 resolution=PREDICTION_CACHE_RESOLUTION):
+        self.maxsize = int(maxsize)
+        self.ttl = float(ttl)
+        self.resolution = float(resolution)
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, values):
+        """Kuantisasi input ke kelipatan resolusi sensor"""
+        return tuple(int(round(float(v) / self.resolution)) for v in values)
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self.version = version
+
+    def get(self, key, version):
+        with self._lock:
+            self._check_version(version)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, version, payload):
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._check_version(version)
+            self._data[key] = (expires_at, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "resolution": self.resolution,
+            "model_version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
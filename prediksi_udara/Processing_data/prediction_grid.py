@@ -0,0 +1,325 @@
+"""
+Grid prediksi yang dihitung offline untuk domain input /predict.
+
+Domain input sudah dibatasi VALID_RANGES, sehingga forest bisa dievaluasi
+sekali untuk grid 4-D (suhu x kelembapan x tekanan x kecepatan_angin).
+Tensor probabilitas dan label disimpan sebagai .npy yang di-memory-map,
+lalu saat serving jawaban cukup diambil dengan lookup O(1):
+
+- nearest     : titik grid terdekat
+- interpolate : interpolasi multilinear dari 16 titik grid di sekitarnya
+- exact       : pakai grid hanya jika input tepat di titik grid,
+                selain itu dihitung dengan model asli
+
+Cara pakai:
+    python prediction_grid.py build --steps 1 1 1 0.5
+    python prediction_grid.py report --steps 2,2,2,1 1,1,1,0.5 0.5,0.5,0.5,0.25
+
+Di API: PREDICTION_GRID=prediction_grid_v3 PREDICTION_GRID_MODE=nearest python api_predict.py
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from dataset_stats import file_fingerprint
+from forest_engine import RAW_FLAT_MODEL_PATH, FlatForest
+from validasi_input import FEATURE_COLUMNS, RANGE_MAX, RANGE_MIN
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.pkl")
+SCALER_PATH = os.path.join(CURRENT_DIR, "scaler_beijing_v3.pkl")
+DATASET_PATH = os.path.join(CURRENT_DIR, "dataset_kualitas_udara_beijing_final.csv")
+GRID_DIR = os.path.join(CURRENT_DIR, "prediction_grid_v3")
+
+# Jarak antar titik grid per fitur (°C, titik embun, mb, m/s)
+DEFAULT_STEPS = [1.0, 1.0, 1.0, 0.5]
+GRID_MODES = ("nearest", "interpolate", "exact")
+
+CHUNK_ROWS = 65536
+
+
+def grid_axes(steps):
+    """Titik-titik grid per fitur, selalu mencakup batas min dan max VALID_RANGES"""
+    axes = []
+    for lo, hi, step in zip(RANGE_MIN, RANGE_MAX, steps):
+        count = int(np.ceil((hi - lo) / step - 1e-9)) + 1
+        axes.append(np.linspace(lo, hi, count))
+    return axes
+
+
+def load_scorer(model_path=MODEL_PATH, scaler_path=SCALER_PATH):
+    """
+    Fungsi X mentah -> probabilitas beserta classes_.
+    Forest input mentah (forest_engine --fold-scaler) dipakai jika ada karena jauh
+    lebih cepat, selain itu pickle sklearn + scaler.
+    """
+    raw_fingerprint = file_fingerprint(RAW_FLAT_MODEL_PATH)
+    model_fingerprint = file_fingerprint(model_path)
+    if raw_fingerprint is not None and model_fingerprint is not None and raw_fingerprint[1] >= model_fingerprint[1]:
+        flat = FlatForest.load(RAW_FLAT_MODEL_PATH)
+        return flat.predict_proba, np.asarray(flat.classes_)
+
+    import joblib
+
+    model = joblib.load(model_path)
+    scaler = joblib.load(scaler_path)
+    return (lambda X: model.predict_proba(scaler.transform(X))), np.asarray(model.classes_)
+
+
+def build_grid(score_fn, classes, steps=DEFAULT_STEPS, out_dir=GRID_DIR, source_path=MODEL_PATH):
+    """Evaluasi forest di seluruh titik grid dan simpan sebagai .npy (memmap)"""
+    axes = grid_axes(steps)
+    shape = tuple(len(axis) for axis in axes)
+    n_classes = len(classes)
+    total = int(np.prod(shape))
+
+    tmp_dir = f"{out_dir}.tmp{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    proba = np.lib.format.open_memmap(
+        os.path.join(tmp_dir, "proba.npy"), mode="w+", dtype=np.float32, shape=shape + (n_classes,)
+    )
+    labels = np.lib.format.open_memmap(
+        os.path.join(tmp_dir, "labels.npy"), mode="w+", dtype=np.uint8, shape=shape
+    )
+    proba_flat = proba.reshape(-1, n_classes)
+    labels_flat = labels.reshape(-1)
+
+    start_time = time.perf_counter()
+    for start in range(0, total, CHUNK_ROWS):
+        idx = np.arange(start, min(start + CHUNK_ROWS, total))
+        coords = np.unravel_index(idx, shape)
+        X = np.column_stack([axes[j][coords[j]] for j in range(len(axes))])
+        chunk_proba = score_fn(X)
+        proba_flat[idx] = chunk_proba
+        labels_flat[idx] = np.argmax(chunk_proba, axis=1)
+        done = idx[-1] + 1
+        print(f"\r   {done}/{total} titik ({done / total * 100:.1f}%)", end="", flush=True)
+    print()
+    proba.flush()
+    labels.flush()
+    del proba, labels, proba_flat, labels_flat
+
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "features": FEATURE_COLUMNS,
+            "min": RANGE_MIN.tolist(),
+            "max": RANGE_MAX.tolist(),
+            "shape": list(shape),
+            "steps": [float(s) for s in steps],
+            "classes": [str(c) for c in classes],
+            "source_fingerprint": file_fingerprint(source_path),
+            "build_seconds": round(time.perf_counter() - start_time, 2)
+        }, f, indent=2)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return shape
+
+
+class GridModel:
+    """
+    Model lookup grid dengan antarmuka seperti RandomForestClassifier
+    (classes_, predict_proba, predict). Input dalam satuan asli.
+
+    fallback: fungsi X mentah -> probabilitas (model asli), dipakai mode "exact"
+    untuk input yang tidak tepat di titik grid.
+    """
+
+    scaler_folded = True
+
+    def __init__(self, meta, proba, labels, fallback=None, mode="nearest", tolerance=1e-6):
+        if mode not in GRID_MODES:
+            raise ValueError(f"Mode grid tidak dikenal: {mode}")
+        if mode == "exact" and fallback is None:
+            raise ValueError("Mode 'exact' membutuhkan model fallback")
+        self.meta = meta
+        self.proba = proba
+        self.labels = labels
+        self.fallback = fallback
+        self.mode = mode
+        self.tolerance = tolerance
+        self.classes_ = np.asarray(meta["classes"], dtype=object)
+        self.lo = np.asarray(meta["min"], dtype=np.float64)
+        self.shape = np.asarray(meta["shape"], dtype=np.intp)
+        self.step = (np.asarray(meta["max"], dtype=np.float64) - self.lo) / (self.shape - 1)
+        # predict_proba dipanggil bersamaan dari beberapa thread request
+        self.fallback_rows = 0
+        self._fallback_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, grid_dir=GRID_DIR, fallback=None, mode="nearest", expected_fingerprint=None):
+        with open(os.path.join(grid_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if expected_fingerprint is not None and meta.get("source_fingerprint") != expected_fingerprint:
+            raise ValueError("Grid dibuat dari model yang berbeda, jalankan ulang prediction_grid.py build")
+        proba = np.load(os.path.join(grid_dir, "proba.npy"), mmap_mode="r")
+        labels = np.load(os.path.join(grid_dir, "labels.npy"), mmap_mode="r")
+        return cls(meta, proba, labels, fallback=fallback, mode=mode)
+
+    def _positions(self, X):
+        """Posisi pecahan input di dalam grid (dipotong ke batas grid)"""
+        return np.clip((X - self.lo) / self.step, 0, self.shape - 1)
+
+    def _nearest(self, pos):
+        idx = np.rint(pos).astype(np.intp)
+        return np.asarray(self.proba[idx[:, 0], idx[:, 1], idx[:, 2], idx[:, 3]], dtype=np.float64)
+
+    def _off_grid(self, pos):
+        return np.any(np.abs(pos - np.rint(pos)) > self.tolerance, axis=1)
+
+    def _count_fallback(self, n):
+        with self._fallback_lock:
+            self.fallback_rows += n
+
+    def _interpolate(self, pos):
+        base = np.minimum(np.floor(pos).astype(np.intp), self.shape - 2)
+        frac = pos - base
+        result = np.zeros((len(pos), len(self.classes_)), dtype=np.float64)
+        for corner in itertools.product((0, 1), repeat=pos.shape[1]):
+            corner = np.asarray(corner)
+            weight = np.prod(np.where(corner == 1, frac, 1 - frac), axis=1)
+            idx = base + corner
+            result += weight[:, None] * self.proba[idx[:, 0], idx[:, 1], idx[:, 2], idx[:, 3]]
+        return result
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        pos = self._positions(X)
+        if self.mode == "interpolate":
+            return self._interpolate(pos)
+        proba = self._nearest(pos)
+        if self.mode == "exact":
+            off_grid = self._off_grid(pos)
+            if off_grid.any():
+                proba[off_grid] = self.fallback(X[off_grid])
+                self._count_fallback(int(off_grid.sum()))
+        return proba
+
+    def predict(self, X):
+        if self.mode == "interpolate":
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+        # nearest/exact: label titik grid langsung dari labels.npy (uint8),
+        # tanpa membaca tensor probabilitas
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        pos = self._positions(X)
+        idx = np.rint(pos).astype(np.intp)
+        codes = np.asarray(self.labels[idx[:, 0], idx[:, 1], idx[:, 2], idx[:, 3]], dtype=np.intp)
+        if self.mode == "exact":
+            off_grid = self._off_grid(pos)
+            if off_grid.any():
+                codes[off_grid] = np.argmax(self.fallback(X[off_grid]), axis=1)
+                self._count_fallback(int(off_grid.sum()))
+        return self.classes_[codes]
+
+
+def _grid_report(score_fn, classes, steps, X_test, y_test, model_pred):
+    """Akurasi lookup grid (nearest & interpolate) untuk satu resolusi, tanpa membangun grid penuh"""
+    axes = grid_axes(steps)
+    shape = tuple(len(axis) for axis in axes)
+    lo = np.asarray([axis[0] for axis in axes])
+    step = np.asarray([axis[1] - axis[0] for axis in axes])
+    pos = np.clip((X_test - lo) / step, 0, np.asarray(shape) - 1)
+
+    def score_points(idx):
+        # Titik grid yang sama cukup dievaluasi sekali
+        unique_idx, inverse = np.unique(idx, axis=0, return_inverse=True)
+        return score_fn(lo + unique_idx * step)[inverse.reshape(-1)]
+
+    nearest = classes[np.argmax(score_points(np.rint(pos).astype(np.intp)), axis=1)]
+
+    base = np.minimum(np.floor(pos).astype(np.intp), np.asarray(shape) - 2)
+    frac = pos - base
+    interp = np.zeros((len(X_test), len(classes)))
+    for corner in itertools.product((0, 1), repeat=X_test.shape[1]):
+        corner = np.asarray(corner)
+        weight = np.prod(np.where(corner == 1, frac, 1 - frac), axis=1)
+        interp += weight[:, None] * score_points(base + corner)
+    interpolated = classes[np.argmax(interp, axis=1)]
+
+    n_points = int(np.prod(shape))
+    return {
+        "steps": [float(s) for s in steps],
+        "shape": list(shape),
+        "points": n_points,
+        "size_mb": round(n_points * (len(classes) * 4 + 1) / 1e6, 1),
+        "accuracy_nearest": round(float((nearest == y_test).mean()), 4),
+        "accuracy_interpolate": round(float((interpolated == y_test).mean()), 4),
+        "agreement_nearest": round(float((nearest == model_pred).mean()), 4),
+        "agreement_interpolate": round(float((interpolated == model_pred).mean()), 4)
+    }
+
+
+def report(score_fn, classes, steps_list, dataset_path=DATASET_PATH):
+    """Akurasi vs resolusi grid pada test split yang sama dengan cek_akurasi_model_v3.py"""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv(dataset_path, usecols=FEATURE_COLUMNS + ["kualitas_udara"])
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = df["kualitas_udara"].to_numpy()
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    model_pred = classes[np.argmax(score_fn(X_test), axis=1)]
+    accuracy_model = float((model_pred == y_test).mean())
+    print(f"   Data testing: {len(X_test)}, akurasi model asli: {accuracy_model:.4f}\n")
+    print(f"   {'steps':<24}{'titik':>12}{'MB':>9}{'akurasi NN':>12}{'akurasi interp':>16}"
+          f"{'sama NN':>10}{'sama interp':>13}")
+
+    rows = []
+    for steps in steps_list:
+        row = _grid_report(score_fn, classes, steps, X_test, y_test, model_pred)
+        rows.append(row)
+        print(f"   {str(row['steps']):<24}{row['points']:>12}{row['size_mb']:>9}"
+              f"{row['accuracy_nearest']:>12}{row['accuracy_interpolate']:>16}"
+              f"{row['agreement_nearest']:>10}{row['agreement_interpolate']:>13}")
+    return {"accuracy_model": round(accuracy_model, 4), "grids": rows}
+
+
+def _parse_steps(text):
+    steps = [float(s) for s in text.split(",")]
+    if len(steps) != len(FEATURE_COLUMNS) or any(s <= 0 for s in steps):
+        raise argparse.ArgumentTypeError(f"steps harus {len(FEATURE_COLUMNS)} angka positif, contoh 1,1,1,0.5")
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid prediksi offline untuk domain VALID_RANGES")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="evaluasi forest di seluruh grid dan simpan ke disk")
+    build.add_argument("--steps", type=float, nargs=len(FEATURE_COLUMNS), default=DEFAULT_STEPS)
+    build.add_argument("--output", default=GRID_DIR)
+
+    rep = sub.add_parser("report", help="akurasi vs resolusi grid pada test split")
+    rep.add_argument("--steps", type=_parse_steps, nargs="+",
+                     default=[[2, 2, 2, 1], [1, 1, 1, 0.5], [0.5, 0.5, 0.5, 0.25]])
+    rep.add_argument("--json", default=None, help="simpan hasil report ke file JSON")
+
+    args = parser.parse_args()
+    score_fn, classes = load_scorer()
+
+    if args.command == "build":
+        print("=== BUILD GRID PREDIKSI ===")
+        shape = build_grid(score_fn, classes, args.steps, args.output)
+        print(f"✅ Grid {shape} disimpan di {args.output}")
+        return
+
+    print("=== AKURASI VS RESOLUSI GRID ===")
+    result = report(score_fn, classes, args.steps)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Report disimpan: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Preprocessing streaming untuk data gabungan stasiun Beijing (PRSA).
+
+CSV dibaca per chunk, hanya kolom TEMP/DEWP/PRES/WSPM/PM2.5 dengan dtype
+eksplisit. Dalam satu kali jalan setiap chunk:
+- baris dengan nilai kosong dibuang (sama dengan dropna)
+- label kualitas udara dibuat tervektorisasi dari PM2.5 (np.select)
+- zona abu-abu PM2.5 33-37 dan 73-77 dibuang
+lalu langsung di-append ke file kolom di disk. Memori puncak hanya sebesar
+satu chunk, tidak bergantung pada jumlah file stasiun yang digabung.
+
+Output: folder kolumnar dengan format yang sama dengan cache dataset_loader.py
+(suhu.npy, kelembapan.npy, tekanan.npy, kecepatan_angin.npy float32,
+kualitas_udara.codes.npy int8, meta.json), dibuka dengan load_training_set()
+secara memory-map.
+
+Cara pakai:
+    python preprocess_stream.py beijing_gabungan.csv
+    python preprocess_stream.py PRSA_Data_*.csv --output dataset_beijing_v3.npycache
+    python preprocess_stream.py beijing_gabungan.parts     # hasil ingest_stations.py
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from dataset_loader import FEATURE_COLUMNS, FEATURE_DTYPE, LABEL_COLUMN, read_npy_columns, read_npy_meta
+from dataset_stats import file_fingerprint
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+TRAINING_SET_PATH = os.path.join(CURRENT_DIR, "dataset_beijing_v3.npycache")
+
+CHUNK_ROWS = int(os.environ.get("PREPROCESS_CHUNK_ROWS", "100000"))
+
+# Kolom asli PRSA -> nama kolom fitur
+RAW_FEATURES = {
+    "TEMP": "suhu",
+    "DEWP": "kelembapan",
+    "PRES": "tekanan",
+    "WSPM": "kecepatan_angin"
+}
+PM_COLUMN = "PM2.5"
+
+# Kategori label tetap (urutan sama dengan categorical hasil read_csv_lean),
+# sehingga kode label konsisten di semua chunk
+LABEL_CATEGORIES = ["Baik", "Buruk", "Sedang"]
+CODE_BAIK, CODE_BURUK, CODE_SEDANG = range(3)
+
+# Batas label V3: PM2.5 <= 35 Baik, <= 75 Sedang, > 75 Buruk
+BATAS_BAIK = 35
+BATAS_SEDANG = 75
+
+# Zona abu-abu di sekitar batas yang dibuang (inklusif)
+ZONA_ABU_ABU = [(33, 37), (73, 77)]
+
+
+def label_kualitas(pm):
+    """Kode label (int8) dari array PM2.5, versi vektor dari kategori_udara_v3"""
+    return np.select(
+        [pm <= BATAS_BAIK, pm <= BATAS_SEDANG],
+        [CODE_BAIK, CODE_SEDANG],
+        default=CODE_BURUK
+    ).astype(np.int8)
+
+
+def mask_zona_abu_abu(pm):
+    """True untuk PM2.5 di dalam zona abu-abu (akan dibuang)"""
+    mask = np.zeros(len(pm), dtype=bool)
+    for low, high in ZONA_ABU_ABU:
+        mask |= (pm >= low) & (pm <= high)
+    return mask
+
+
+def iter_chunks(csv_path, chunk_rows=CHUNK_ROWS):
+    """
+    Chunk berisi kolom fitur asli (float32) + PM2.5 (float64 agar batas label persis).
+    csv_path boleh berupa folder dataset berpartisi hasil ingest_stations.py.
+    """
+    if os.path.isdir(csv_path):
+        from ingest_stations import iter_partition_chunks
+
+        return iter_partition_chunks(csv_path, chunk_rows)
+    dtypes = {col: FEATURE_DTYPE for col in RAW_FEATURES}
+    dtypes[PM_COLUMN] = np.float64
+    return pd.read_csv(csv_path, usecols=list(dtypes), dtype=dtypes, chunksize=chunk_rows)
+
+
+def mask_baris(chunk):
+    """(keep, lengkap, abu_abu) per baris chunk mentah; keep = baris yang dipakai proses_chunk"""
+    pm = chunk[PM_COLUMN].to_numpy()
+    lengkap = ~np.isnan(pm)
+    for raw in RAW_FEATURES:
+        lengkap &= ~np.isnan(chunk[raw].to_numpy())
+    abu_abu = lengkap & mask_zona_abu_abu(pm)
+    return lengkap & ~abu_abu, lengkap, abu_abu
+
+
+def proses_chunk(chunk):
+    """
+    Satu chunk mentah -> (dict kolom fitur, kode label, statistik).
+    Semua filter dihitung sebagai satu mask, data hanya disalin sekali.
+    """
+    pm = chunk[PM_COLUMN].to_numpy()
+    features = {name: chunk[raw].to_numpy() for raw, name in RAW_FEATURES.items()}
+    keep, lengkap, abu_abu = mask_baris(chunk)
+
+    stats = {
+        "rows_read": int(len(chunk)),
+        "dropped_na": int((~lengkap).sum()),
+        "dropped_gray_zone": int(abu_abu.sum())
+    }
+    columns = {name: values[keep] for name, values in features.items()}
+    return columns, label_kualitas(pm[keep]), stats
+
+
+def finalize_npy(raw_path, npy_path, dtype, rows):
+    """Ubah file biner mentah (hasil tofile) menjadi .npy tanpa memuat isinya ke memori"""
+    header = {
+        "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+        "fortran_order": False,
+        "shape": (rows,)
+    }
+    with open(npy_path, "wb") as out:
+        np.lib.format.write_array_header_1_0(out, header)
+        with open(raw_path, "rb") as src:
+            shutil.copyfileobj(src, out, 1 << 20)
+    os.remove(raw_path)
+
+
+def build_training_set(csv_paths, output=TRAINING_SET_PATH, chunk_rows=CHUNK_ROWS):
+    """
+    Proses semua CSV secara streaming ke folder kolumnar `output`.
+    Ditulis ke folder sementara lalu di-rename (atomik). Mengembalikan meta.
+    """
+    tmp_dir = f"{output}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    outputs = {name: open(os.path.join(tmp_dir, f"{name}.raw"), "wb") for name in FEATURE_COLUMNS}
+    outputs[LABEL_COLUMN] = open(os.path.join(tmp_dir, f"{LABEL_COLUMN}.raw"), "wb")
+    totals = {"rows_read": 0, "dropped_na": 0, "dropped_gray_zone": 0}
+    label_counts = np.zeros(len(LABEL_CATEGORIES), dtype=np.int64)
+    rows = 0
+    sources = []
+    try:
+        for csv_path in csv_paths:
+            for chunk in iter_chunks(csv_path, chunk_rows):
+                columns, codes, stats = proses_chunk(chunk)
+                for name, values in columns.items():
+                    values.astype(FEATURE_DTYPE, copy=False).tofile(outputs[name])
+                codes.tofile(outputs[LABEL_COLUMN])
+                for key in totals:
+                    totals[key] += stats[key]
+                label_counts += np.bincount(codes, minlength=len(LABEL_CATEGORIES))
+                rows += len(codes)
+            # Untuk dataset berpartisi, perubahan terlihat dari manifest.json-nya
+            fingerprint_path = os.path.join(csv_path, "manifest.json") if os.path.isdir(csv_path) else csv_path
+            sources.append({"path": os.path.basename(csv_path), "fingerprint": file_fingerprint(fingerprint_path)})
+            print(f"   {os.path.basename(csv_path)}: total {rows} baris bersih")
+    except BaseException:
+        for f in outputs.values():
+            f.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    for f in outputs.values():
+        f.close()
+
+    for name in FEATURE_COLUMNS:
+        finalize_npy(os.path.join(tmp_dir, f"{name}.raw"), os.path.join(tmp_dir, f"{name}.npy"),
+                      FEATURE_DTYPE, rows)
+    finalize_npy(os.path.join(tmp_dir, f"{LABEL_COLUMN}.raw"),
+                  os.path.join(tmp_dir, f"{LABEL_COLUMN}.codes.npy"), np.int8, rows)
+
+    meta = {
+        "source_fingerprint": [source["fingerprint"] for source in sources],
+        "sources": sources,
+        "categories": LABEL_CATEGORIES,
+        "rows": rows,
+        **totals,
+        "label_counts": dict(zip(LABEL_CATEGORIES, label_counts.tolist()))
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(output, ignore_errors=True)
+    os.replace(tmp_dir, output)
+    return meta
+
+
+def load_training_set(path=TRAINING_SET_PATH):
+    """DataFrame (memory-map) dari folder hasil build_training_set"""
+    meta = read_npy_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"Training set tidak ditemukan: {path}")
+    return read_npy_columns(path, meta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocessing streaming data PRSA Beijing")
+    parser.add_argument("inputs", nargs="+", help="file CSV (boleh pola glob, mis. PRSA_Data_*.csv)")
+    parser.add_argument("--output", default=TRAINING_SET_PATH)
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    csv_paths = []
+    for pattern in args.inputs:
+        csv_paths.extend(sorted(glob.glob(pattern)) or [pattern])
+
+    print("=== PREPROCESSING STREAMING ===")
+    meta = build_training_set(csv_paths, args.output, args.chunksize)
+    print(f"\n✅ Training set kolumnar disimpan: {args.output}")
+    print(f"   Baris dibaca: {meta['rows_read']}, kosong dibuang: {meta['dropped_na']}, "
+          f"zona abu-abu dibuang: {meta['dropped_gray_zone']}")
+    print(f"   Baris bersih: {meta['rows']} {meta['label_counts']}")
+
+
+if __name__ == "__main__":
+    main()
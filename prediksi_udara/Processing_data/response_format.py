@@ -0,0 +1,198 @@
+"""
+Format response ringkas untuk klien mesin (content negotiation di /predict).
+
+Format dipilih dari header Accept:
+- application/json (default, juga untuk */* atau tanpa header Accept)
+- application/msgpack atau application/x-msgpack : MessagePack (butuh paket msgpack)
+- application/vnd.apache.arrow.stream             : Arrow IPC stream, hanya /predict/batch
+                                                    (butuh pyarrow)
+
+Format biner selalu memakai mode minimal; JSON memakai mode minimal dengan
+?mode=minimal. Mode minimal hanya berisi label + probabilitas: tanpa feedback,
+icon, skor maupun dict probabilitas per kelas. Probabilitas berupa array
+dengan urutan kelas tetap untuk satu versi model (GET /model/classes),
+versi model ada di field model_version dan header X-Model-Version.
+
+Response error tetap JSON apa pun formatnya (dibedakan dari status HTTP).
+"""
+import importlib.util
+import json
+
+import numpy as np
+from flask import Response, jsonify
+
+try:
+    import msgpack
+except ImportError:  # opsional
+    msgpack = None
+
+# pyarrow (opsional) lambat diimpor, jadi di sini hanya dicek keberadaannya;
+# modulnya baru diimpor saat response Arrow pertama dibuat (startup API tetap cepat)
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Kode label untuk baris batch yang tidak valid
+INVALID_LABEL = -1
+
+
+def negotiate(accept, batch=False):
+    """
+    Pilih format response dari header Accept (werkzeug MIMEAccept).
+    Mengembalikan None jika klien hanya menerima format biner yang
+    library-nya tidak terpasang (-> 406).
+    """
+    if not accept:
+        return JSON
+    offers = [JSON]
+    if msgpack is not None:
+        offers.extend(MSGPACK_TYPES)
+    if batch and ARROW_AVAILABLE:
+        offers.append(ARROW)
+    match = accept.best_match(offers)
+    if match is not None:
+        return match
+    # Accept tanpa format yang dikenal (mis. text/html saja) tetap dijawab JSON
+    wanted = MSGPACK_TYPES + ((ARROW,) if batch else ())
+    return None if any(accept.quality(mimetype) > 0 for mimetype in wanted) else JSON
+
+
+def not_acceptable(accept, batch=False):
+    """Response 406 untuk format biner yang tidak tersedia"""
+    missing = []
+    if msgpack is None:
+        missing.append("msgpack (pip install msgpack)")
+    if batch and not ARROW_AVAILABLE:
+        missing.append("pyarrow (pip install pyarrow)")
+    return jsonify({
+        "error": f"Format response {accept} tidak tersedia",
+        "missing": missing,
+        "available": [JSON] + (list(MSGPACK_TYPES) if msgpack is not None else [])
+                     + ([ARROW] if batch and ARROW_AVAILABLE else [])
+    }), 406
+
+
+class InvalidPayload(ValueError):
+    """Body request tidak bisa dibaca (dijawab 400 dengan pesan apa adanya)"""
+
+
+def read_payload(request):
+    """Body request: JSON, atau MessagePack jika Content-Type application/msgpack"""
+    if request.mimetype in MSGPACK_TYPES:
+        if msgpack is None:
+            raise InvalidPayload("Body MessagePack butuh paket msgpack (pip install msgpack)")
+        try:
+            return msgpack.unpackb(request.get_data(), raw=False)
+        except (ValueError, msgpack.UnpackException) as e:
+            # Pesan exception msgpack sering kosong (mis. FormatError)
+            detail = str(e) or type(e).__name__
+            raise InvalidPayload(f"Body MessagePack tidak valid ({detail})") from None
+    return request.get_json()
+
+
+def is_minimal(fmt, mode):
+    return fmt != JSON or mode == "minimal"
+
+
+# =====================================
+# PAYLOAD MINIMAL
+# =====================================
+def minimal_prediction(version, label, kualitas, probabilities):
+    """Satu prediksi: indeks kelas + probabilitas (urutan GET /model/classes)"""
+    return {
+        "model_version": version,
+        "label": int(label),
+        "kualitas": kualitas,
+        "probabilities": [float(p) for p in probabilities]
+    }
+
+
+def batch_codes(n_rows, valid_idx, probabilities):
+    """Kode label per baris (INVALID_LABEL untuk baris tidak valid)"""
+    codes = np.full(n_rows, INVALID_LABEL, dtype=np.int8)
+    if len(valid_idx):
+        codes[valid_idx] = np.argmax(probabilities, axis=1)
+    return codes
+
+
+def invalid_fields(valid_mask):
+    """Bitmask field di luar range per baris (bit i = FEATURE_COLUMNS[i])"""
+    return ((~valid_mask) << np.arange(valid_mask.shape[1])).sum(axis=1).astype(np.uint8)
+
+
+def minimal_batch(version, codes, probabilities, valid_idx, fields):
+    """
+    Batch: labels (INVALID_LABEL = tidak valid), invalid_fields (bitmask) dan
+    probabilitas baris valid saja (urutan baris sama dengan valid_idx).
+    """
+    return {
+        "model_version": version,
+        "total": int(len(codes)),
+        "valid": int(len(valid_idx)),
+        "labels": codes,
+        "invalid_fields": fields,
+        "probabilities": probabilities
+    }
+
+
+# =====================================
+# ENCODER
+# =====================================
+def encode_json(payload):
+    payload = dict(payload)
+    for key in ("labels", "invalid_fields", "probabilities"):
+        if isinstance(payload.get(key), np.ndarray):
+            payload[key] = payload[key].tolist()
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def encode_msgpack(payload):
+    """
+    Skalar & list float dikemas float32. Array batch dikirim sebagai bytes mentah
+    little-endian: labels int8, invalid_fields uint8, probabilities float32 (valid x kelas).
+    """
+    payload = dict(payload)
+    if isinstance(payload.get("labels"), np.ndarray):
+        payload["labels"] = payload["labels"].astype("<i1").tobytes()
+        payload["invalid_fields"] = payload["invalid_fields"].astype("<u1").tobytes()
+        payload["probabilities"] = np.ascontiguousarray(payload["probabilities"], dtype="<f4").tobytes()
+    return msgpack.packb(payload, use_bin_type=True, use_single_float=True)
+
+
+def encode_arrow(payload, class_names):
+    """Satu record batch: label (dictionary kelas), invalid_fields, prob_<kelas> (null jika tidak valid)"""
+    import pyarrow
+    import pyarrow.ipc
+
+    codes = payload["labels"]
+    valid = codes != INVALID_LABEL
+    proba = np.full((len(codes), len(class_names)), np.nan, dtype=np.float32)
+    proba[valid] = payload["probabilities"]
+    columns = {
+        "label": pyarrow.DictionaryArray.from_arrays(pyarrow.array(codes, mask=~valid), pyarrow.array(class_names)),
+        "invalid_fields": pyarrow.array(payload["invalid_fields"])
+    }
+    for i, name in enumerate(class_names):
+        columns[f"prob_{name}"] = pyarrow.array(proba[:, i], mask=~valid)
+    table = pyarrow.table(columns).replace_schema_metadata({"model_version": str(payload["model_version"])})
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def respond(payload, fmt, class_names=None):
+    """Response Flask untuk payload minimal dalam format hasil negosiasi"""
+    if fmt in MSGPACK_TYPES:
+        body = encode_msgpack(payload)
+    elif fmt == ARROW:
+        body = encode_arrow(payload, class_names)
+    else:
+        body = encode_json(payload)
+    response = Response(body, mimetype=fmt)
+    response.headers["X-Model-Version"] = str(payload["model_version"])
+    response.vary.add("Accept")
+    return response
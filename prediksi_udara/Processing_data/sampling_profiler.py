@@ -0,0 +1,110 @@
+"""
+Sampling profiler ringan untuk traffic live.
+
+Thread latar belakang mengambil stack semua thread (sys._current_frames)
+setiap `interval` detik dan menghitung stack yang sama. Hasilnya ditulis
+dalam format "collapsed stack" (satu baris per stack: frame;frame;frame jumlah)
+yang bisa langsung dibuka flamegraph.pl / speedscope.
+
+Opt-in, tidak aktif secara default:
+    PROFILER_OUTPUT=profile.txt python api_predict.py      # sampling terus-menerus
+    curl -X POST localhost:5000/admin/profile -d '{"seconds": 30}' \\
+         -H "Content-Type: application/json"               # sampling sesaat
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILER_INTERVAL_MS = float(os.environ.get("PROFILER_INTERVAL_MS", "5"))
+PROFILER_DUMP_SECONDS = float(os.environ.get("PROFILER_DUMP_SECONDS", "60"))
+
+
+def collapse_stack(frame):
+    """Frame -> 'modul:fungsi:baris;...' dari luar ke dalam"""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class SamplingProfiler:
+    """
+    thread_filter: fungsi tanpa argumen yang mengembalikan set ident thread
+    yang disampling (mis. hanya thread yang sedang melayani request),
+    None berarti semua thread.
+    """
+
+    def __init__(self, output, interval_ms=PROFILER_INTERVAL_MS, thread_filter=None,
+                 dump_seconds=PROFILER_DUMP_SECONDS):
+        self.output = output
+        self.interval = max(0.0005, float(interval_ms) / 1000.0)
+        self.thread_filter = thread_filter
+        self.dump_seconds = float(dump_seconds)
+        self.samples = 0
+        self.stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration=None):
+        """Mulai sampling; berhenti sendiri setelah `duration` detik jika diberikan"""
+        if self.running:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(duration,), name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.dump()
+
+    def sample_once(self):
+        own = threading.get_ident()
+        wanted = self.thread_filter() if self.thread_filter is not None else None
+        frames = sys._current_frames()
+        with self._lock:
+            self.samples += 1
+            for ident, frame in frames.items():
+                if ident == own or (wanted is not None and ident not in wanted):
+                    continue
+                self.stacks[collapse_stack(frame)] += 1
+
+    def top(self, n=20):
+        """Stack terbanyak beserta jumlah sample-nya"""
+        with self._lock:
+            return self.stacks.most_common(n)
+
+    def dump(self, path=None):
+        """Tulis collapsed stack ke file (atomik), kembalikan path-nya"""
+        path = path or self.output
+        with self._lock:
+            lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + ("\n" if lines else ""))
+        os.replace(tmp_path, path)
+        return path
+
+    def _run(self, duration):
+        deadline = time.monotonic() + duration if duration else None
+        next_dump = time.monotonic() + self.dump_seconds if self.dump_seconds > 0 else None
+        while not self._stop.wait(self.interval):
+            self.sample_once()
+            now = time.monotonic()
+            if next_dump is not None and now >= next_dump:
+                self.dump()
+                next_dump = now + self.dump_seconds
+            if deadline is not None and now >= deadline:
+                break
+        self.dump()
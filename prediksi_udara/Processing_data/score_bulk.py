@@ -0,0 +1,435 @@
+"""
+Skoring offline massal untuk arsip data sensor (relabel data historis) tanpa HTTP.
+
+Input dibaca per chunk (CSV, Parquet, atau folder kolumnar .npy seperti cache
+dataset_loader.py), setiap chunk divalidasi dengan aturan yang sama dengan API
+(validasi_input.VALID_RANGES) lalu dinilai tervektorisasi di process pool.
+Model dimuat seperti api_predict.py (registry berversi + MODEL_ENGINE), sekali
+per worker. Untuk chunk besar pakai sklearn atau flat_raw (perbandingan latency
+di forest_engine.py); compact paling lambat untuk chunk besar.
+
+Kolom input: suhu, kelembapan, tekanan, kecepatan_angin, atau nama asli PRSA
+(TEMP, DEWP, PRES, WSPM). Output kolumnar dengan urutan baris sama dengan input:
+
+    hasil.npycache/
+        kualitas_udara.codes.npy   # int8 indeks kelas, -1 = input di luar range
+        prob_Baik.npy ...          # float32 probabilitas per kelas (NaN jika tidak valid)
+        invalid_fields.npy         # uint8 bitmask field di luar range (bit i = FEATURE_COLUMNS[i])
+        meta.json                  # kelas, versi model, jumlah baris, distribusi label
+
+atau satu file .parquet jika --output berakhiran .parquet (butuh pyarrow), isi
+meta.json disimpan di metadata skema Parquet dengan key PARQUET_META_KEY.
+
+Setiap chunk yang selesai ditulis atomik ke <output>.progress/. Jika proses
+terputus, jalankan perintah yang sama lagi: chunk yang sudah ada dilewati
+(selama file input, ukuran chunk dan versi model tidak berubah).
+
+Cara pakai:
+    python score_bulk.py arsip_2013_2017.csv --output label_2013_2017.npycache
+    python score_bulk.py arsip.parquet --output label.parquet --jobs 4 --chunk-rows 200000
+    python score_bulk.py beijing_gabungan.csv --output hasil.npycache --version 20250101-120000
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from dataset_loader import LABEL_COLUMN, read_npy_meta
+from dataset_stats import file_fingerprint
+from ingest_stations import NA_VALUES
+from model_registry import ModelRegistry, legacy_version, load_bundle
+from preprocess_stream import RAW_FEATURES, finalize_npy
+from validasi_input import FEATURE_COLUMNS, validasi_range
+
+CHUNK_ROWS = int(os.environ.get("BULK_CHUNK_ROWS", "100000"))
+MODEL_ENGINE = os.environ.get("MODEL_ENGINE", "sklearn")
+PROGRESS_INTERVAL = 5.0
+PROGRESS_NAME = "progress.json"
+# Key metadata skema Parquet untuk meta.json (pyarrow: schema.metadata[PARQUET_META_KEY])
+PARQUET_META_KEY = b"prediksi_udara"
+
+# Bundle model milik proses ini (dimuat sekali oleh init_worker)
+_BUNDLE = None
+
+
+# =====================================
+# BACA INPUT PER CHUNK
+# =====================================
+def resolve_columns(columns):
+    """Nama kolom input untuk FEATURE_COLUMNS (nama fitur API atau nama asli PRSA)"""
+    columns = set(columns)
+    for candidate in (FEATURE_COLUMNS, list(RAW_FEATURES)):
+        if columns.issuperset(candidate):
+            return list(candidate)
+    raise ValueError(f"Kolom input harus {', '.join(FEATURE_COLUMNS)} "
+                     f"atau {', '.join(RAW_FEATURES)}; ditemukan: {', '.join(sorted(columns))}")
+
+
+def is_parquet(path):
+    return path.endswith((".parquet", ".pq"))
+
+
+def parquet_module():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("File Parquet butuh pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def source_fingerprint(source):
+    """Fingerprint input; folder kolumnar dilihat dari meta.json-nya"""
+    path = os.path.join(source, "meta.json") if os.path.isdir(source) else source
+    fingerprint = file_fingerprint(path)
+    if fingerprint is None:
+        raise FileNotFoundError(f"Input tidak ditemukan: {source}")
+    return fingerprint
+
+
+def count_rows(source):
+    """Jumlah baris jika bisa diketahui tanpa membaca data (None untuk CSV)"""
+    if os.path.isdir(source):
+        return read_npy_meta(source)["rows"]
+    if is_parquet(source):
+        return parquet_module().parquet.ParquetFile(source).metadata.num_rows
+    return None
+
+
+def iter_input(source, chunk_rows, first_chunk=0):
+    """
+    (indeks chunk, matrix float64 (n, 4) urutan FEATURE_COLUMNS) per chunk,
+    mulai dari chunk first_chunk (baris sebelumnya dilewati tanpa dinilai).
+    """
+    skip = first_chunk * chunk_rows
+    if os.path.isdir(source):
+        meta = read_npy_meta(source)
+        if meta is None:
+            raise FileNotFoundError(f"Folder kolumnar tidak valid: {source}")
+        names = resolve_columns(name[:-4] for name in os.listdir(source) if name.endswith(".npy"))
+        columns = [np.load(os.path.join(source, f"{name}.npy"), mmap_mode="r") for name in names]
+        for index, start in enumerate(range(skip, meta["rows"], chunk_rows), first_chunk):
+            yield index, np.column_stack([col[start:start + chunk_rows] for col in columns]).astype(np.float64)
+        return
+
+    if is_parquet(source):
+        parquet_file = parquet_module().parquet.ParquetFile(source)
+        names = resolve_columns(parquet_file.schema_arrow.names)
+        batches = parquet_file.iter_batches(batch_size=chunk_rows, columns=names)
+        for index, batch in enumerate(batches):
+            if index < first_chunk:
+                continue
+            yield index, np.column_stack([
+                batch.column(name).to_numpy(zero_copy_only=False) for name in names
+            ]).astype(np.float64)
+        return
+
+    names = resolve_columns(pd.read_csv(source, nrows=0).columns)
+    reader = pd.read_csv(
+        source,
+        usecols=names,
+        dtype={name: np.float64 for name in names},
+        na_values=NA_VALUES,
+        skiprows=range(1, skip + 1) if skip else None,
+        chunksize=chunk_rows
+    )
+    for index, chunk in enumerate(reader, first_chunk):
+        yield index, chunk[names].to_numpy()
+
+
+# =====================================
+# SKOR PER CHUNK (WORKER)
+# =====================================
+def init_worker(version, engine, single_thread):
+    global _BUNDLE
+    with warnings.catch_warnings():
+        # Scaler di-fit dengan DataFrame, input di sini matrix biasa (urutan kolom sama)
+        warnings.simplefilter("ignore", UserWarning)
+        _BUNDLE = load_bundle(version, engine)
+    if single_thread and hasattr(_BUNDLE.model, "n_jobs"):
+        # Paralelisme sudah di level chunk, hindari oversubscription
+        _BUNDLE.model.n_jobs = 1
+
+
+def part_path(progress_dir, index):
+    return os.path.join(progress_dir, f"chunk-{index:06d}.npz")
+
+
+def score_chunk(index, X, progress_dir):
+    """Validasi + skor satu chunk, hasil ditulis atomik ke progress_dir"""
+    start = time.perf_counter()
+    valid_mask = validasi_range(X)
+    row_ok = valid_mask.all(axis=1)
+    classes = np.asarray(_BUNDLE.classes_).astype(str)
+
+    codes = np.full(len(X), -1, dtype=np.int8)
+    proba = np.full((len(X), len(classes)), np.nan, dtype=np.float32)
+    if row_ok.any():
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            _, probabilities = _BUNDLE.score(X[row_ok])
+        codes[row_ok] = np.argmax(probabilities, axis=1)
+        proba[row_ok] = probabilities
+    invalid_fields = ((~valid_mask) << np.arange(len(FEATURE_COLUMNS))).sum(axis=1).astype(np.uint8)
+
+    path = part_path(progress_dir, index)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, codes=codes, proba=proba, invalid_fields=invalid_fields, classes=classes)
+    os.replace(tmp_path, path)
+    return {"index": index, "rows": len(X), "valid": int(row_ok.sum()),
+            "seconds": time.perf_counter() - start}
+
+
+# =====================================
+# PROGRESS & RESUME
+# =====================================
+def prepare_progress(progress_dir, state, restart=False):
+    """
+    Buka folder progress; mengembalikan indeks chunk yang sudah selesai.
+    Progress dari input / ukuran chunk / model yang berbeda dibuang.
+    """
+    state_path = os.path.join(progress_dir, PROGRESS_NAME)
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = None
+
+    if previous is not None and (restart or previous != state):
+        if not restart:
+            print("⚠️  Input, ukuran chunk atau versi model berubah, progress lama dibuang")
+        shutil.rmtree(progress_dir, ignore_errors=True)
+        previous = None
+    if previous is None:
+        shutil.rmtree(progress_dir, ignore_errors=True)
+        os.makedirs(progress_dir)
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        return set()
+    return {
+        int(name[6:12]) for name in os.listdir(progress_dir)
+        if name.startswith("chunk-") and name.endswith(".npz")
+    }
+
+
+class Progress:
+    """Cetak progress & throughput paling sering setiap PROGRESS_INTERVAL detik"""
+
+    def __init__(self, total_rows, done_rows):
+        self.total_rows = total_rows
+        self.done_rows = done_rows
+        self.scored_rows = 0
+        self.start = time.perf_counter()
+        self.last_print = self.start
+
+    def update(self, result, force=False):
+        if result is not None:
+            self.done_rows += result["rows"]
+            self.scored_rows += result["rows"]
+        now = time.perf_counter()
+        if not force and now - self.last_print < PROGRESS_INTERVAL:
+            return
+        self.last_print = now
+        total = f"/{self.total_rows} ({self.done_rows / max(self.total_rows, 1) * 100:.1f}%)" if self.total_rows else ""
+        print(f"   {self.done_rows}{total} baris, {self.rows_per_second():,.0f} baris/s")
+
+    def seconds(self):
+        return time.perf_counter() - self.start
+
+    def rows_per_second(self):
+        return self.scored_rows / max(self.seconds(), 1e-9)
+
+
+# =====================================
+# GABUNG CHUNK KE OUTPUT KOLUMNAR
+# =====================================
+def iter_parts(progress_dir, n_chunks):
+    for index in range(n_chunks):
+        with np.load(part_path(progress_dir, index)) as part:
+            yield {key: part[key] for key in part.files}
+
+
+def finalize_npy_dir(progress_dir, output, n_chunks, meta):
+    tmp_dir = f"{output}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    names = [f"{LABEL_COLUMN}.codes", "invalid_fields"] + [f"prob_{cls}" for cls in meta["categories"]]
+    dtypes = dict(zip(names, [np.int8, np.uint8] + [np.float32] * len(meta["categories"])))
+    outputs = {name: open(os.path.join(tmp_dir, f"{name}.raw"), "wb") for name in names}
+    try:
+        for part in iter_parts(progress_dir, n_chunks):
+            part["codes"].tofile(outputs[names[0]])
+            part["invalid_fields"].tofile(outputs[names[1]])
+            for i, cls in enumerate(meta["categories"]):
+                np.ascontiguousarray(part["proba"][:, i]).tofile(outputs[f"prob_{cls}"])
+    finally:
+        for f in outputs.values():
+            f.close()
+    for name in names:
+        finalize_npy(os.path.join(tmp_dir, f"{name}.raw"), os.path.join(tmp_dir, f"{name}.npy"),
+                     dtypes[name], meta["rows"])
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(output, ignore_errors=True)
+    os.replace(tmp_dir, output)
+
+
+def finalize_parquet(progress_dir, output, n_chunks, meta):
+    pa = parquet_module()
+    categories = pa.array(meta["categories"])
+    tmp_path = f"{output}.tmp{os.getpid()}"
+    writer = None
+    try:
+        for part in iter_parts(progress_dir, n_chunks):
+            codes = part["codes"]
+            columns = {
+                LABEL_COLUMN: pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes < 0), categories),
+                "invalid_fields": pa.array(part["invalid_fields"])
+            }
+            for i, cls in enumerate(meta["categories"]):
+                columns[f"prob_{cls}"] = pa.array(part["proba"][:, i])
+            table = pa.table(columns)
+            if writer is None:
+                metadata = {PARQUET_META_KEY: json.dumps(meta).encode("utf-8")}
+                writer = pa.parquet.ParquetWriter(tmp_path, table.schema.with_metadata(metadata))
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("Input kosong, tidak ada yang ditulis")
+    os.replace(tmp_path, output)
+
+
+def summarize_parts(progress_dir, n_chunks):
+    """Jumlah baris, baris valid & distribusi label dari semua chunk (termasuk sesi sebelumnya)"""
+    rows = valid = 0
+    counts = None
+    classes = []
+    for part in iter_parts(progress_dir, n_chunks):
+        classes = part["classes"].tolist()
+        codes = part["codes"]
+        rows += len(codes)
+        valid += int((codes >= 0).sum())
+        chunk_counts = np.bincount(codes[codes >= 0], minlength=len(classes))
+        counts = chunk_counts if counts is None else counts + chunk_counts
+    label_counts = dict(zip(classes, counts.tolist())) if counts is not None else {}
+    return {"categories": classes, "rows": rows, "valid": valid, "label_counts": label_counts}
+
+
+# =====================================
+# JALANKAN
+# =====================================
+def run(source, output, version=None, engine=MODEL_ENGINE, jobs=1, chunk_rows=CHUNK_ROWS, restart=False):
+    version = version or ModelRegistry().latest_version()
+    progress_dir = f"{output}.progress"
+    state = {
+        "source": os.path.abspath(source),
+        "fingerprint": source_fingerprint(source),
+        "chunk_rows": chunk_rows,
+        "model_version": version or legacy_version(),
+        "engine": engine
+    }
+    done = prepare_progress(progress_dir, state, restart)
+    first_missing = 0
+    while first_missing in done:
+        first_missing += 1
+    if done:
+        print(f"⏭️  {len(done)} chunk sudah selesai di sesi sebelumnya, mulai dari chunk {first_missing}")
+
+    total_rows = count_rows(source)
+    skipped_rows = first_missing * chunk_rows
+    if total_rows is not None:
+        skipped_rows = min(skipped_rows, total_rows)
+    progress = Progress(total_rows, skipped_rows)
+    n_chunks = first_missing
+    pool = None
+    if jobs > 1:
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(version, engine, True))
+    else:
+        init_worker(version, engine, False)
+    try:
+        running = set()
+        for index, X in iter_input(source, chunk_rows, first_missing):
+            n_chunks = index + 1
+            if index in done:
+                progress.done_rows += len(X)
+                continue
+            if pool is None:
+                progress.update(score_chunk(index, X, progress_dir))
+                continue
+            if len(running) >= 2 * jobs:
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    progress.update(future.result())
+            running.add(pool.submit(score_chunk, index, X, progress_dir))
+            del X
+        for future in wait(running).done:
+            progress.update(future.result())
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    progress.update(None, force=True)
+    seconds = progress.seconds()
+
+    meta = {
+        **summarize_parts(progress_dir, n_chunks),
+        "source": state["source"],
+        "model_version": state["model_version"],
+        "engine": engine,
+        "invalid_fields_bits": FEATURE_COLUMNS
+    }
+    if is_parquet(output):
+        finalize_parquet(progress_dir, output, n_chunks, meta)
+    else:
+        finalize_npy_dir(progress_dir, output, n_chunks, meta)
+    shutil.rmtree(progress_dir, ignore_errors=True)
+
+    return {
+        **meta,
+        "output": os.path.abspath(output),
+        "jobs": jobs,
+        "chunk_rows": chunk_rows,
+        "scored_rows": progress.scored_rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(progress.rows_per_second(), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skoring offline massal arsip data sensor")
+    parser.add_argument("source", help="CSV, Parquet, atau folder kolumnar .npy")
+    parser.add_argument("--output", required=True, help="folder kolumnar hasil, atau file .parquet")
+    parser.add_argument("--version", default=None, help="versi model registry (default terbaru)")
+    parser.add_argument("--engine", default=MODEL_ENGINE,
+                        choices=["sklearn", "flat", "flat_raw", "compact", "compact_raw"])
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--restart", action="store_true", help="abaikan progress sesi sebelumnya")
+    parser.add_argument("--report", default=None, help="simpan ringkasan & throughput ke file JSON")
+    args = parser.parse_args()
+
+    print("=== SKORING OFFLINE ===")
+    result = run(args.source, args.output, args.version, args.engine, max(1, args.jobs),
+                 args.chunk_rows, args.restart)
+    print(f"\n✅ {result['rows']} baris ({result['valid']} valid, {result['rows'] - result['valid']} di luar range)")
+    print(f"   Distribusi label: {result['label_counts']}")
+    print(f"   Dinilai sesi ini: {result['scored_rows']} baris dalam {result['seconds']}s "
+          f"= {result['rows_per_second']:,.0f} baris/s ({result['jobs']} proses, model {result['model_version']}, "
+          f"engine {result['engine']})")
+    print(f"💾 Output: {result['output']}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Laporan: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Server produksi multi-proses untuk API Prediksi Kualitas Udara.
+
+Model, scaler dan dataset dimuat SEKALI di proses induk (preload), lalu
+proses induk mem-fork N worker yang berbagi page memori tersebut secara
+copy-on-write. Semua worker menerima koneksi dari satu socket yang sama.
+Worker yang mati otomatis dijalankan ulang.
+
+Cara pakai:
+    python serve.py                         # worker = jumlah core
+    python serve.py --workers 4 --port 5000
+    API_WORKERS=4 python serve.py
+
+Alternatif dengan gunicorn (opsional, tidak ada di requirements.txt):
+    gunicorn -c gunicorn.conf.py api_predict:app
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+DEFAULT_WORKERS = int(os.environ.get("API_WORKERS", os.cpu_count() or 1))
+
+
+def load_app():
+    """
+    Preload hook: impor api_predict lalu muat model, scaler dan dataset di
+    proses induk (api_predict.preload menunggu loader latar belakang selesai,
+    thread tidak ikut ter-fork), lalu bekukan objek yang ada agar GC worker
+    tidak menyentuh page-nya (mencegah copy-on-write yang tidak perlu).
+    """
+    import api_predict
+
+    api_predict.preload()
+    gc.collect()
+    gc.freeze()
+    return api_predict.app
+
+
+def create_listen_socket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, host, port, threaded):
+    """Loop worker: server WSGI Werkzeug di atas socket milik induk"""
+    from werkzeug.serving import make_server
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    server = make_server(host, port, app, threaded=threaded, fd=sock.fileno())
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+
+def spawn_worker(app, sock, host, port, threaded):
+    pid = os.fork()
+    if pid == 0:
+        run_worker(app, sock, host, port, threaded)
+    return pid
+
+
+def serve(host="0.0.0.0", port=5000, workers=DEFAULT_WORKERS, threaded=False):
+    app = load_app()
+    sock = create_listen_socket(host, port)
+    print(f"🚀 Preload selesai, menjalankan {workers} worker di http://{host}:{port}")
+
+    children = {spawn_worker(app, sock, host, port, threaded) for _ in range(workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"⚠️  Worker {pid} berhenti (status {status}), menjalankan ulang")
+            time.sleep(0.5)
+            children.add(spawn_worker(app, sock, host, port, threaded))
+
+    sock.close()
+    print("👋 Server dihentikan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server multi-proses API prediksi")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "5000")))
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--threaded", action="store_true",
+                        help="setiap worker melayani request dengan thread terpisah")
+    args = parser.parse_args()
+    serve(args.host, args.port, max(1, args.workers), args.threaded)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Cold start cepat untuk api_predict.py: status startup, liveness vs readiness,
+dan resource yang baru dimuat saat pertama kali dibutuhkan.
+
+- Liveness  (GET /health/live)  : proses hidup dan menjawab HTTP, 200 sejak socket dibuka
+- Readiness (GET /health/ready) : model sudah dimuat + warm-up, 503 sebelum itu
+
+STARTUP_MODE:
+- "background" (default): import api_predict tidak memuat model. Unpickle model
+  (beserta import sklearn/joblib) dan warm-up batch sintetis berjalan di thread
+  latar belakang sementara server sudah menerima koneksi.
+- "eager": model dimuat saat import, server baru jalan setelah model siap
+  (perilaku lama).
+
+Waktu setiap fase dicatat dalam detik sejak proses dibuat (termasuk start
+interpreter, dibaca dari /proc jika tersedia) dan tampil di /health/ready.
+"""
+import os
+import threading
+import time
+
+STARTUP_MODES = ("background", "eager")
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "background")
+
+
+def process_uptime():
+    """Detik sejak proses dibuat menurut kernel (Linux), None jika tidak tersedia"""
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            # Field setelah "(comm)" dimulai dari field ke-3; starttime = field ke-22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", encoding="ascii") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupState:
+    """Mode startup, status pemuatan model dan waktu setiap fase"""
+
+    def __init__(self, mode=STARTUP_MODE):
+        if mode not in STARTUP_MODES:
+            print(f"⚠️  STARTUP_MODE '{mode}' tidak dikenal, memakai background")
+            mode = "background"
+        self.mode = mode
+        self.status = "starting"
+        self.error = None
+        self.phases = {}
+        self._started = time.perf_counter()
+        # Tanpa /proc waktu dihitung sejak objek ini dibuat (awal import api_predict)
+        self._offset = process_uptime() or 0.0
+        self._thread = None
+
+    def elapsed(self):
+        """Detik sejak proses dibuat"""
+        return self._offset + time.perf_counter() - self._started
+
+    def mark(self, phase):
+        """Catat waktu fase, hanya kejadian pertama yang disimpan"""
+        if phase not in self.phases:
+            self.phases[phase] = round(self.elapsed(), 3)
+
+    @property
+    def loading(self):
+        return self.status in ("starting", "loading")
+
+    def run(self, load):
+        """
+        Jalankan load() (memuat model + warm-up) sesuai mode: langsung
+        (eager) atau di thread latar belakang. Exception dicatat di status.
+        """
+        def target():
+            try:
+                load()
+            except Exception as e:
+                self.error = str(e)
+                self.status = "failed"
+                self.mark("failed")
+                return
+            self.status = "ready"
+            self.mark("ready")
+
+        self.status = "loading"
+        if self.mode == "eager":
+            target()
+            return
+        self._thread = threading.Thread(target=target, name="model-startup", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        """Blok sampai pemuatan selesai (preload sebelum fork); True jika model siap"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.status == "ready"
+
+    def info(self):
+        return {
+            "mode": self.mode,
+            "status": self.status,
+            "error": self.error,
+            "uptime_seconds": round(self.elapsed(), 3),
+            "phases": dict(self.phases)
+        }
+
+
+class LazyResource:
+    """
+    Nilai yang dibuat oleh factory() saat get() pertama kali dipanggil.
+    Thread-safe: request bersamaan menunggu satu pemuatan yang sama.
+
+    Hasil None atau exception tidak disimpan: get() berikutnya mencoba lagi.
+    watch (opsional): fungsi tanpa argumen yang mengembalikan fingerprint
+    sumber nilai (mis. ukuran + mtime file), dicek paling sering sekali per
+    check_interval detik; jika berubah nilai dibuat ulang.
+    """
+
+    def __init__(self, factory, watch=None, check_interval=1.0):
+        self._factory = factory
+        self._watch = watch
+        self._check_interval = check_interval
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded = False
+        self._watched = None
+        self._last_check = 0.0
+        self.load_seconds = None
+        # Bertambah setiap pemuatan berhasil (watch untuk resource turunan)
+        self.generation = 0
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def peek(self):
+        """Nilai jika sudah dimuat, None jika belum (tanpa memicu pemuatan)"""
+        return self._value if self._loaded else None
+
+    def _stale(self):
+        """True jika fingerprint sumber berubah sejak nilai dimuat"""
+        if self._watch is None or time.monotonic() - self._last_check < self._check_interval:
+            return False
+        self._last_check = time.monotonic()
+        return self._watch() != self._watched
+
+    def get(self):
+        # Nilai dibaca sebelum flag: pemuatan ulang menurunkan _loaded lebih
+        # dulu sebelum _value dikosongkan
+        value = self._value
+        if self._loaded and not self._stale():
+            return value
+        with self._lock:
+            if not self._loaded or (self._watch is not None and self._watch() != self._watched):
+                # Nilai lama dilepas dulu: jika pemuatan ulang gagal,
+                # pemanggil mendapat None, bukan isi sumber yang sudah usang
+                self._loaded = False
+                self._value = None
+                watched = self._watch() if self._watch is not None else None
+                start = time.perf_counter()
+                value = self._factory()
+                if value is None:
+                    return None
+                self.load_seconds = time.perf_counter() - start
+                self._value = value
+                self._watched = watched
+                self._last_check = time.monotonic()
+                self.generation += 1
+                self._loaded = True
+        return self._value
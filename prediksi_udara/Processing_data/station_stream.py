@@ -0,0 +1,344 @@
+"""
+Streaming prediksi untuk feed stasiun yang berjalan terus (POST /predict/stream).
+
+Request dan response berupa NDJSON (satu objek JSON per baris) dengan
+Transfer-Encoding: chunked, koneksi tetap terbuka selama sensor mengirim data:
+
+    {"station": "Aotizhongxin", "timestamp": "2017-03-01T10:00:00", "suhu": 10, "kelembapan": -5,
+     "tekanan": 1015, "kecepatan_angin": 3}
+
+Thread pembaca memasukkan baris ke antrian terbatas; baris dikumpulkan sampai
+STREAM_BATCH_ROWS baris atau STREAM_MAX_WAIT_MS sejak baris pertama, lalu
+dinilai dengan satu panggilan forest (seperti microbatch.py). Setiap baris input
+yang tidak kosong dijawab tepat satu baris output dengan urutan yang sama
+(field seq = nomor baris di body request, mulai 1; baris kosong dilewati tanpa
+output tetapi tetap dihitung), baris yang tidak valid dijawab dengan error
+tanpa memutus stream.
+
+Setiap stasiun menyimpan jumlah prediksi per kelas untuk STREAM_WINDOW_HOURS
+jam terakhir (ring buffer per jam, ukuran tetap); stasiun yang paling lama
+tidak mengirim data dibuang jika jumlahnya melebihi STREAM_MAX_STATIONS.
+Agregat ini dikirim di setiap baris output (field rolling) dan di
+GET /stream/stations. Agregat disimpan per proses worker.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import numpy as np
+
+from response_format import minimal_prediction
+from validasi_input import FEATURE_COLUMNS, get_validation_errors, validasi_range
+
+STREAM_BATCH_ROWS = int(os.environ.get("STREAM_BATCH_ROWS", "256"))
+STREAM_MAX_WAIT_MS = float(os.environ.get("STREAM_MAX_WAIT_MS", "50"))
+STREAM_WINDOW_HOURS = int(os.environ.get("STREAM_WINDOW_HOURS", "24"))
+STREAM_MAX_STATIONS = int(os.environ.get("STREAM_MAX_STATIONS", "1000"))
+# Batas baris yang menunggu dinilai (backpressure ke klien) dan panjang satu baris
+STREAM_QUEUE_LINES = 4 * STREAM_BATCH_ROWS
+MAX_LINE_BYTES = 64 * 1024
+
+NDJSON = "application/x-ndjson"
+# Epoch detik 9999-12-31 (batas datetime), timestamp numerik harus di bawahnya
+MAX_TIMESTAMP = 253402300800
+
+
+class LineTooLong(ValueError):
+    """Baris input lebih panjang dari MAX_LINE_BYTES (dijawab satu baris error)"""
+
+
+# =====================================
+# AGREGAT BERGULIR PER STASIUN
+# =====================================
+class RollingWindow:
+    """Jumlah prediksi per kelas untuk n_hours jam terakhir (ring buffer per jam)"""
+
+    __slots__ = ("n_hours", "counts", "total", "latest")
+
+    def __init__(self, n_hours, n_classes):
+        self.n_hours = n_hours
+        self.counts = [[0] * n_classes for _ in range(n_hours)]
+        self.total = [0] * n_classes
+        self.latest = None
+
+    def add(self, hour, label):
+        """Tambah satu prediksi; False jika jam-nya sudah di luar jendela"""
+        if self.latest is None or hour > self.latest:
+            # Geser jendela: slot jam yang keluar dari jendela dikosongkan
+            start = hour - self.n_hours + 1 if self.latest is None else max(self.latest + 1, hour - self.n_hours + 1)
+            for h in range(start, hour + 1):
+                slot = self.counts[h % self.n_hours]
+                for k, count in enumerate(slot):
+                    self.total[k] -= count
+                    slot[k] = 0
+            self.latest = hour
+        elif hour <= self.latest - self.n_hours:
+            return False
+        self.counts[hour % self.n_hours][label] += 1
+        self.total[label] += 1
+        return True
+
+    def snapshot(self, classes):
+        count = sum(self.total)
+        return {
+            "hours": self.n_hours,
+            "count": count,
+            "share": {name: round(n / count, 4) if count else 0.0 for name, n in zip(classes, self.total)}
+        }
+
+
+class StationAggregates:
+    """RollingWindow per stasiun, paling banyak max_stations (LRU), aman antar thread"""
+
+    def __init__(self, n_hours=STREAM_WINDOW_HOURS, max_stations=STREAM_MAX_STATIONS):
+        self.n_hours = max(1, n_hours)
+        self.max_stations = max(1, max_stations)
+        self.classes = None
+        self.late = 0
+        self.evicted = 0
+        self.resets = 0
+        self._stations = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, rows, class_names):
+        """
+        rows: list (stasiun, jam, nama kelas) berurutan. Mengembalikan snapshot
+        agregat stasiun setelah setiap baris ditambahkan.
+        """
+        snapshots = []
+        with self._lock:
+            if self.classes != list(class_names):
+                # Model baru (hot reload) dengan kelas berbeda: hitungan lama
+                # tidak bisa dipetakan ke kelas baru, window dimulai ulang
+                if self.classes is not None:
+                    self._stations.clear()
+                    self.resets += 1
+                self.classes = list(class_names)
+            index = {name: k for k, name in enumerate(self.classes)}
+            for station, hour, name in rows:
+                window = self._stations.get(station)
+                if window is None:
+                    window = self._stations[station] = RollingWindow(self.n_hours, len(self.classes))
+                    if len(self._stations) > self.max_stations:
+                        self._stations.popitem(last=False)
+                        self.evicted += 1
+                else:
+                    self._stations.move_to_end(station)
+                if not window.add(hour, index[name]):
+                    self.late += 1
+                snapshots.append(window.snapshot(self.classes))
+        return snapshots
+
+    def get(self, station):
+        with self._lock:
+            window = self._stations.get(station)
+            return None if window is None else self._info(window)
+
+    def _info(self, window):
+        return {
+            **window.snapshot(self.classes),
+            "latest_hour": datetime.fromtimestamp(window.latest * 3600, timezone.utc).isoformat(timespec="minutes")
+        }
+
+    def info(self):
+        with self._lock:
+            return {
+                "window_hours": self.n_hours,
+                "max_stations": self.max_stations,
+                "late_readings": self.late,
+                "evicted_stations": self.evicted,
+                "class_resets": self.resets,
+                "stations": {station: self._info(window) for station, window in self._stations.items()}
+            }
+
+
+# =====================================
+# PARSING BARIS NDJSON
+# =====================================
+def parse_hour(value):
+    """Jam (sejak epoch, UTC) dari epoch detik atau string ISO 8601; None = waktu server"""
+    if value is None:
+        return int(time.time() // 3600)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if not (0 <= value < MAX_TIMESTAMP):
+            raise ValueError(f"timestamp {value} di luar rentang")
+        return int(value // 3600)
+    if isinstance(value, str):
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return int(moment.timestamp() // 3600)
+    raise ValueError("timestamp harus epoch detik atau string ISO 8601")
+
+
+def parse_reading(line, default_station):
+    """Satu baris NDJSON -> (stasiun, jam, array 4 fitur); ValueError jika tidak valid"""
+    try:
+        data = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"JSON tidak valid: {str(e)}")
+    if not isinstance(data, dict):
+        raise ValueError("Setiap baris harus berupa objek")
+    station = data.get("station", default_station)
+    if station is None:
+        raise ValueError("Field 'station' tidak ditemukan")
+    values = []
+    for field in FEATURE_COLUMNS:
+        if field not in data:
+            raise ValueError(f"Field '{field}' tidak ditemukan")
+        try:
+            values.append(float(data[field]))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Nilai input tidak valid: {str(e)}")
+    return str(station), parse_hour(data.get("timestamp")), values
+
+
+# =====================================
+# STREAM
+# =====================================
+def read_lines(stream, lines, stop):
+    """
+    Thread pembaca: (nomor baris, baris mentah) dari body request ke antrian
+    (None = body selesai). Body dibaca dengan readline(MAX_LINE_BYTES), jadi
+    baris yang terlalu panjang datang dalam beberapa potongan tanpa newline.
+    Body chunked di server Werkzeug (app.run, serve.py) tidak ber-buffer:
+    readline-nya membaca per byte (~3k baris/detik), gunicorn ber-buffer.
+    """
+    def put(item):
+        while not stop.is_set():
+            try:
+                lines.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    buffer, skipping, line_no = b"", False, 0
+    try:
+        while True:
+            piece = stream.readline(MAX_LINE_BYTES)
+            if not piece:
+                break
+            buffer += piece
+            *complete, buffer = buffer.split(b"\n")
+            if skipping:
+                # Sisa baris yang terlalu panjang dibuang sampai newline berikutnya
+                if not complete:
+                    buffer = b""
+                    continue
+                complete, skipping = complete[1:], False
+            for line in complete:
+                line_no += 1
+                if not put((line_no, line)):
+                    return
+            if len(buffer) > MAX_LINE_BYTES:
+                line_no += 1
+                if not put((line_no, LineTooLong(f"Baris lebih dari {MAX_LINE_BYTES} byte"))):
+                    return
+                buffer, skipping = b"", True
+        if buffer and not skipping:
+            put((line_no + 1, buffer))
+    except Exception as e:
+        put(e)
+    put(None)
+
+
+def collect(lines, batch_rows, max_wait):
+    """
+    Baris berikutnya sampai batch_rows baris atau max_wait detik sejak baris
+    pertama. Mengembalikan (list (seq, baris), True jika body sudah selesai).
+    """
+    batch = []
+    item = lines.get()
+    deadline = time.monotonic() + max_wait
+    while True:
+        if item is None:
+            return batch, True
+        if isinstance(item, tuple):
+            if isinstance(item[1], LineTooLong) or item[1].strip():
+                batch.append(item)
+        elif isinstance(item, Exception):
+            # Gagal membaca body (mis. klien terputus)
+            raise item
+        if len(batch) >= batch_rows:
+            return batch, False
+        remaining = deadline - time.monotonic()
+        try:
+            item = lines.get(timeout=remaining) if remaining > 0 else lines.get_nowait()
+        except queue.Empty:
+            return batch, False
+
+
+def score_lines(raw_lines, score_fn, aggregates, default_station):
+    """Satu micro-batch (seq, baris NDJSON) -> teks NDJSON output dengan urutan yang sama"""
+    results = [None] * len(raw_lines)
+    seqs = [seq for seq, _ in raw_lines]
+    readings = []
+    for i, (_, line) in enumerate(raw_lines):
+        try:
+            if isinstance(line, LineTooLong):
+                raise line
+            readings.append((i, *parse_reading(line, default_station)))
+        except ValueError as e:
+            results[i] = {"seq": seqs[i], "success": False, "error": str(e)}
+
+    if readings:
+        X = np.array([values for _, _, _, values in readings], dtype=np.float64)
+        valid_mask = validasi_range(X)
+        row_ok = valid_mask.all(axis=1)
+        scored = [reading for reading, ok in zip(readings, row_ok) if ok]
+        for (i, station, _, values), ok, mask in zip(readings, row_ok, valid_mask):
+            if not ok:
+                results[i] = {
+                    "seq": seqs[i],
+                    "station": station,
+                    "success": False,
+                    "error": "Input di luar range yang valid",
+                    "validation_errors": get_validation_errors(values, mask)
+                }
+
+        if scored:
+            bundle, probabilities = score_fn(X[row_ok])
+            labels = np.argmax(probabilities, axis=1)
+            names = [bundle.class_names[label] for label in labels]
+            snapshots = aggregates.update(
+                [(station, hour, name) for (_, station, hour, _), name in zip(scored, names)],
+                bundle.class_names
+            )
+            for (i, station, _, _), label, name, proba, rolling in zip(
+                    scored, labels, names, probabilities, snapshots):
+                results[i] = {
+                    "seq": seqs[i],
+                    "station": station,
+                    **minimal_prediction(bundle.version, label, name, proba),
+                    "rolling": rolling
+                }
+
+    return "".join(json.dumps(result, separators=(",", ":")) + "\n" for result in results)
+
+
+def stream_predictions(stream, score_fn, aggregates, default_station=None,
+                       batch_rows=STREAM_BATCH_ROWS, max_wait_ms=STREAM_MAX_WAIT_MS):
+    """
+    Generator teks NDJSON untuk body request `stream` (file-like, dibaca per baris).
+
+    score_fn: fungsi X (n, 4) -> (bundle, probabilities), dipanggil sekali per
+    micro-batch sehingga model yang baru di-reload langsung dipakai batch berikutnya.
+    """
+    lines = queue.Queue(maxsize=STREAM_QUEUE_LINES)
+    stop = threading.Event()
+    reader = threading.Thread(target=read_lines, args=(stream, lines, stop), name="stream-reader", daemon=True)
+    reader.start()
+    try:
+        done = False
+        while not done:
+            batch, done = collect(lines, max(1, batch_rows), max(0.0, max_wait_ms) / 1000.0)
+            if batch:
+                yield score_lines(batch, score_fn, aggregates, default_station)
+    finally:
+        # Klien menutup koneksi atau stream selesai: hentikan thread pembaca
+        stop.set()
@@ -0,0 +1,52 @@
+"""
+Modul Processing_data diimpor langsung dengan nama (flat), sama seperti saat
+script dijalankan dari folder ini.
+
+    cd prediksi_udara/Processing_data && python -m pytest -q
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from validasi_input import FEATURE_COLUMNS, RANGE_MAX, RANGE_MIN  # noqa: E402
+
+CLASS_NAMES = ["Baik", "Buruk", "Sedang"]
+
+
+def synthetic_rows(n, seed=0):
+    """Input acak di dalam VALID_RANGES + label kualitas yang bergantung pada fitur"""
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(RANGE_MIN, RANGE_MAX, size=(n, len(FEATURE_COLUMNS))).round(1)
+    score = 0.03 * X[:, 1] - 0.15 * X[:, 3] + rng.normal(0, 0.3, n)
+    y = np.where(score < -0.6, "Baik", np.where(score < 0.2, "Sedang", "Buruk"))
+    return X, y
+
+
+@pytest.fixture(scope="session")
+def forest():
+    """(RandomForestClassifier kecil, MinMaxScaler, X, y) untuk pengujian engine & API"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import MinMaxScaler
+
+    X, y = synthetic_rows(3000)
+    scaler = MinMaxScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=12, max_depth=8, random_state=0, n_jobs=1)
+    model.fit(scaler.transform(X), y)
+    return model, scaler, X, y
+
+
+@pytest.fixture(scope="session")
+def api(forest):
+    """api_predict dengan bundle uji (tanpa model dari registry & tanpa watcher)"""
+    os.environ["MODEL_WATCH_INTERVAL"] = "0"
+    os.environ["STARTUP_MODE"] = "eager"
+    import api_predict
+    from model_registry import ModelBundle
+
+    model, scaler, _, _ = forest
+    api_predict.registry.current = ModelBundle(model, scaler, "test", "sklearn", {}, 0.0)
+    return api_predict
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+ROW = {"suhu": 12.0, "kelembapan": 5.0, "tekanan": 1015.0, "kecepatan_angin": 3.5}
+
+
+def columnar(n=3, **overrides):
+    data = {field: [value] * n for field, value in ROW.items()}
+    data.update(overrides)
+    return data
+
+
+def test_row_and_columnar_formats_parse_to_same_matrix(api):
+    X_rows, errors_rows = api.parse_batch_payload([ROW, ROW])
+    X_cols, errors_cols = api.parse_batch_payload(columnar(2))
+    X_readings, _ = api.parse_batch_payload({"readings": [ROW, ROW]})
+
+    assert errors_rows == errors_cols == {}
+    np.testing.assert_array_equal(X_rows, X_cols)
+    np.testing.assert_array_equal(X_rows, X_readings)
+
+
+def test_row_errors_are_reported_per_row(api):
+    X, errors = api.parse_batch_payload([ROW, {"suhu": 1}, "bukan objek", dict(ROW, tekanan="abc")])
+
+    assert sorted(errors) == [1, 2, 3]
+    assert "kelembapan" in errors[1]
+    assert np.isnan(X[1:]).any(axis=1).all()
+    assert not np.isnan(X[0]).any()
+
+
+def test_columnar_bad_value_marks_only_that_row(api):
+    X, errors = api.parse_batch_payload(columnar(3, suhu=[12.0, "x", 14.0]))
+    assert list(errors) == [1]
+    assert X[2, 0] == 14.0
+
+
+@pytest.mark.parametrize("column", [[[12.0]], [[12.0], [13.0]], 12.0, "12"])
+def test_columnar_rejects_nested_or_scalar_columns(api, column):
+    n = len(column) if isinstance(column, list) else 1
+    with pytest.raises(ValueError):
+        api.parse_batch_payload(columnar(n, suhu=column))
+
+
+def test_columnar_rejects_unequal_lengths(api):
+    with pytest.raises(ValueError):
+        api.parse_batch_payload(columnar(3, suhu=[1.0, 2.0]))
+
+
+def test_batch_endpoint_validates_ranges_and_shapes(api):
+    client = api.app.test_client()
+
+    response = client.post("/predict/batch", json=[ROW, dict(ROW, suhu=999), {"suhu": 1}])
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [r["success"] for r in body["results"]] == [True, False, False]
+
+    response = client.post("/predict/batch", json=columnar(1, suhu=[[12.0]]))
+    assert response.status_code == 400
+    assert "1 dimensi" in response.get_json()["error"]
+
+
+def test_columnar_null_gets_same_error_as_row_format(api):
+    _, errors_rows = api.parse_batch_payload([ROW, dict(ROW, kelembapan=None)])
+    X, errors_cols = api.parse_batch_payload(columnar(2, kelembapan=[5.0, None]))
+
+    assert errors_cols == errors_rows
+    assert errors_cols[1].startswith("Nilai input tidak valid")
+    assert X[0, 1] == 5.0
+
+
+def test_batch_limit_checked_before_parsing(api, monkeypatch):
+    def parse_not_expected(data):
+        raise AssertionError("payload di atas batas tidak boleh di-parse")
+
+    monkeypatch.setattr(api, "MAX_BATCH_ROWS", 2)
+    monkeypatch.setattr(api, "parse_batch_payload", parse_not_expected)
+    client = api.app.test_client()
+
+    assert client.post("/predict/batch", json=[ROW] * 3).status_code == 413
+    assert client.post("/predict/batch", json=columnar(3)).status_code == 413
+    assert client.post("/predict/batch", json={"readings": [ROW] * 3}).status_code == 413
@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pandas as pd
+
+import dataset_stats
+from dataset_stats import StatsCache, simpan_statistik
+
+
+def write_dataset(path, rows):
+    pd.DataFrame({
+        "suhu": [10.0] * rows,
+        "kelembapan": [1.0] * rows,
+        "tekanan": [1010.0] * rows,
+        "kecepatan_angin": [2.0] * rows,
+        "kualitas_udara": ["Baik"] * rows
+    }).to_csv(path, index=False)
+
+
+def test_concurrent_cold_requests_wait_for_first_build(tmp_path):
+    dataset_path = tmp_path / "dataset.csv"
+    write_dataset(dataset_path, 5)
+
+    def slow_loader():
+        time.sleep(0.3)
+        return pd.read_csv(dataset_path)
+
+    cache = StatsCache(str(dataset_path), str(tmp_path / "model.pkl"), slow_loader,
+                       stats_path=str(tmp_path / "stats.json"))
+    results = [None] * 8
+    barrier = threading.Barrier(len(results))
+
+    def request(i):
+        barrier.wait()
+        results[i] = cache.get()
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(entry is not None for entry in results)
+    assert len({id(entry) for entry in results}) == 1
+    assert results[0].payload["total_data"] == 5
+
+
+def make_cache(tmp_path, calls, **kwargs):
+    dataset_path = tmp_path / "dataset.csv"
+
+    def loader():
+        calls.append(1)
+        return pd.read_csv(dataset_path)
+
+    return StatsCache(str(dataset_path), str(tmp_path / "model.pkl"), loader,
+                      stats_path=str(tmp_path / "stats.json"), **kwargs)
+
+
+def test_dataset_change_rebuilds_from_new_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_stats, "CHECK_INTERVAL", 0.0)
+    write_dataset(tmp_path / "dataset.csv", 5)
+    calls = []
+    cache = make_cache(tmp_path, calls)
+
+    first = cache.get()
+    assert first.payload["total_data"] == 5
+    assert cache.get() is first and len(calls) == 1
+
+    write_dataset(tmp_path / "dataset.csv", 12)
+    second = cache.get()
+    assert second.payload["total_data"] == 12
+    assert second.etag != first.etag
+    assert len(calls) == 2
+
+
+def test_model_change_only_changes_etag(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_stats, "CHECK_INTERVAL", 0.0)
+    write_dataset(tmp_path / "dataset.csv", 5)
+    cache = make_cache(tmp_path, [])
+    first = cache.get()
+
+    (tmp_path / "model.pkl").write_bytes(b"model baru")
+    second = cache.get()
+    assert second.payload == first.payload
+    assert second.etag != first.etag
+
+
+def test_sidecar_used_only_while_dataset_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_stats, "CHECK_INTERVAL", 0.0)
+    dataset_path = tmp_path / "dataset.csv"
+    write_dataset(dataset_path, 5)
+    simpan_statistik(pd.read_csv(dataset_path), str(dataset_path), str(tmp_path / "stats.json"))
+    calls = []
+    cache = make_cache(tmp_path, calls)
+
+    assert cache.get().payload["total_data"] == 5
+    assert calls == []
+
+    write_dataset(dataset_path, 7)
+    assert cache.get().payload["total_data"] == 7
+    assert calls == [1]
+
+
+def test_check_interval_throttles_disk_checks(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_stats, "CHECK_INTERVAL", 3600.0)
+    write_dataset(tmp_path / "dataset.csv", 5)
+    cache = make_cache(tmp_path, [])
+    first = cache.get()
+
+    write_dataset(tmp_path / "dataset.csv", 9)
+    assert cache.get() is first
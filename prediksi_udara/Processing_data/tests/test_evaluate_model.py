@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+import evaluate_model
+from dataset_loader import LABEL_COLUMN
+from pipeline_cache import PipelineCache, SPLIT_PARAMS
+from validasi_input import FEATURE_COLUMNS
+
+from conftest import synthetic_rows
+
+
+def write_dataset(path, n_rows=2500):
+    X, y = synthetic_rows(n_rows, seed=3)
+    df = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    df[LABEL_COLUMN] = y
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_holdout_index_matches_pipeline_cache(tmp_path):
+    source = write_dataset(tmp_path / "dataset.csv")
+    split = PipelineCache(source, cache_dir=str(tmp_path / "cache")).split()
+
+    test_idx, n_rows = evaluate_model.holdout_test_index(source, SPLIT_PARAMS, chunk_rows=300)
+    assert n_rows == split["meta"]["rows"]
+    np.testing.assert_array_equal(test_idx, split["test_idx"])
+
+
+def test_holdout_rows_written_per_chunk_match_split(tmp_path):
+    source = write_dataset(tmp_path / "dataset.csv")
+    split = PipelineCache(source, cache_dir=str(tmp_path / "cache")).split()
+    test_idx, n_rows = evaluate_model.holdout_test_index(source, SPLIT_PARAMS, chunk_rows=300)
+
+    data_dir = tmp_path / "holdout"
+    data_dir.mkdir()
+    evaluate_model.write_holdout(source, test_idx, n_rows, str(data_dir), chunk_rows=300)
+
+    # Baris ditulis dalam urutan file, split dalam urutan test_idx
+    order = np.argsort(split["test_idx"])
+    written = evaluate_model.read_rows(str(data_dir), slice(None))
+    np.testing.assert_array_equal(written, split["X_test"].to_numpy()[order])
+    codes = np.load(data_dir / evaluate_model.CODES_FILE)
+    np.testing.assert_array_equal(codes, evaluate_model.label_codes(split["y_test"].to_numpy()[order]))
+
+
+def write_station_csv(path, n_rows, stations=None, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "No": np.arange(n_rows),
+        "PM2.5": rng.uniform(5, 200, n_rows).round(),
+        "TEMP": rng.uniform(-10, 35, n_rows).round(1),
+        "PRES": rng.uniform(990, 1040, n_rows).round(1),
+        "DEWP": rng.uniform(-30, 25, n_rows).round(1),
+        "WSPM": rng.uniform(0, 10, n_rows).round(1),
+    })
+    if stations is not None:
+        df["station"] = stations
+    df.to_csv(path, index=False)
+
+
+def test_station_groups_follow_station_column(tmp_path):
+    from ingest_stations import ingest, iter_partition_chunks, station_names
+    from preprocess_stream import mask_baris
+
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    # File Alpha juga berisi baris stasiun Beta; file Gamma tanpa kolom station
+    write_station_csv(raw / "PRSA_Data_Alpha_20130301-20170228.csv", 300, ["Alpha"] * 200 + ["Beta"] * 100)
+    write_station_csv(raw / "PRSA_Data_Beta_20130301-20170228.csv", 150, ["Beta"] * 150, seed=1)
+    write_station_csv(raw / "PRSA_Data_Gamma_20130301-20170228.csv", 120, seed=2)
+    parts = str(tmp_path / "parts")
+    ingest(str(raw), parts, jobs=1)
+    assert station_names(parts) == ["Alpha", "Beta", "Gamma"]
+
+    expected = {"Alpha": 0, "Beta": 0, "Gamma": 0}
+    for chunk in iter_partition_chunks(parts, 64, with_station=True):
+        kept = chunk["station"][mask_baris(chunk)[0]]
+        for name, count in kept.value_counts().items():
+            expected[name] += int(count)
+
+    meta = evaluate_model.prepare_folds(parts, "station", 0, str(tmp_path / "data"))
+    groups = np.load(tmp_path / "data" / evaluate_model.GROUPS_FILE)
+    assert meta["groups"] == ["Alpha", "Beta", "Gamma"]
+    assert {name: int((groups == i).sum()) for i, name in enumerate(meta["groups"])} == expected
+    assert sum(expected.values()) == meta["rows"]
+    # Baris Beta dari file Alpha ikut kelompok Beta
+    assert expected["Alpha"] <= 200 and expected["Beta"] > 150
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from forest_engine import (CompactForest, FlatForest, SMALL_BATCH_ROWS, export_compact,
+                           export_forest, load_forest)
+
+from conftest import synthetic_rows
+
+# Di bawah dan di atas SMALL_BATCH_ROWS: kedua jalur traversal ikut diuji
+BATCH_SIZES = [1, SMALL_BATCH_ROWS, 2000]
+
+
+@pytest.fixture(scope="module")
+def raw_inputs():
+    X, _ = synthetic_rows(2000, seed=1)
+    return X
+
+
+@pytest.mark.parametrize("n_rows", BATCH_SIZES)
+def test_flat_matches_sklearn(forest, raw_inputs, tmp_path, n_rows):
+    model, scaler, _, _ = forest
+    path = str(tmp_path / "model.npz")
+    export_forest(model, path)
+    flat = load_forest(path)
+    assert isinstance(flat, FlatForest) and not flat.scaler_folded
+
+    X = scaler.transform(raw_inputs[:n_rows])
+    np.testing.assert_allclose(flat.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(flat.predict(X), model.predict(X))
+
+
+@pytest.mark.parametrize("n_rows", BATCH_SIZES)
+def test_flat_folded_scaler_takes_raw_input(forest, raw_inputs, tmp_path, n_rows):
+    model, scaler, _, _ = forest
+    path = str(tmp_path / "model_raw.npz")
+    export_forest(model, path, scaler=scaler)
+    flat = load_forest(path)
+    assert flat.scaler_folded
+
+    X = raw_inputs[:n_rows]
+    expected = model.predict_proba(scaler.transform(X))
+    np.testing.assert_allclose(flat.predict_proba(X), expected, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("fold_scaler", [False, True])
+@pytest.mark.parametrize("value_dtype,atol", [("float16", 1e-3), ("uint8", 1e-2)])
+@pytest.mark.parametrize("n_rows", BATCH_SIZES)
+def test_compact_matches_sklearn(forest, raw_inputs, tmp_path, n_rows, fold_scaler, value_dtype, atol):
+    model, scaler, _, _ = forest
+    path = str(tmp_path / "model.rfc")
+    export_compact(model, path, scaler=scaler if fold_scaler else None, value_dtype=value_dtype)
+    compact = load_forest(path)
+    assert isinstance(compact, CompactForest) and compact.scaler_folded == fold_scaler
+
+    X = raw_inputs[:n_rows]
+    expected = model.predict_proba(scaler.transform(X))
+    proba = compact.predict_proba(X if fold_scaler else scaler.transform(X))
+    # Threshold dan jalur traversal identik, hanya nilai leaf yang terkuantisasi
+    np.testing.assert_allclose(proba, expected, rtol=0, atol=atol)
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+
+
+def test_single_row_1d_input(forest, raw_inputs, tmp_path):
+    model, scaler, _, _ = forest
+    path = str(tmp_path / "model.npz")
+    export_forest(model, path)
+    flat = load_forest(path)
+    x = scaler.transform(raw_inputs[:1])
+    np.testing.assert_allclose(flat.predict_proba(x[0]), model.predict_proba(x), atol=1e-12)
+
+
+
+@pytest.mark.parametrize("fold_scaler", [False, True])
+def test_ranked_traversal_matches_per_tree_at_thresholds(forest, raw_inputs, tmp_path, fold_scaler):
+    model, scaler, _, _ = forest
+    path = str(tmp_path / "model.npz")
+    arrays = export_forest(model, path, scaler=scaler if fold_scaler else None)
+    flat = load_forest(path)
+
+    # Input tepat di threshold (x <= t ke kiri), kasus tepi perbandingan rank
+    X = raw_inputs.copy() if fold_scaler else scaler.transform(raw_inputs)
+    internal = np.isfinite(arrays["threshold"])
+    for f in range(X.shape[1]):
+        values = arrays["threshold"][internal & (arrays["feature"] == f)][:len(X)]
+        X[:len(values), f] = values
+    X_flat = np.ascontiguousarray(X.T).ravel()
+
+    tables = flat._ranked()
+    assert tables
+    np.testing.assert_array_equal(flat._proba_ranked(X_flat, len(X), tables), flat._proba_per_tree(X_flat, len(X)))
+    if not fold_scaler:
+        np.testing.assert_allclose(flat.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
@@ -0,0 +1,37 @@
+from metrics import Metrics
+
+
+def test_replace_keeps_only_active_model_version():
+    metrics = Metrics()
+    metrics.set_gauge("api_model_info", 1, "Versi model yang aktif", replace=True, version="a", engine="sklearn")
+    metrics.set_gauge("api_model_info", 1, "Versi model yang aktif", replace=True, version="b", engine="sklearn")
+
+    text = metrics.render()
+    assert 'version="b"' in text
+    assert 'version="a"' not in text
+    assert text.count("# TYPE api_model_info gauge") == 1
+
+
+def test_labelled_series_accumulate_without_replace():
+    metrics = Metrics()
+    metrics.set_gauge("api_cache_size", 3, "Ukuran cache", worker="1")
+    metrics.set_gauge("api_cache_size", 5, "Ukuran cache", worker="2")
+
+    text = metrics.render()
+    assert 'worker="1"' in text and 'worker="2"' in text
+
+
+def test_model_info_after_hot_reload(api, forest):
+    from model_registry import ModelBundle
+
+    model, scaler, _, _ = forest
+    client = api.app.test_client()
+    original = api.registry.current
+    try:
+        client.get("/metrics")
+        api.registry.current = ModelBundle(model, scaler, "test-baru", "sklearn", {}, 0.0)
+        text = client.get("/metrics").get_data(as_text=True)
+    finally:
+        api.registry.current = original
+    info = [line for line in text.splitlines() if line.startswith("api_model_info")]
+    assert len(info) == 1 and 'version="test-baru"' in info[0]
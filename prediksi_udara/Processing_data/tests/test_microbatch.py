@@ -0,0 +1,66 @@
+import threading
+
+import numpy as np
+import pytest
+
+from microbatch import BatchTimeout, MicroBatcher
+
+
+def score_sum(X):
+    return X.sum(axis=1), X * 2
+
+
+def test_rows_scored_together():
+    batcher = MicroBatcher(score_sum, max_batch_size=8, max_wait_ms=20)
+    futures = [batcher.submit([i, 1.0]) for i in range(4)]
+    results = [future.result(timeout=2) for future in futures]
+
+    assert [float(prediction) for prediction, _ in results] == [1.0, 2.0, 3.0, 4.0]
+    assert batcher.stats()["items"] == 4
+
+
+def test_timeout_instead_of_hanging():
+    release = threading.Event()
+
+    def slow(X):
+        release.wait(5)
+        return score_sum(X)
+
+    batcher = MicroBatcher(slow, max_wait_ms=1, timeout_ms=50)
+    with pytest.raises(BatchTimeout):
+        batcher.score([1.0, 2.0])
+    release.set()
+    assert batcher.stats()["timeouts"] == 1
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_dead_scorer_thread_is_restarted():
+    calls = []
+
+    def dies_once(X):
+        calls.append(len(X))
+        if len(calls) == 1:
+            raise SystemExit  # BaseException: thread scorer berhenti
+        return score_sum(X)
+
+    batcher = MicroBatcher(dies_once, max_wait_ms=1, timeout_ms=200)
+    with pytest.raises(BatchTimeout):
+        batcher.score([1.0, 2.0])
+    prediction, _ = batcher.score([3.0, 4.0])
+
+    assert float(prediction) == 7.0
+    assert batcher.stats()["restarts"] == 1
+
+
+def test_predict_returns_503_on_batch_timeout(api, monkeypatch):
+    def stuck(X, bundle):
+        threading.Event().wait(1)
+        return np.array(["Baik"] * len(X)), np.full((len(X), 3), 1 / 3)
+
+    monkeypatch.setattr(api, "batcher", MicroBatcher(stuck, max_wait_ms=1, timeout_ms=20))
+    monkeypatch.setattr(api, "prediction_cache", None)
+    response = api.app.test_client().post("/predict", json={
+        "suhu": 20.0, "kelembapan": 5.0, "tekanan": 1013.0, "kecepatan_angin": 2.0
+    })
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,104 @@
+import os
+import threading
+
+import pytest
+
+import model_registry
+from model_registry import ModelBundle, ModelRegistry, VERSION_FILES
+
+
+class FakeModel:
+    classes_ = ["Baik", "Buruk", "Sedang"]
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    """ModelRegistry di folder sementara, load_bundle diganti bundle palsu"""
+    loaded = []
+    broken = set()
+    gate = threading.Event()
+    gate.set()
+
+    def fake_load_bundle(version, engine, grid_dir, grid_mode, registry_dir):
+        gate.wait(5)
+        if version in broken:
+            raise ValueError(f"artefak {version} rusak")
+        loaded.append(version)
+        return ModelBundle(FakeModel(), None, version, engine, {}, 0.0)
+
+    monkeypatch.setattr(model_registry, "load_bundle", fake_load_bundle)
+    reg = ModelRegistry(registry_dir=str(tmp_path))
+    reg.loaded, reg.broken, reg.gate = loaded, broken, gate
+    return reg
+
+
+def publish(registry, version):
+    path = os.path.join(registry.registry_dir, version)
+    os.makedirs(path)
+    for key in ("sklearn", "scaler"):
+        open(os.path.join(path, VERSION_FILES[key]), "wb").close()
+
+
+def wait_reload(registry):
+    with registry._reload_lock:
+        pass
+
+
+def test_watcher_keeps_rollback(registry):
+    publish(registry, "20260101-000000")
+    publish(registry, "20260102-000000")
+    registry.load()
+    registry.load("20260101-000000")
+    assert registry.current.version == "20260101-000000"
+
+    assert registry.check_for_update() is False
+    assert registry.current.version == "20260101-000000"
+
+    publish(registry, "20260103-000000")
+    assert registry.check_for_update() is True
+    wait_reload(registry)
+    assert registry.current.version == "20260103-000000"
+
+
+def test_failed_version_not_retried_until_registry_changes(registry):
+    publish(registry, "20260101-000000")
+    registry.load()
+    registry.broken.add("20260102-000000")
+    publish(registry, "20260102-000000")
+
+    assert registry.check_for_update() is True
+    wait_reload(registry)
+    assert registry.current.version == "20260101-000000"
+    assert registry.info()["failed_versions"] == ["20260102-000000"]
+
+    for _ in range(3):
+        assert registry.check_for_update() is False
+    assert registry.loaded == ["20260101-000000"]
+
+    registry.broken.clear()
+    publish(registry, "20260103-000000")
+    assert registry.check_for_update() is True
+    wait_reload(registry)
+    assert registry.current.version == "20260103-000000"
+
+
+def test_concurrent_reload_only_one_accepted(registry):
+    publish(registry, "20260101-000000")
+    registry.gate.clear()
+    results = [None] * 6
+    barrier = threading.Barrier(len(results))
+
+    def call(i):
+        barrier.wait()
+        results[i] = registry.reload_async()
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.gate.set()
+    wait_reload(registry)
+
+    assert results.count(True) == 1
+    assert registry.loaded == ["20260101-000000"]
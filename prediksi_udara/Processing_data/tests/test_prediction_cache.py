@@ -0,0 +1,84 @@
+import threading
+
+import prediction_cache
+from prediction_cache import PredictionCache
+
+
+def test_key_quantized_to_sensor_resolution():
+    cache = PredictionCache(maxsize=4, resolution=0.1)
+    assert cache.make_key([20.04, 1.0, 1013.2, 2.5]) == cache.make_key([19.96, 1.0, 1013.2, 2.5])
+    assert cache.make_key([20.0, 1.0, 1013.2, 2.5]) != cache.make_key([20.1, 1.0, 1013.2, 2.5])
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = PredictionCache(maxsize=2, ttl=0)
+    cache.put("a", "v1", 1)
+    cache.put("b", "v1", 2)
+    assert cache.get("a", "v1") == 1
+    cache.put("c", "v1", 3)
+
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") == 1
+    assert cache.get("c", "v1") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_model_version_change_invalidates():
+    cache = PredictionCache(maxsize=4, ttl=0)
+    cache.put("a", "v1", 1)
+    assert cache.get("a", "v2") is None
+
+    stats = cache.stats()
+    assert stats["size"] == 0
+    assert stats["model_version"] == "v2"
+    assert stats["invalidations"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(maxsize=4, ttl=5)
+    cache.put("a", "v1", 1)
+
+    now[0] = 104.9
+    assert cache.get("a", "v1") == 1
+    now[0] = 105.0
+    assert cache.get("a", "v1") is None
+
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_concurrent_use_stays_bounded():
+    cache = PredictionCache(maxsize=50, ttl=0)
+
+    def worker(offset):
+        for i in range(500):
+            key = (offset + i) % 120
+            if cache.get(key, "v1") is None:
+                cache.put(key, "v1", key)
+
+    threads = [threading.Thread(target=worker, args=(i * 17,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert stats["size"] <= 50
+    assert stats["hits"] + stats["misses"] == 2000
+
+
+def test_predict_endpoint_serves_repeat_from_cache(api, monkeypatch):
+    monkeypatch.setattr(api, "prediction_cache", PredictionCache(maxsize=8, ttl=0))
+    client = api.app.test_client()
+    body = {"suhu": 20.0, "kelembapan": 5.0, "tekanan": 1013.0, "kecepatan_angin": 2.0}
+
+    first = client.post("/predict", json=body)
+    second = client.post("/predict", json={**body, "suhu": 20.01})
+    assert first.status_code == second.status_code == 200
+    assert first.get_json()["prediction"] == second.get_json()["prediction"]
+    # Input di response tetap input request ini, bukan input yang di-cache
+    assert second.get_json()["input"]["suhu"] == 20.01
+    assert api.prediction_cache.stats()["hits"] == 1
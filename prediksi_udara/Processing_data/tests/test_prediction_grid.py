@@ -0,0 +1,48 @@
+import threading
+
+import numpy as np
+import pytest
+
+from conftest import synthetic_rows
+from prediction_grid import GridModel, build_grid
+
+STEPS = [10.0, 10.0, 5.0, 2.5]
+
+
+@pytest.fixture(scope="module")
+def grid_dir(forest, tmp_path_factory):
+    model, scaler, _, _ = forest
+    out_dir = str(tmp_path_factory.mktemp("grid") / "grid")
+    build_grid(lambda X: model.predict_proba(scaler.transform(X)), model.classes_, STEPS, out_dir)
+    return out_dir
+
+
+@pytest.mark.parametrize("mode", ["nearest", "exact"])
+def test_predict_from_labels_matches_probabilities(forest, grid_dir, mode):
+    model, scaler, _, _ = forest
+    fallback = lambda X: model.predict_proba(scaler.transform(X))  # noqa: E731
+    grid = GridModel.load(grid_dir, fallback=fallback, mode=mode)
+    X, _ = synthetic_rows(500, seed=3)
+
+    expected = grid.classes_[np.argmax(grid.predict_proba(X), axis=1)]
+    np.testing.assert_array_equal(grid.predict(X), expected)
+
+
+def test_fallback_rows_counted_across_threads(forest, grid_dir):
+    model, scaler, _, _ = forest
+    grid = GridModel.load(grid_dir, fallback=lambda X: model.predict_proba(scaler.transform(X)), mode="exact")
+    X, _ = synthetic_rows(50, seed=4)
+    X = X + 0.05  # tidak tepat di titik grid
+    n_threads, repeats = 8, 20
+
+    def work():
+        for _ in range(repeats):
+            grid.predict_proba(X)
+
+    threads = [threading.Thread(target=work) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert grid.fallback_rows == n_threads * repeats * len(X)
@@ -0,0 +1,115 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import score_bulk
+from dataset_loader import LABEL_COLUMN, read_npy_meta
+from model_registry import ModelBundle
+from validasi_input import FEATURE_COLUMNS
+
+CHUNK_ROWS = 250
+
+
+@pytest.fixture
+def bulk(forest, tmp_path, monkeypatch):
+    """score_bulk dengan bundle uji (tanpa registry) + CSV input 1000 baris"""
+    model, scaler, X, _ = forest
+    X = X[:1000].copy()
+    X[::97, 0] = 999.0  # sebagian baris di luar range
+    source = tmp_path / "arsip.csv"
+    pd.DataFrame(X, columns=FEATURE_COLUMNS).to_csv(source, index=False)
+
+    def init_worker(version, engine, single_thread):
+        score_bulk._BUNDLE = ModelBundle(model, scaler, version, engine, {}, 0.0)
+
+    monkeypatch.setattr(score_bulk, "init_worker", init_worker)
+    return str(source), X
+
+
+def read_output(output):
+    meta = read_npy_meta(output)
+    codes = np.load(os.path.join(output, f"{LABEL_COLUMN}.codes.npy"))
+    proba = np.column_stack([np.load(os.path.join(output, f"prob_{cls}.npy")) for cls in meta["categories"]])
+    return meta, codes, proba
+
+
+def test_output_matches_bundle_scores(bulk, forest, tmp_path):
+    source, X = bulk
+    output = str(tmp_path / "hasil.npycache")
+    result = score_bulk.run(source, output, version="test", jobs=1, chunk_rows=CHUNK_ROWS)
+
+    meta, codes, proba = read_output(output)
+    valid = codes >= 0
+    assert result["rows"] == meta["rows"] == len(X)
+    assert valid.sum() == result["valid"] == len(X) - len(range(0, len(X), 97))
+
+    model, scaler, _, _ = forest
+    expected = model.predict_proba(scaler.transform(X[valid]))
+    np.testing.assert_allclose(proba[valid], expected, rtol=1e-6)
+    assert np.isnan(proba[~valid]).all()
+    assert not os.path.exists(output + ".progress")
+
+
+def test_resume_skips_finished_chunks(bulk, tmp_path, monkeypatch):
+    source, X = bulk
+    reference = str(tmp_path / "referensi.npycache")
+    score_bulk.run(source, reference, version="test", jobs=1, chunk_rows=CHUNK_ROWS)
+
+    output = str(tmp_path / "hasil.npycache")
+    score_chunk = score_bulk.score_chunk
+    scored = []
+
+    def interrupted(index, chunk, progress_dir):
+        if index == 2:
+            raise KeyboardInterrupt
+        scored.append(index)
+        return score_chunk(index, chunk, progress_dir)
+
+    monkeypatch.setattr(score_bulk, "score_chunk", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        score_bulk.run(source, output, version="test", jobs=1, chunk_rows=CHUNK_ROWS)
+    assert scored == [0, 1]
+
+    def counting(index, chunk, progress_dir):
+        scored.append(index)
+        return score_chunk(index, chunk, progress_dir)
+
+    scored.clear()
+    monkeypatch.setattr(score_bulk, "score_chunk", counting)
+    result = score_bulk.run(source, output, version="test", jobs=1, chunk_rows=CHUNK_ROWS)
+
+    assert scored == [2, 3]
+    assert result["scored_rows"] == 2 * CHUNK_ROWS
+    _, codes, proba = read_output(output)
+    _, ref_codes, ref_proba = read_output(reference)
+    np.testing.assert_array_equal(codes, ref_codes)
+    np.testing.assert_array_equal(proba, ref_proba)
+
+
+def test_progress_from_other_model_version_is_discarded(bulk, tmp_path):
+    source, _ = bulk
+    output = str(tmp_path / "hasil.npycache")
+    progress_dir = output + ".progress"
+    state = {"source": os.path.abspath(source), "model_version": "lama"}
+    os.makedirs(progress_dir)
+    with open(os.path.join(progress_dir, score_bulk.PROGRESS_NAME), "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    open(score_bulk.part_path(progress_dir, 0), "wb").close()
+
+    result = score_bulk.run(source, output, version="test", jobs=1, chunk_rows=CHUNK_ROWS)
+    assert result["scored_rows"] == result["rows"]
+
+
+def test_parquet_output_carries_meta(bulk, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    source, X = bulk
+    output = str(tmp_path / "hasil.parquet")
+    score_bulk.run(source, output, version="test", jobs=1, chunk_rows=CHUNK_ROWS)
+
+    table = pq.read_table(output)
+    meta = json.loads(table.schema.metadata[score_bulk.PARQUET_META_KEY])
+    assert table.num_rows == meta["rows"] == len(X)
+    assert meta["model_version"] == "test"
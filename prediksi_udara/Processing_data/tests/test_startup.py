@@ -0,0 +1,59 @@
+import os
+
+import pandas as pd
+import pytest
+
+from startup import LazyResource
+
+
+def test_none_and_errors_are_not_cached():
+    results = [None, RuntimeError("gagal"), "ok"]
+
+    def factory():
+        value = results.pop(0)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    resource = LazyResource(factory)
+    assert resource.get() is None and not resource.loaded
+    with pytest.raises(RuntimeError):
+        resource.get()
+    assert not resource.loaded
+    assert resource.get() == "ok" and resource.loaded
+
+
+def test_reloaded_when_watched_source_changes():
+    source = {"version": 1}
+    resource = LazyResource(lambda: f"isi-{source['version']}", watch=lambda: source["version"], check_interval=0)
+
+    assert resource.get() == "isi-1"
+    assert resource.get() == "isi-1"
+    source["version"] = 2
+    assert resource.get() == "isi-2"
+    assert resource.generation == 2
+
+
+def write_csv(path, label):
+    pd.DataFrame({
+        "suhu": [10.0, 11.0], "kelembapan": [1.0, 2.0], "tekanan": [1010.0, 1011.0],
+        "kecepatan_angin": [1.0, 2.0], "kualitas_udara": [label, label]
+    }).to_csv(path, index=False)
+
+
+def test_sample_serves_rows_of_changed_dataset(api, monkeypatch, tmp_path):
+    path = str(tmp_path / "dataset.csv")
+    write_csv(path, "Baik")
+    monkeypatch.setattr(api, "DATASET_PATH", path)
+    watch = lambda: api.file_fingerprint(path)  # noqa: E731
+    monkeypatch.setattr(api, "dataset", LazyResource(api.load_dataset, watch=watch, check_interval=0))
+    monkeypatch.setattr(api, "sampler", LazyResource(api.build_sampler, watch=api.dataset_generation, check_interval=0))
+    client = api.app.test_client()
+
+    labels = {s["kualitas_udara"] for s in client.get("/sample?n=2").get_json()["samples"]}
+    assert labels == {"Baik"}
+
+    write_csv(path, "Buruk")
+    os.utime(path, ns=(1, 1))  # mtime berbeda meskipun ditulis di detik yang sama
+    labels = {s["kualitas_udara"] for s in client.get("/sample?n=2").get_json()["samples"]}
+    assert labels == {"Buruk"}
@@ -0,0 +1,82 @@
+import io
+import json
+
+import numpy as np
+
+from station_stream import MAX_LINE_BYTES, StationAggregates, stream_predictions
+
+CLASS_NAMES = ["Baik", "Buruk", "Sedang"]
+
+
+class FakeBundle:
+    version = "test"
+    class_names = CLASS_NAMES
+
+
+def score_fn(X):
+    proba = np.zeros((len(X), len(CLASS_NAMES)))
+    proba[:, 0] = 1.0
+    return FakeBundle, proba
+
+
+def reading(**overrides):
+    data = {"station": "A", "timestamp": "2017-03-01T10:00:00", "suhu": 10,
+            "kelembapan": -5, "tekanan": 1015, "kecepatan_angin": 3}
+    data.update(overrides)
+    return json.dumps(data).encode("utf-8")
+
+
+def run_stream(body, **kwargs):
+    text = "".join(stream_predictions(io.BytesIO(body), score_fn, StationAggregates(), **kwargs))
+    return [json.loads(line) for line in text.splitlines()]
+
+
+def test_one_output_per_line_with_input_line_numbers():
+    body = b"\n".join([
+        reading(),
+        b"",                            # baris 2 kosong: tanpa output
+        b"{bukan json",
+        reading(suhu=999),              # di luar range
+        b"   ",
+        reading(station="B")
+    ]) + b"\n"
+    results = run_stream(body, batch_rows=2)
+
+    assert [r["seq"] for r in results] == [1, 3, 4, 6]
+    assert results[0]["kualitas"] == "Baik" and results[0]["probabilities"] == [1.0, 0.0, 0.0]
+    assert results[1]["success"] is False and "JSON" in results[1]["error"]
+    assert results[2]["success"] is False and results[2]["validation_errors"]
+    assert results[3]["station"] == "B"
+
+
+def test_last_line_without_newline_is_scored():
+    results = run_stream(reading() + b"\n" + reading(station="C"))
+    assert [(r["seq"], r["station"]) for r in results] == [(1, "A"), (2, "C")]
+
+
+def test_too_long_line_is_one_error_and_stream_continues():
+    long_line = b'{"station": "' + b"x" * (MAX_LINE_BYTES * 2) + b'"}'
+    results = run_stream(reading() + b"\n" + long_line + b"\n" + reading(station="D") + b"\n")
+
+    assert [r["seq"] for r in results] == [1, 2, 3]
+    assert results[1]["success"] is False and "byte" in results[1]["error"]
+    assert results[2]["station"] == "D"
+
+
+def test_rolling_counts_accumulate_per_station():
+    body = b"\n".join([reading(), reading(), reading(station="B")]) + b"\n"
+    results = run_stream(body)
+    assert results[1]["rolling"] != results[0]["rolling"]
+    assert results[2]["station"] == "B"
+
+
+def test_windows_reset_when_model_classes_change():
+    aggregates = StationAggregates(n_hours=24)
+    aggregates.update([("A", 10, "Baik"), ("A", 10, "Sedang")], ["Baik", "Buruk", "Sedang"])
+
+    # Hot reload ke model dengan kelas lain: tidak KeyError, hitungan lama tidak dipakai
+    snapshots = aggregates.update([("A", 10, "Tidak Sehat")], ["Baik", "Tidak Sehat"])
+
+    assert snapshots[0]["count"] == 1
+    assert snapshots[0]["share"] == {"Baik": 0.0, "Tidak Sehat": 1.0}
+    assert aggregates.info()["class_resets"] == 1
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import train_chunked
+from dataset_loader import LABEL_COLUMN
+from validasi_input import FEATURE_COLUMNS
+
+from conftest import synthetic_rows
+
+CHUNK_ROWS = 200
+
+
+def write_dataset(path, X, y):
+    df = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    df[LABEL_COLUMN] = y
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_batches_keep_all_classes_within_growth_limit(tmp_path):
+    X, y = synthetic_rows(3000)
+    source = write_dataset(tmp_path / "dataset.csv", X, y)
+
+    batches = list(train_chunked.iter_train_chunks(source, CHUNK_ROWS))
+    assert all(train_chunked.has_all_classes(batch) for batch in batches)
+    assert max(len(batch) for batch in batches) <= train_chunked.MAX_BATCH_GROWTH * CHUNK_ROWS
+    # Setiap baris train muncul tepat sekali
+    index = np.concatenate([batch.index.to_numpy() for batch in batches])
+    assert len(index) == len(np.unique(index))
+    assert len(index) == (~train_chunked.test_mask(np.arange(len(X)))).sum()
+
+
+def test_sorted_dataset_fails_instead_of_growing(tmp_path):
+    X, y = synthetic_rows(3000)
+    order = np.argsort(y, kind="stable")
+    source = write_dataset(tmp_path / "dataset.csv", X[order], y[order])
+
+    with pytest.raises(ValueError, match="tidak muncul"):
+        for batch in train_chunked.iter_train_chunks(source, CHUNK_ROWS):
+            assert len(batch) <= train_chunked.MAX_BATCH_GROWTH * CHUNK_ROWS
+
+
+def test_plan_chunks_shrinks_to_budget():
+    counts = np.array([400000, 300000, 300000])
+    rows, n_chunks, trees, estimate_mb = train_chunked.plan_chunks(
+        400, int(counts.sum()), counts, train_chunked.FOREST_PARAMS
+    )
+    assert train_chunked.MIN_CHUNK_ROWS <= rows < counts.sum()
+    assert estimate_mb <= 400
+    assert n_chunks * trees >= train_chunked.FOREST_PARAMS["n_estimators"]
+
+
+def test_training_stops_when_peak_rss_exceeds_budget(tmp_path):
+    from sklearn.preprocessing import MinMaxScaler
+
+    X, y = synthetic_rows(3000)
+    source = write_dataset(tmp_path / "dataset.csv", X, y)
+    scaler = MinMaxScaler().fit(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+    params = dict(train_chunked.FOREST_PARAMS, n_estimators=4, max_depth=4)
+
+    with pytest.raises(MemoryError, match="melebihi budget"):
+        train_chunked.train_sub_forests(source, scaler, 1000, 2, params, budget_mb=1)
+    model = train_chunked.train_sub_forests(source, scaler, 1000, 2, params, budget_mb=1e6)
+    assert list(model.classes_) == list(train_chunked.CLASSES)
@@ -0,0 +1,470 @@
+"""
+Training out-of-core: Random Forest dari dataset yang lebih besar dari RAM.
+
+Dataset dibaca per chunk dalam dua pass, tidak pernah dimuat utuh:
+1. Pass pertama: MinMaxScaler.partial_fit di baris train, hitung distribusi
+   kelas, baris test ditulis ke file sementara di disk.
+2. Ukuran chunk training dihitung dari --memory-budget-mb (chunk mentah +
+   hasil SMOTE + perkiraan ukuran forest gabungan) untuk batch terbesar yang
+   mungkin (MAX_BATCH_GROWTH x chunk). Jika chunk terkecil pun tidak muat,
+   training tidak dimulai.
+3. Pass kedua: setiap chunk di-scale, diseimbangkan sendiri dengan SMOTE,
+   lalu dilatih menjadi sub-forest kecil. Chunk yang belum memuat semua
+   kelas (atau sisa kecil di akhir) digabung dengan chunk lain, paling
+   besar MAX_BATCH_GROWTH x ukuran chunk; lebih dari itu training berhenti
+   dengan error (data terlalu timpang/terurut untuk ukuran chunk ini).
+   Peak RSS diukur setelah setiap chunk; jika melebihi budget, training
+   dihentikan dengan MemoryError (tidak lanjut dengan memori di atas budget).
+4. Semua pohon sub-forest digabung menjadi satu RandomForestClassifier biasa
+   (classes_ sama), dievaluasi per chunk di test set, lalu disimpan dengan
+   nama file & registry yang sama seperti train_model.py sehingga langsung
+   bisa dimuat api_predict.py (semua engine: sklearn, flat, compact, ...).
+
+Pembagian train/test ditentukan per nomor baris (hash), tidak bergantung
+pada ukuran chunk, sehingga hasilnya sama untuk budget memori berapa pun.
+
+Cara pakai:
+    python train_chunked.py                                        # dataset final
+    python train_chunked.py --memory-budget-mb 512 --n-estimators 100
+    python train_chunked.py --source dataset_beijing_v3.npycache     # training set V3
+"""
+import argparse
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from dataset_loader import FEATURE_COLUMNS, FEATURE_DTYPE, LABEL_COLUMN, USED_COLUMNS, read_npy_columns, read_npy_meta
+from forest_engine import export_compact, export_forest
+from hyperparam_search import SAMPLE_BYTES, WORKER_BASE_MB, estimate_forest_mb
+from model_registry import REGISTRY_DIR, publish_version
+from preprocess_stream import LABEL_CATEGORIES
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_PATH = os.path.join(CURRENT_DIR, "dataset_kualitas_udara_beijing_final.csv")
+MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.pkl")
+SCALER_PATH = os.path.join(CURRENT_DIR, "scaler_beijing_v3.pkl")
+FLAT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.npz")
+RAW_FLAT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3_raw.npz")
+COMPACT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.rfc")
+RAW_COMPACT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3_raw.rfc")
+
+SEED = 42
+TEST_SIZE = 0.2
+SMOTE_K_NEIGHBORS = 5
+MEMORY_BUDGET_MB = float(os.environ.get("TRAIN_MEMORY_BUDGET_MB", "1024"))
+
+# Urutan kelas = classes_ RandomForestClassifier (terurut), kode label int8 = indeksnya
+CLASSES = np.asarray(sorted(LABEL_CATEGORIES))
+
+# Chunk pass pertama (hanya partial_fit scaler & hitung kelas, memori kecil)
+SCAN_CHUNK_ROWS = 100000
+MIN_CHUNK_ROWS = 5000
+MAX_CHUNK_ROWS = 2000000
+
+# Perkiraan byte per baris: chunk mentah (fitur float32 + label string, maks. 2 chunk
+# tertahan saat digabung) dan per baris hasil SMOTE (scaled float64, output SMOTE,
+# salinan float32, label + buffer training)
+RAW_ROW_BYTES = 2 * 100
+RESAMPLED_ROW_BYTES = 90 + SAMPLE_BYTES
+
+# Batas pembesaran batch training (kelipatan ukuran chunk) saat menunggu semua
+# kelas muncul; plan_chunks menghitung memori data untuk batch sebesar ini
+MAX_BATCH_GROWTH = 2
+
+# Parameter sama dengan train_model.py
+FOREST_PARAMS = {
+    "n_estimators": 100,
+    "max_depth": 15,
+    "min_samples_leaf": 4,
+    "max_features": "sqrt"
+}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: byte
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def parse_max_depth(value):
+    return None if value.lower() == "none" else int(value)
+
+
+# =====================================
+# BACA DATASET PER CHUNK
+# =====================================
+def iter_dataset(source, chunk_rows):
+    """
+    DataFrame per chunk (fitur float32 + label string, index = nomor baris global)
+    dari CSV dataset final atau folder kolumnar (.npycache dataset_loader / preprocess_stream).
+    """
+    if os.path.isdir(source):
+        meta = read_npy_meta(source)
+        if meta is None:
+            raise FileNotFoundError(f"Folder kolumnar tidak valid: {source}")
+        df = read_npy_columns(source, meta)
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            yield chunk.assign(**{LABEL_COLUMN: chunk[LABEL_COLUMN].astype(str)})
+        return
+    dtypes = {col: FEATURE_DTYPE for col in FEATURE_COLUMNS}
+    dtypes[LABEL_COLUMN] = str
+    yield from pd.read_csv(source, usecols=USED_COLUMNS, dtype=dtypes, chunksize=chunk_rows)
+
+
+def label_codes(labels):
+    """Label string -> kode int8 (indeks CLASSES), -1 untuk label yang tidak dikenal"""
+    labels = np.asarray(labels, dtype=str)
+    codes = np.searchsorted(CLASSES, labels)
+    codes[codes >= len(CLASSES)] = 0
+    return np.where(CLASSES[codes] == labels, codes, -1).astype(np.int8)
+
+
+def row_uniform(row_numbers, seed=SEED):
+    """
+    Bilangan acak [0, 1) per baris dari hash nomor barisnya (splitmix64),
+    jadi pembagian baris tidak bergantung pada ukuran chunk.
+    """
+    z = np.asarray(row_numbers, dtype=np.uint64) + np.uint64(seed)
+    z = z * np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def test_mask(row_numbers, test_size=TEST_SIZE, seed=SEED):
+    """True untuk baris test"""
+    return row_uniform(row_numbers, seed) < test_size
+
+
+def clean_chunk(chunk):
+    """Chunk mentah -> baris lengkap dengan label yang dikenal, kolom label jadi kode"""
+    clean = chunk[USED_COLUMNS].dropna()
+    codes = label_codes(clean[LABEL_COLUMN])
+    valid = codes >= 0
+    return clean[valid].assign(**{LABEL_COLUMN: codes[valid]})
+
+
+def split_chunk(chunk):
+    """Chunk mentah -> (baris train, baris test, jumlah baris dibuang), kolom label jadi kode"""
+    clean = clean_chunk(chunk)
+    is_test = test_mask(clean.index.to_numpy())
+    return clean[~is_test], clean[is_test], len(chunk) - len(clean)
+
+
+# =====================================
+# PASS 1: SCALER, DISTRIBUSI KELAS, TEST SET
+# =====================================
+def scan(source, test_dir, chunk_rows=SCAN_CHUNK_ROWS):
+    """
+    partial_fit MinMaxScaler di baris train + jumlah baris per kelas.
+    Baris test ditulis ke test_dir (X.f32 baris-mayor, y.i1) untuk evaluasi nanti.
+    """
+    from sklearn.preprocessing import MinMaxScaler
+
+    scaler = MinMaxScaler()
+    class_counts = np.zeros(len(CLASSES), dtype=np.int64)
+    totals = {"rows_read": 0, "dropped": 0, "train_rows": 0, "test_rows": 0}
+    with open(os.path.join(test_dir, "X.f32"), "wb") as fx, open(os.path.join(test_dir, "y.i1"), "wb") as fy:
+        for chunk in iter_dataset(source, chunk_rows):
+            train, test, dropped = split_chunk(chunk)
+            if len(train):
+                # DataFrame agar scaler menyimpan nama fitur seperti train_model.py
+                scaler.partial_fit(train[FEATURE_COLUMNS].astype(np.float64))
+                class_counts += np.bincount(train[LABEL_COLUMN], minlength=len(CLASSES))
+            np.ascontiguousarray(test[FEATURE_COLUMNS].to_numpy(dtype=np.float32)).tofile(fx)
+            test[LABEL_COLUMN].to_numpy(dtype=np.int8).tofile(fy)
+            totals["rows_read"] += len(chunk)
+            totals["dropped"] += dropped
+            totals["train_rows"] += len(train)
+            totals["test_rows"] += len(test)
+    return scaler, class_counts, totals
+
+
+def plan_chunks(budget_mb, train_rows, class_counts, params):
+    """
+    Chunk training terbesar yang perkiraan memorinya muat di budget, dihitung
+    untuk batch terbesar yang bisa dibuat iter_train_chunks (MAX_BATCH_GROWTH x chunk).
+    Mengembalikan (baris per chunk, jumlah chunk, pohon per chunk, estimasi MB);
+    estimasi > budget berarti chunk terkecil pun tidak muat.
+    """
+    # SMOTE menaikkan setiap kelas ke jumlah kelas mayoritas
+    inflation = len(CLASSES) * class_counts.max() / max(train_rows, 1)
+
+    def estimate(rows):
+        n_chunks = count_batches(train_rows, rows)
+        trees_per_chunk = math.ceil(params["n_estimators"] / n_chunks)
+        resampled = rows * inflation
+        model_mb = estimate_forest_mb(trees_per_chunk * n_chunks, resampled,
+                                      params["max_depth"], params["min_samples_leaf"])
+        batch = rows * MAX_BATCH_GROWTH
+        data_mb = (batch * RAW_ROW_BYTES + batch * inflation * RESAMPLED_ROW_BYTES) / 2**20
+        return n_chunks, trees_per_chunk, WORKER_BASE_MB + data_mb + model_mb
+
+    rows = max(1, min(MAX_CHUNK_ROWS, train_rows))
+    while rows > MIN_CHUNK_ROWS and estimate(rows)[2] > budget_mb:
+        rows = max(MIN_CHUNK_ROWS, rows // 2)
+    return (rows, *estimate(rows))
+
+
+# =====================================
+# PASS 2: SUB-FOREST PER CHUNK
+# =====================================
+def count_batches(train_rows, chunk_rows):
+    """Jumlah batch iter_train_chunks: sisa kurang dari setengah chunk digabung ke batch terakhir"""
+    full, rest = divmod(train_rows, chunk_rows)
+    return full + (1 if rest >= chunk_rows // 2 or full == 0 else 0)
+
+
+def has_all_classes(batch):
+    return len(np.unique(batch[LABEL_COLUMN])) == len(CLASSES)
+
+
+def missing_classes_error(batch, chunk_rows):
+    missing = [str(cls) for cls in np.delete(CLASSES, np.unique(batch[LABEL_COLUMN]))]
+    return ValueError(
+        f"Kelas {', '.join(missing)} tidak muncul dalam {len(batch)} baris training berurutan "
+        f"(batas {MAX_BATCH_GROWTH} x {chunk_rows} baris). Data terlalu timpang atau terurut "
+        f"per kelas untuk ukuran chunk ini: acak urutan dataset atau naikkan --memory-budget-mb"
+    )
+
+
+def iter_train_chunks(source, chunk_rows):
+    """
+    Baris train dipotong ulang menjadi batch chunk_rows baris yang memuat semua kelas
+    (jika belum, batch diperbesar dengan baris berikutnya, maks. MAX_BATCH_GROWTH x
+    chunk_rows; lebih dari itu ValueError). Batch ditahan satu langkah agar sisa
+    kecil di akhir bisa digabung ke batch terakhir.
+    """
+    max_rows = MAX_BATCH_GROWTH * chunk_rows
+    buffer = None
+    ready = None
+    for chunk in iter_dataset(source, chunk_rows):
+        train, _, _ = split_chunk(chunk)
+        buffer = train if buffer is None else pd.concat([buffer, train])
+        size = chunk_rows
+        while len(buffer) >= size:
+            batch = buffer.iloc[:size]
+            if not has_all_classes(batch):
+                if size >= max_rows:
+                    raise missing_classes_error(batch, chunk_rows)
+                size = min(size + chunk_rows, max_rows)
+                continue
+            if ready is not None:
+                yield ready
+            ready, buffer = batch, buffer.iloc[size:]
+            size = chunk_rows
+
+    if buffer is not None and len(buffer):
+        small = len(buffer) < chunk_rows // 2 or not has_all_classes(buffer)
+        merged_fits = ready is not None and len(ready) + len(buffer) <= max_rows
+        if not has_all_classes(buffer) and ready is not None and not merged_fits:
+            raise missing_classes_error(buffer, chunk_rows)
+        if small and merged_fits:
+            ready = pd.concat([ready, buffer])
+        else:
+            if ready is not None:
+                yield ready
+            ready = buffer
+    if ready is not None:
+        yield ready
+
+
+def balance_chunk(X, y, seed):
+    """SMOTE per chunk; k_neighbors diperkecil jika kelas minoritas di chunk ini sedikit"""
+    from imblearn.over_sampling import SMOTE
+
+    min_count = np.bincount(y).min()
+    if min_count < 2:
+        # Terlalu sedikit untuk SMOTE, class_weight="balanced" tetap menyeimbangkan
+        return X, y
+    smote = SMOTE(random_state=seed, k_neighbors=min(SMOTE_K_NEIGHBORS, min_count - 1))
+    return smote.fit_resample(X, y)
+
+
+def check_memory_budget(budget_mb, chunk_index):
+    """MemoryError jika peak RSS proses sudah melebihi budget"""
+    peak = peak_rss_mb()
+    if budget_mb is not None and peak is not None and peak > budget_mb:
+        raise MemoryError(
+            f"Peak RSS {peak} MB melebihi budget {budget_mb:.0f} MB setelah chunk {chunk_index}; "
+            f"naikkan --memory-budget-mb atau kurangi --n-estimators / --max-depth"
+        )
+
+
+def train_sub_forests(source, scaler, chunk_rows, trees_per_chunk, params, jobs=1, budget_mb=None):
+    """
+    Latih sub-forest per chunk, kembalikan satu RandomForestClassifier gabungan.
+    Jika budget_mb diberikan, training berhenti (MemoryError) begitu peak RSS melebihinya.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    merged = None
+    estimators = []
+    forest_params = {key: value for key, value in params.items() if key != "n_estimators"}
+    for i, batch in enumerate(iter_train_chunks(source, chunk_rows)):
+        start = time.perf_counter()
+        codes = batch[LABEL_COLUMN].to_numpy(dtype=np.intp)
+        if not has_all_classes(batch):
+            raise ValueError("Data training tidak memuat semua kelas: " + ", ".join(CLASSES))
+        X = scaler.transform(batch[FEATURE_COLUMNS].astype(np.float64))
+        X_res, y_res = balance_chunk(X, codes, SEED + i)
+
+        model = RandomForestClassifier(
+            n_estimators=trees_per_chunk,
+            class_weight="balanced",
+            random_state=SEED + i,
+            n_jobs=jobs,
+            **forest_params
+        )
+        # float32: format internal tree sklearn, hindari salinan float64 kedua
+        model.fit(np.asarray(X_res, dtype=np.float32), CLASSES[y_res])
+        estimators.extend(model.estimators_)
+        if merged is None:
+            merged = model
+        print(f"   Chunk {i + 1}: {len(batch)} baris -> {len(X_res)} setelah SMOTE, "
+              f"{trees_per_chunk} pohon ({time.perf_counter() - start:.1f}s, "
+              f"peak RSS {peak_rss_mb()} MB)")
+        del batch, X, X_res, y_res
+        check_memory_budget(budget_mb, i + 1)
+
+    if merged is None:
+        raise ValueError("Tidak ada baris training")
+    return merge_forests(merged, estimators)
+
+
+def merge_forests(base, estimators):
+    """
+    Pohon semua sub-forest digabung ke satu RandomForestClassifier.
+    Semua sub-forest dilatih dengan semua kelas, jadi classes_ dan
+    urutan nilai leaf setiap pohon sama.
+    """
+    base.estimators_ = list(estimators)
+    base.n_estimators = len(base.estimators_)
+    return base
+
+
+# =====================================
+# EVALUASI PER CHUNK
+# =====================================
+def evaluate(model, scaler, test_dir, n_rows, chunk_rows=SCAN_CHUNK_ROWS):
+    """Prediksi test set dari disk per chunk, kembalikan (kode asli, kode prediksi)"""
+    X = np.memmap(os.path.join(test_dir, "X.f32"), dtype=np.float32, mode="r",
+                  shape=(n_rows, len(FEATURE_COLUMNS)))
+    y = np.fromfile(os.path.join(test_dir, "y.i1"), dtype=np.int8)
+    y_pred = np.empty(n_rows, dtype=np.int8)
+    for start in range(0, n_rows, chunk_rows):
+        batch = pd.DataFrame(np.asarray(X[start:start + chunk_rows], dtype=np.float64), columns=FEATURE_COLUMNS)
+        y_pred[start:start + len(batch)] = np.argmax(model.predict_proba(scaler.transform(batch)), axis=1)
+    return y, y_pred
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training Random Forest out-of-core per chunk")
+    parser.add_argument("--source", default=DATASET_PATH,
+                        help="CSV dataset final atau folder training set kolumnar")
+    parser.add_argument("--memory-budget-mb", type=float, default=MEMORY_BUDGET_MB)
+    parser.add_argument("--n-estimators", type=int, default=FOREST_PARAMS["n_estimators"])
+    parser.add_argument("--max-depth", type=parse_max_depth, default=FOREST_PARAMS["max_depth"])
+    parser.add_argument("--min-samples-leaf", type=int, default=FOREST_PARAMS["min_samples_leaf"])
+    parser.add_argument("--max-features", default=FOREST_PARAMS["max_features"])
+    parser.add_argument("--jobs", type=int, default=1, help="thread per sub-forest (menambah memori)")
+    args = parser.parse_args()
+
+    from sklearn.metrics import accuracy_score, classification_report
+
+    params = {
+        "n_estimators": args.n_estimators,
+        "max_depth": args.max_depth,
+        "min_samples_leaf": args.min_samples_leaf,
+        "max_features": None if args.max_features.lower() == "none" else args.max_features
+    }
+
+    print("=== TRAINING OUT-OF-CORE PER CHUNK ===\n")
+    test_dir = tempfile.mkdtemp(prefix="train_chunked_")
+    try:
+        # =====================================
+        # 1. PASS PERTAMA
+        # =====================================
+        print(f"1. Membaca dataset per chunk (scaler, distribusi kelas, test set): {args.source}")
+        scaler, class_counts, totals = scan(args.source, test_dir)
+        print(f"   Baris dibaca: {totals['rows_read']}, dibuang: {totals['dropped']}")
+        print(f"   Data training: {totals['train_rows']}, data testing: {totals['test_rows']}")
+        for label, count in zip(CLASSES, class_counts):
+            print(f"   {label}: {count}")
+
+        # =====================================
+        # 2. UKURAN CHUNK DARI BUDGET MEMORI
+        # =====================================
+        chunk_rows, n_chunks, trees_per_chunk, estimate_mb = plan_chunks(
+            args.memory_budget_mb, totals["train_rows"], class_counts, params
+        )
+        print(f"\n2. Budget {args.memory_budget_mb:.0f} MB -> {chunk_rows} baris per chunk, "
+              f"±{n_chunks} chunk x {trees_per_chunk} pohon (estimasi {estimate_mb:.0f} MB)")
+        if estimate_mb > args.memory_budget_mb:
+            raise SystemExit(f"❌ Chunk terkecil ({MIN_CHUNK_ROWS} baris) pun diperkirakan melebihi "
+                             f"budget, kurangi --n-estimators atau --max-depth")
+
+        # =====================================
+        # 3. PASS KEDUA: SUB-FOREST PER CHUNK
+        # =====================================
+        print("\n3. Melatih sub-forest per chunk...")
+        model = train_sub_forests(args.source, scaler, chunk_rows, trees_per_chunk, params, args.jobs,
+                                  budget_mb=args.memory_budget_mb)
+        print(f"   Forest gabungan: {model.n_estimators} pohon")
+
+        # =====================================
+        # 4. EVALUASI
+        # =====================================
+        print("\n4. Evaluasi model (test set per chunk)...")
+        y_test, y_pred = evaluate(model, scaler, test_dir, totals["test_rows"])
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+
+    akurasi = accuracy_score(y_test, y_pred)
+    print(f"\n   AKURASI: {akurasi:.4f} ({akurasi*100:.2f}%)")
+    print("\n   LAPORAN KLASIFIKASI:")
+    print(classification_report(y_test, y_pred, labels=range(len(CLASSES)), target_names=CLASSES))
+
+    # =====================================
+    # 5. SIMPAN MODEL (SAMA SEPERTI train_model.py)
+    # =====================================
+    joblib.dump(model, MODEL_PATH)
+    joblib.dump(scaler, SCALER_PATH)
+    export_forest(model, FLAT_MODEL_PATH)
+    export_forest(model, RAW_FLAT_MODEL_PATH, scaler=scaler)
+    export_compact(model, COMPACT_MODEL_PATH)
+    export_compact(model, RAW_COMPACT_MODEL_PATH, scaler=scaler)
+    version = publish_version({
+        "sklearn": MODEL_PATH,
+        "flat": FLAT_MODEL_PATH,
+        "flat_raw": RAW_FLAT_MODEL_PATH,
+        "compact": COMPACT_MODEL_PATH,
+        "compact_raw": RAW_COMPACT_MODEL_PATH,
+        "scaler": SCALER_PATH
+    })
+    print(f"\n5. Model disimpan: {MODEL_PATH}")
+    print(f"   Scaler disimpan: {SCALER_PATH}")
+    print(f"   Forest format array: {FLAT_MODEL_PATH}, {RAW_FLAT_MODEL_PATH}")
+    print(f"   Forest format ringkas: {COMPACT_MODEL_PATH}, {RAW_COMPACT_MODEL_PATH}")
+    print(f"   Dipublish ke registry: {os.path.join(REGISTRY_DIR, version)}")
+    print(f"\n✅ Peak RSS: {peak_rss_mb()} MB (budget {args.memory_budget_mb:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
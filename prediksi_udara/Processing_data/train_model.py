@@ -2,15 +2,17 @@
 Script untuk melatih model Random Forest dan menyimpannya.
 Jalankan script ini terlebih dahulu sebelum menjalankan API.
 """
-import pandas as pd
 import joblib
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import MinMaxScaler
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
-from imblearn.over_sampling import SMOTE
 import os
 
+from dataset_loader import load_dataset_lean
+from dataset_stats import baca_statistik, simpan_statistik
+from forest_engine import export_compact, export_forest
+from model_registry import REGISTRY_DIR, publish_version
+from pipeline_cache import PipelineCache
+
 print("=== TRAINING MODEL KUALITAS UDARA ===\n")
 
 # Path ke file
@@ -18,44 +20,45 @@ CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATASET_PATH = os.path.join(CURRENT_DIR, "dataset_kualitas_udara_beijing_final.csv")
 MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.pkl")
 SCALER_PATH = os.path.join(CURRENT_DIR, "scaler_beijing_v3.pkl")
+FLAT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.npz")
+RAW_FLAT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3_raw.npz")
+COMPACT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3.rfc")
+RAW_COMPACT_MODEL_PATH = os.path.join(CURRENT_DIR, "model_kualitas_udara_beijing_v3_raw.rfc")
+STATS_PATH = os.path.join(CURRENT_DIR, "stats_kualitas_udara_beijing_v3.json")
 
 # =====================================
-# 1. BACA DATASET
+# 1. BACA DATASET (CACHE PIPELINE)
 # =====================================
-print("1. Membaca dataset...")
-df = pd.read_csv(DATASET_PATH)
+# Split, scaler dan hasil SMOTE disimpan di cache yang dikunci hash isi dataset
+# + parameter (lihat pipeline_cache.py). Jika dataset tidak berubah, CSV tidak
+# dibaca ulang dan SMOTE tidak dijalankan ulang.
+print("1. Menyiapkan dataset...")
+cache = PipelineCache(DATASET_PATH)
+split = cache.split()
 
-print(f"   Total data: {len(df)} baris")
-print(f"   Kolom: {list(df.columns)}")
+print(f"   Total data: {split['meta']['rows']} baris")
+print(f"   Split & scaler: {'dari cache' if split['hit'] else 'dihitung baru'} ({cache.split_key})")
 
 # =====================================
 # 2. DEFINISI FITUR & LABEL
 # =====================================
-X = df[["suhu", "kelembapan", "tekanan", "kecepatan_angin"]]
-y = df["kualitas_udara"]
-
 print("\n2. Distribusi kualitas udara:")
-print(y.value_counts())
+for label, jumlah in split["meta"]["label_counts"].items():
+    print(f"   {label}: {jumlah}")
 
 # =====================================
 # 3. SPLIT TRAIN-TEST
 # =====================================
 print("\n3. Membagi data train-test...")
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    random_state=42,
-    stratify=y
-)
-print(f"   Data training: {len(X_train)}")
-print(f"   Data testing: {len(X_test)}")
+X_test, y_test = split["X_test"], split["y_test"]
+print(f"   Data training: {len(split['train_idx'])}")
+print(f"   Data testing: {len(split['test_idx'])}")
 
 # =====================================
 # 4. NORMALISASI
 # =====================================
 print("\n4. Melakukan normalisasi data...")
-scaler = MinMaxScaler()
-X_train_scaled = scaler.fit_transform(X_train)
+scaler = split["scaler"]
 X_test_scaled = scaler.transform(X_test)
 
 # Simpan scaler
@@ -66,9 +69,9 @@ print(f"   Scaler disimpan: {SCALER_PATH}")
 # 5. SEIMBANGKAN DATA (SMOTE)
 # =====================================
 print("\n5. Menyeimbangkan data dengan SMOTE...")
-smote = SMOTE(random_state=42)
-X_train_res, y_train_res = smote.fit_resample(X_train_scaled, y_train)
-print(f"   Data setelah SMOTE: {len(X_train_res)}")
+resampled = cache.resampled()
+X_train_res, y_train_res = resampled["X_train"], resampled["y_train"]
+print(f"   Data setelah SMOTE: {len(X_train_res)} ({'dari cache' if resampled['hit'] else 'dihitung baru'})")
 
 # =====================================
 # 6. TRAINING RANDOM FOREST
@@ -106,7 +109,53 @@ print(classification_report(y_test, y_pred))
 joblib.dump(model, MODEL_PATH)
 print(f"\n8. Model disimpan: {MODEL_PATH}")
 
+# =====================================
+# 9. EKSPOR FOREST FORMAT ARRAY
+# =====================================
+# Dipakai api_predict.py dengan MODEL_ENGINE=flat (tanpa sklearn saat prediksi)
+export_forest(model, FLAT_MODEL_PATH)
+print(f"\n9. Forest format array disimpan: {FLAT_MODEL_PATH}")
+# Versi dengan scaler dilipat ke threshold (MODEL_ENGINE=flat_raw, tanpa scaler.transform)
+export_forest(model, RAW_FLAT_MODEL_PATH, scaler=scaler)
+print(f"   Forest input mentah disimpan: {RAW_FLAT_MODEL_PATH}")
+# Format ringkas .rfc yang di-mmap (MODEL_ENGINE=compact / compact_raw, muat hampir instan)
+export_compact(model, COMPACT_MODEL_PATH)
+export_compact(model, RAW_COMPACT_MODEL_PATH, scaler=scaler)
+print(f"   Forest format ringkas disimpan: {COMPACT_MODEL_PATH}, {RAW_COMPACT_MODEL_PATH}")
+
+# =====================================
+# 10. SIMPAN STATISTIK DATASET
+# =====================================
+# Dibaca api_predict.py untuk /stats tanpa menghitung ulang dari DataFrame.
+# Statistik hanya bergantung pada dataset, dihitung ulang jika dataset berubah.
+if baca_statistik(DATASET_PATH, STATS_PATH) is None:
+    simpan_statistik(load_dataset_lean(DATASET_PATH), DATASET_PATH, STATS_PATH)
+    print(f"\n10. Statistik dataset disimpan: {STATS_PATH}")
+else:
+    print(f"\n10. Statistik dataset masih valid: {STATS_PATH}")
+
+# =====================================
+# 11. PUBLISH KE REGISTRY MODEL
+# =====================================
+# API yang sedang berjalan memuat versi baru ini tanpa restart
+# (watcher registry atau POST /admin/reload, lihat model_registry.py)
+version = publish_version({
+    "sklearn": MODEL_PATH,
+    "flat": FLAT_MODEL_PATH,
+    "flat_raw": RAW_FLAT_MODEL_PATH,
+    "compact": COMPACT_MODEL_PATH,
+    "compact_raw": RAW_COMPACT_MODEL_PATH,
+    "scaler": SCALER_PATH
+})
+print(f"\n11. Model dipublish ke registry: {os.path.join(REGISTRY_DIR, version)}")
+
 print("\n=== TRAINING SELESAI ===")
 print(f"\nFile yang dihasilkan:")
 print(f"  - {MODEL_PATH}")
 print(f"  - {SCALER_PATH}")
+print(f"  - {FLAT_MODEL_PATH}")
+print(f"  - {RAW_FLAT_MODEL_PATH}")
+print(f"  - {COMPACT_MODEL_PATH}")
+print(f"  - {RAW_COMPACT_MODEL_PATH}")
+print(f"  - {STATS_PATH}")
+print(f"  - {os.path.join(REGISTRY_DIR, version)}/")
@@ -0,0 +1,60 @@
+"""
+Aturan validasi input sensor (dipakai bersama oleh API dan tool offline).
+
+Range valid diambil dari dataset Beijing Air Quality; input di luar
+range ditolak dengan pesan error per field.
+"""
+import numpy as np
+
+FEATURE_COLUMNS = ["suhu", "kelembapan", "tekanan", "kecepatan_angin"]
+
+VALID_RANGES = {
+    "suhu": {"min": -20, "max": 40, "unit": "°C", "label": "Suhu"},
+    "kelembapan": {"min": -40, "max": 30, "unit": "", "label": "Titik Embun (Kelembapan)"},
+    "tekanan": {"min": 990, "max": 1045, "unit": "mb", "label": "Tekanan Udara"},
+    "kecepatan_angin": {"min": 0, "max": 15, "unit": "m/s", "label": "Kecepatan Angin"}
+}
+
+VALIDATION_MESSAGES = {
+    "suhu": "Suhu harus antara {min}°C sampai {max}°C. Nilai Anda: {nilai}°C",
+    "kelembapan": "Titik Embun harus antara {min} sampai {max}. Nilai Anda: {nilai}",
+    "tekanan": "Tekanan Udara harus antara {min}mb sampai {max}mb. Nilai Anda: {nilai}mb",
+    "kecepatan_angin": "Kecepatan Angin harus antara {min}m/s sampai {max}m/s. Nilai Anda: {nilai}m/s"
+}
+
+VALID_RANGES_TEXT = {
+    "suhu": f"{VALID_RANGES['suhu']['min']} sampai {VALID_RANGES['suhu']['max']} °C",
+    "kelembapan": f"{VALID_RANGES['kelembapan']['min']} sampai {VALID_RANGES['kelembapan']['max']}",
+    "tekanan": f"{VALID_RANGES['tekanan']['min']} sampai {VALID_RANGES['tekanan']['max']} mb",
+    "kecepatan_angin": f"{VALID_RANGES['kecepatan_angin']['min']} sampai {VALID_RANGES['kecepatan_angin']['max']} m/s"
+}
+
+# Batas bawah/atas dalam bentuk array agar validasi batch cukup satu operasi
+RANGE_MIN = np.array([VALID_RANGES[f]["min"] for f in FEATURE_COLUMNS], dtype=np.float64)
+RANGE_MAX = np.array([VALID_RANGES[f]["max"] for f in FEATURE_COLUMNS], dtype=np.float64)
+
+
+def validasi_range(X):
+    """
+    Validasi range untuk banyak baris sekaligus.
+    X: array (n, 4) dengan urutan FEATURE_COLUMNS.
+    Mengembalikan mask boolean (n, 4), True jika nilai di dalam range.
+    NaN dianggap di luar range.
+    """
+    return (X >= RANGE_MIN) & (X <= RANGE_MAX)
+
+
+def get_validation_errors(values, valid_mask):
+    """Menyusun pesan error validasi untuk satu baris input"""
+    validation_errors = []
+    for i, field in enumerate(FEATURE_COLUMNS):
+        if not valid_mask[i]:
+            validation_errors.append({
+                "field": field,
+                "message": VALIDATION_MESSAGES[field].format(
+                    min=VALID_RANGES[field]["min"],
+                    max=VALID_RANGES[field]["max"],
+                    nilai=float(values[i])
+                )
+            })
+    return validation_errors